@@ -0,0 +1,192 @@
+"""
+Single-pass aggregation of whale positions and trades.
+
+ActivityAggregate keeps running count / USD totals overall, per side
+(LONG/SHORT or BUY/SELL) and per symbol. A batch is folded in with one walk
+over the records, and add()/remove() keep the totals current as records
+stream in or close, so summaries never rebuild filtered copies of the data.
+aggregate_columns() does the same for columnar input with one bincount
+per statistic.
+"""
+
+import heapq
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+class ActivityAggregate:
+    """Running totals by side and symbol for position or trade records"""
+
+    def __init__(self, records: Iterable[Dict] = (), side_key: str = 'side',
+                 value_key: str = 'amount_usd', symbol_key: str = 'symbol'):
+        self.side_key = side_key
+        self.value_key = value_key
+        self.symbol_key = symbol_key
+        self.count = 0
+        self.value = 0
+        self.sides: Dict[str, Dict] = {}
+        self.symbols: Dict[str, Dict] = {}
+        self.extend(records)
+
+    def _apply(self, symbol: str, side: str, value, sign: int):
+        self.count += sign
+        self.value += sign * value
+
+        totals = self.sides.get(side)
+        if totals is None:
+            totals = self.sides[side] = {'count': 0, 'value': 0}
+        totals['count'] += sign
+        totals['value'] += sign * value
+
+        totals = self.symbols.get(symbol)
+        if totals is None:
+            totals = self.symbols[symbol] = {'count': 0, 'value': 0}
+        totals['count'] += sign
+        totals['value'] += sign * value
+        if not totals['count']:
+            del self.symbols[symbol]
+
+    def add(self, record: Dict):
+        self._apply(record[self.symbol_key], record[self.side_key], record[self.value_key], 1)
+
+    def remove(self, record: Dict):
+        """Take back a record previously added (closed position, expired trade)"""
+        self._apply(record[self.symbol_key], record[self.side_key], record[self.value_key], -1)
+
+    def extend(self, records: Iterable[Dict]):
+        """Fold in a batch with a single pass, grouping by (symbol, side) first"""
+        symbol_key, side_key, value_key = self.symbol_key, self.side_key, self.value_key
+        groups: Dict[Tuple[str, str], List] = {}
+        for record in records:
+            key = (record[symbol_key], record[side_key])
+            totals = groups.get(key)
+            if totals is None:
+                groups[key] = [1, record[value_key]]
+            else:
+                totals[0] += 1
+                totals[1] += record[value_key]
+        self._merge(groups)
+
+    def _merge(self, groups: Dict[Tuple[str, str], List]):
+        for (symbol, side), (count, value) in groups.items():
+            self.count += count
+            self.value += value
+            for table, key in ((self.sides, side), (self.symbols, symbol)):
+                totals = table.get(key)
+                if totals is None:
+                    totals = table[key] = {'count': 0, 'value': 0}
+                totals['count'] += count
+                totals['value'] += value
+
+    def side(self, side: str) -> Dict:
+        return self.sides.get(side, {'count': 0, 'value': 0})
+
+    def ratio(self, numerator: str, denominator: str):
+        """Value ratio between two sides, "∞" when the denominator side is empty"""
+        below = self.side(denominator)['value']
+        return round(self.side(numerator)['value'] / below, 2) if below > 0 else "∞"
+
+    def top_symbols(self, n: int = 5, by: str = 'value') -> List[Tuple[str, Dict]]:
+        """The n symbols with the most value (or count), as (symbol, totals) pairs"""
+        return heapq.nlargest(n, self.symbols.items(), key=lambda item: item[1][by])
+
+    def most_active_symbol(self) -> Optional[str]:
+        """Symbol with the most records"""
+        top = self.top_symbols(1, by='count')
+        return top[0][0] if top else None
+
+def _factorize(column, labels: Optional[Sequence[str]]):
+    """Integer codes and their labels; columns that are already coded are passed through"""
+    if labels is not None:
+        return np.asarray(column, dtype=np.int64), list(labels)
+    return pd.factorize(np.asarray(column))
+
+def aggregate_columns(symbols, sides, values, symbol_labels: Optional[Sequence[str]] = None,
+                      side_labels: Optional[Sequence[str]] = None) -> ActivityAggregate:
+    """
+    Vectorized aggregate of columnar records (symbol and side columns plus USD
+    values) with one bincount per statistic. Label columns are factorized
+    unless they are already integer codes into `symbol_labels` / `side_labels`.
+    """
+    symbol_codes, symbol_labels = _factorize(symbols, symbol_labels)
+    side_codes, side_labels = _factorize(sides, side_labels)
+    values = np.asarray(values, dtype=np.float64)
+
+    group_codes = symbol_codes * len(side_labels) + side_codes
+    size = len(symbol_labels) * len(side_labels)
+    counts = np.bincount(group_codes, minlength=size)
+    sums = np.bincount(group_codes, weights=values, minlength=size)
+
+    aggregate = ActivityAggregate()
+    aggregate._merge({
+        (str(symbol_labels[code // len(side_labels)]), str(side_labels[code % len(side_labels)])):
+            [int(counts[code]), float(sums[code])]
+        for code in np.flatnonzero(counts)
+    })
+    return aggregate
+
+if __name__ == "__main__":
+    import time
+    from backend.simulator import SYMBOL_WEIGHTS
+
+    n = 1_000_000
+    rng = np.random.default_rng(1)
+    names = np.array(list(SYMBOL_WEIGHTS))
+    weights = np.array(list(SYMBOL_WEIGHTS.values()))
+    symbol_codes = rng.choice(len(names), size=n, p=weights / weights.sum())
+    side_codes = (rng.random(n) >= 0.55).astype(np.int64)
+    symbol_column = names[symbol_codes]
+    side_column = np.array(['LONG', 'SHORT'])[side_codes]
+    value_column = rng.integers(50_000, 5_000_000, size=n)
+    positions = [
+        {'symbol': symbol, 'side': side, 'amount_usd': value}
+        for symbol, side, value in zip(symbol_column.tolist(), side_column.tolist(), value_column.tolist())
+    ]
+    print(f"Aggregating {n:,} positions")
+
+    # Previous approach: filtered copies plus a count per distinct symbol
+    start = time.perf_counter()
+    total = sum(pos['amount_usd'] for pos in positions)
+    longs = [pos for pos in positions if pos['side'] == 'LONG']
+    shorts = [pos for pos in positions if pos['side'] == 'SHORT']
+    long_value = sum(pos['amount_usd'] for pos in longs)
+    short_value = sum(pos['amount_usd'] for pos in shorts)
+    most_active = max(set(pos['symbol'] for pos in positions),
+                      key=lambda x: sum(1 for pos in positions if pos['symbol'] == x))
+    legacy = time.perf_counter() - start
+    print(f"  multi-pass:      {legacy * 1e3:7.0f}ms")
+
+    start = time.perf_counter()
+    aggregate = ActivityAggregate(positions)
+    single = time.perf_counter() - start
+    assert aggregate.value == total and aggregate.side('LONG')['value'] == long_value
+    assert aggregate.most_active_symbol() == most_active
+    print(f"  single pass:     {single * 1e3:7.0f}ms ({legacy / single:.1f}x)")
+
+    start = time.perf_counter()
+    columns = aggregate_columns(symbol_column, side_column, value_column)
+    vectorized = time.perf_counter() - start
+    assert np.isclose(columns.side('SHORT')['value'], short_value)
+    print(f"  columnar labels: {vectorized * 1e3:7.0f}ms ({legacy / vectorized:.1f}x)")
+
+    # Columns that already carry integer codes skip the string factorization
+    start = time.perf_counter()
+    coded = aggregate_columns(symbol_codes, side_codes, value_column, names, ['LONG', 'SHORT'])
+    vectorized = time.perf_counter() - start
+    assert coded.most_active_symbol() == most_active
+    print(f"  columnar codes:  {vectorized * 1e3:7.0f}ms ({legacy / vectorized:.0f}x)")
+
+    # Streaming: 10k positions close and 10k open, summary stays current
+    start = time.perf_counter()
+    for pos in positions[:10_000]:
+        aggregate.remove(pos)
+    for pos in positions[:10_000]:
+        aggregate.add(pos)
+    streaming = time.perf_counter() - start
+    assert aggregate.value == total
+
+    start = time.perf_counter()
+    top = aggregate.top_symbols()
+    query = time.perf_counter() - start
+    print(f"  20k streaming updates: {streaming * 1e3:.1f}ms, then top symbols in {query * 1e6:.0f}µs")
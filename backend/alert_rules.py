@@ -0,0 +1,319 @@
+"""
+Rule engine for whale, position and price alerts.
+
+A rule says "alert me when a <kind> event for <token>/<side> goes above
+<threshold>", where the threshold is USD value for whale transactions,
+long/short ratio difference for positions and absolute % move for prices.
+'*' matches any token or side.
+
+Rules are compiled into buckets keyed by (kind, token, side), each holding
+its thresholds in a sorted list. An event only looks at the four buckets
+that can match it ((token, side), (token, *), (*, side), (*, *)) and one
+bisect per bucket finds every rule whose threshold it exceeds, so
+evaluation cost does not grow with the number of unrelated rules.
+
+One engine per process (get_alert_engine()) holds the rules loaded from
+ALERT_RULES_PATH, or DEFAULT_RULES when that file does not exist. The whale
+and price ingestion paths evaluate it as events arrive and publish every
+match to the ALERTS stream.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from bisect import bisect_left
+from datetime import datetime
+from itertools import count
+from typing import Dict, Iterable, List, Optional
+
+from backend.event_buffer import EventRingBuffer
+from backend.price_feed import SYMBOL_TO_COIN_ID
+from backend.simulator import symbol_to_token
+from backend.whale_tracker import format_usd_value
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RULE_KINDS = ('whale', 'position', 'price')
+ANY = '*'
+
+# JSON list of make_rule() arguments
+ALERT_RULES_PATH = os.environ.get(
+    "ALERT_RULES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "alert_rules.json")
+)
+# Rules used when there is no rules file
+DEFAULT_RULES = [
+    {'kind': 'whale', 'threshold': 10_000_000},
+    {'kind': 'position', 'threshold': 0.15},
+    {'kind': 'price', 'threshold': 5.0}
+]
+
+# Alerts raised by the ingestion paths, served by the data service as the 'alerts' stream
+ALERTS = EventRingBuffer(1000)
+
+class _RuleBucket:
+    """Rules of one (kind, token, side), sorted by threshold on demand"""
+
+    __slots__ = ('thresholds', 'rule_ids', 'pending', 'dirty')
+
+    def __init__(self):
+        self.thresholds: List[float] = []
+        self.rule_ids: List[int] = []
+        self.pending: List[tuple] = []
+        self.dirty = False
+
+    def compile(self, rules: Dict[int, Dict]):
+        entries = [(t, r) for t, r in zip(self.thresholds, self.rule_ids) if r in rules]
+        entries.extend(self.pending)
+        entries.sort()
+        self.thresholds = [t for t, _ in entries]
+        self.rule_ids = [r for _, r in entries]
+        self.pending = []
+        self.dirty = False
+
+def make_rule(kind: str, threshold: float, token: str = ANY, side: str = ANY,
+              owner: Optional[str] = None, message: Optional[str] = None) -> Dict:
+    """Build a rule dict; threshold is USD (whale), ratio difference (position) or % move (price)"""
+    if kind not in RULE_KINDS:
+        raise ValueError(f"Unknown rule kind: {kind}")
+    return {
+        'kind': kind,
+        'token': symbol_to_token(token.upper()) if token != ANY else ANY,
+        'side': side.upper() if side != ANY else ANY,
+        'threshold': float(threshold),
+        'owner': owner,
+        'message': message
+    }
+
+def whale_event(token: str, tx_type: str, usd_value: float, data: Optional[Dict] = None) -> Dict:
+    return {'kind': 'whale', 'token': token, 'side': tx_type.upper(), 'value': usd_value, 'data': data or {}}
+
+def position_event(position: Dict) -> Dict:
+    """Event for a whale_position_binance position dict"""
+    return {
+        'kind': 'position',
+        'token': symbol_to_token(position['symbol']),
+        'side': position['side'],
+        'value': position['ratio_diff'],
+        'data': position
+    }
+
+def price_event(token: str, change_pct: float, price: Optional[float] = None) -> Dict:
+    return {
+        'kind': 'price',
+        'token': token,
+        'side': 'UP' if change_pct >= 0 else 'DOWN',
+        'value': abs(change_pct),
+        'data': {'change_pct': change_pct, 'price': price}
+    }
+
+class AlertRuleEngine:
+    """Indexed set of alert rules evaluated against streaming events"""
+
+    def __init__(self, rules: Iterable[Dict] = ()):
+        self.rules: Dict[int, Dict] = {}
+        self._buckets: Dict[tuple, _RuleBucket] = {}
+        self._ids = count(1)
+        self._lock = threading.Lock()
+        for rule in rules:
+            self.add_rule(rule)
+
+    def add_rule(self, rule: Dict) -> int:
+        """Register a rule (see make_rule) and return its id"""
+        with self._lock:
+            rule_id = next(self._ids)
+            rule = dict(rule, id=rule_id)
+            self.rules[rule_id] = rule
+            bucket = self._buckets.setdefault((rule['kind'], rule['token'], rule['side']), _RuleBucket())
+            bucket.pending.append((rule['threshold'], rule_id))
+            bucket.dirty = True
+            return rule_id
+
+    def remove_rule(self, rule_id: int) -> bool:
+        with self._lock:
+            rule = self.rules.pop(rule_id, None)
+            if rule is None:
+                return False
+            self._buckets[(rule['kind'], rule['token'], rule['side'])].dirty = True
+            return True
+
+    def compile(self):
+        """Sort every changed bucket now instead of on the next matching event"""
+        with self._lock:
+            for bucket in self._buckets.values():
+                if bucket.dirty:
+                    bucket.compile(self.rules)
+
+    def match(self, event: Dict) -> List[int]:
+        """Ids of the rules whose threshold the event's value exceeds"""
+        kind, token, side, value = event['kind'], event['token'], event['side'], event['value']
+        matched: List[int] = []
+        for key in ((kind, token, side), (kind, token, ANY), (kind, ANY, side), (kind, ANY, ANY)):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                continue
+            if bucket.dirty:
+                with self._lock:
+                    if bucket.dirty:
+                        bucket.compile(self.rules)
+            ids = bucket.rule_ids
+            matched.extend(ids[:bisect_left(bucket.thresholds, value)])
+        return matched
+
+    def evaluate(self, event: Dict) -> List[str]:
+        """Formatted alert messages for one event"""
+        return [format_alert(self.rules[rule_id], event) for rule_id in self.match(event)
+                if rule_id in self.rules]
+
+    def evaluate_many(self, events: Iterable[Dict]) -> List[str]:
+        alerts: List[str] = []
+        for event in events:
+            alerts.extend(self.evaluate(event))
+        return alerts
+
+def format_alert(rule: Dict, event: Dict) -> str:
+    """Alert text for a matched rule; a rule's own message may use {token}, {side}, {value}"""
+    data = event['data']
+    if rule.get('message'):
+        return rule['message'].format(token=event['token'], side=event['side'], value=event['value'], **data)
+
+    if event['kind'] == 'whale':
+        return (f"🚨 WHALE ALERT: Large {event['side'].lower()} detected! "
+                f"{event['token']} ({format_usd_value(event['value'])})"
+                + (f" on {data['exchange']}" if data.get('exchange') else ""))
+    if event['kind'] == 'position':
+        return (f"🚨 Strong {event['side']} bias detected in {data['symbol']}: "
+                f"{event['value'] * 100:.1f}% imbalance, ~${data['amount_usd']:,} position")
+    arrow = "📈" if event['side'] == 'UP' else "📉"
+    return f"{arrow} {event['token']} moved {data['change_pct']:+.2f}% (alert at {rule['threshold']:.1f}%)"
+
+def load_rules(path: str) -> AlertRuleEngine:
+    """Build an engine from a JSON list of make_rule() arguments"""
+    with open(path, 'r') as f:
+        specs = json.load(f)
+    engine = AlertRuleEngine(make_rule(**spec) for spec in specs)
+    engine.compile()
+    logger.info(f"Loaded {len(engine.rules)} alert rules from {path}")
+    return engine
+
+_ENGINE: Dict[str, AlertRuleEngine] = {}
+_ENGINE_LOCK = threading.Lock()
+
+def get_alert_engine() -> AlertRuleEngine:
+    """The process-wide engine, built from ALERT_RULES_PATH (or DEFAULT_RULES) on first use"""
+    with _ENGINE_LOCK:
+        if 'engine' not in _ENGINE:
+            engine = None
+            if os.path.exists(ALERT_RULES_PATH):
+                try:
+                    engine = load_rules(ALERT_RULES_PATH)
+                except (OSError, ValueError, TypeError) as e:
+                    logger.error(f"Error loading alert rules from {ALERT_RULES_PATH}: {e}, using the default rules")
+            if engine is None:
+                engine = AlertRuleEngine(make_rule(**spec) for spec in DEFAULT_RULES)
+                engine.compile()
+            _ENGINE['engine'] = engine
+        return _ENGINE['engine']
+
+def _publish(engine: AlertRuleEngine, event: Dict, rule_ids: Iterable[int], buffer: EventRingBuffer) -> List[str]:
+    alerts: List[str] = []
+    for rule_id in rule_ids:
+        rule = engine.rules.get(rule_id)
+        if rule is None:
+            continue
+        message = format_alert(rule, event)
+        buffer.push({
+            'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'kind': event['kind'],
+            'token': event['token'],
+            'side': event['side'],
+            'owner': rule['owner'],
+            'message': message
+        })
+        alerts.append(message)
+    return alerts
+
+def publish_alerts(event: Dict, buffer: EventRingBuffer = ALERTS) -> List[str]:
+    """Evaluate one event against the process-wide engine and publish the matches"""
+    engine = get_alert_engine()
+    return _publish(engine, event, engine.match(event), buffer)
+
+_PRICE_MATCHES: Dict[str, set] = {}
+_PRICE_LOCK = threading.Lock()
+
+def publish_price_alerts(prices: Dict, buffer: EventRingBuffer = ALERTS) -> List[str]:
+    """
+    Evaluate CoinGecko-style {coin_id: {'usd', 'usd_24h_change'}} data. A
+    rule fires when a token's move first exceeds it, not again on every
+    refresh while the move stays above the threshold.
+    """
+    engine = get_alert_engine()
+    alerts: List[str] = []
+    with _PRICE_LOCK:
+        for token, coin_id in SYMBOL_TO_COIN_ID.items():
+            data = prices.get(coin_id)
+            if not data or data.get('usd_24h_change') is None:
+                continue
+            event = price_event(token, data['usd_24h_change'], data.get('usd'))
+            matched = set(engine.match(event))
+            new = matched - _PRICE_MATCHES.get(token, set())
+            _PRICE_MATCHES[token] = matched
+            alerts.extend(_publish(engine, event, sorted(new), buffer))
+    return alerts
+
+def get_recent_alerts(count: int = 20) -> List[Dict]:
+    """Most recent alerts, newest last"""
+    return ALERTS.latest(count)
+
+if __name__ == "__main__":
+    import random
+
+    # Benchmark: 100k random rules, then time evaluation per event
+    rng = random.Random(42)
+    tokens = ['BTC', 'ETH', 'SOL', 'BNB', 'ADA', 'DOT', ANY]
+    sides = {
+        'whale': ['BUY', 'SELL', 'TRANSFER', ANY],
+        'position': ['LONG', 'SHORT', ANY],
+        'price': ['UP', 'DOWN', ANY]
+    }
+
+    def random_threshold(kind: str) -> float:
+        if kind == 'whale':
+            return 10 ** rng.uniform(5, 9)          # $100K .. $1B
+        if kind == 'position':
+            return rng.uniform(0.02, 0.6)
+        return rng.uniform(0.5, 20)
+
+    engine = AlertRuleEngine()
+    start = time.perf_counter()
+    for _ in range(100_000):
+        kind = rng.choice(RULE_KINDS)
+        engine.add_rule(make_rule(kind, random_threshold(kind), rng.choice(tokens), rng.choice(sides[kind])))
+    engine.compile()
+    print(f"Loaded and compiled {len(engine.rules):,} rules in {time.perf_counter() - start:.2f}s")
+
+    events = []
+    for _ in range(20_000):
+        token = rng.choice(tokens[:-1])
+        kind = rng.choice(RULE_KINDS)
+        if kind == 'whale':
+            events.append(whale_event(token, rng.choice(['Buy', 'Sell', 'Transfer']), 10 ** rng.uniform(5, 8.5)))
+        elif kind == 'position':
+            events.append(position_event({'symbol': f"{token}USDT", 'side': rng.choice(['LONG', 'SHORT']),
+                                          'ratio_diff': rng.uniform(0, 0.4), 'amount_usd': 50_000}))
+        else:
+            events.append(price_event(token, rng.uniform(-8, 8)))
+
+    timings = []
+    matches = 0
+    for event in events:
+        t0 = time.perf_counter()
+        matches += len(engine.match(event))
+        timings.append(time.perf_counter() - t0)
+    timings.sort()
+    print(f"Evaluated {len(events):,} events: mean {sum(timings) / len(timings) * 1e6:.1f}us, "
+          f"p99 {timings[int(len(timings) * 0.99)] * 1e6:.1f}us, "
+          f"{matches / len(events):.0f} matched rules/event on average")
+    print("Sample alerts:", engine.evaluate(events[0])[:2])
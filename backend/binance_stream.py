@@ -0,0 +1,221 @@
+"""
+Real-time Binance USDⓈ-M futures data over the combined WebSocket stream.
+
+Subscribes to markPrice, aggTrade and forceOrder (liquidations) for the
+tracked symbols and normalizes them into the schemas used elsewhere in the
+backend: large aggregated trades look like get_simulated_recent_trades()
+rows, liquidations like positions (with status LIQUIDATED), and mark
+prices are kept per symbol. Messages are handled inline as they arrive,
+so a slow consumer applies backpressure to the socket.
+
+The connection is re-established on errors, when no message has arrived
+within HEARTBEAT_TIMEOUT (stale stream), and before Binance's 24h
+connection limit. Protocol-level pings from the server are answered
+automatically by the websockets library.
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from websockets.asyncio.client import connect
+from websockets.exceptions import WebSocketException
+
+from backend.alert_rules import publish_alerts, whale_event
+from backend.event_buffer import EventRingBuffer
+from backend.simulator import symbol_to_token
+from backend.whale_position_binance import SYMBOLS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BINANCE_FUTURES_WS_URL = os.environ.get("BINANCE_FUTURES_WS_URL", "wss://fstream.binance.com")
+
+MIN_TRADE_USD = 100_000
+HEARTBEAT_TIMEOUT = 30             # seconds without any message before reconnecting
+MAX_CONNECTION_AGE = 23 * 3600     # Binance closes connections after 24h
+MAX_RECONNECT_DELAY = 60
+
+# Shared buffers read by the dashboard and bot
+BINANCE_TRADES = EventRingBuffer(1000)
+LIQUIDATIONS = EventRingBuffer(1000)
+MARK_PRICES: Dict[str, Dict] = {}
+
+def stream_names(symbols: Sequence[str]) -> List[str]:
+    """Combined stream names: per-symbol mark price and trades, all-market liquidations"""
+    names = []
+    for symbol in symbols:
+        lower = symbol.lower()
+        names += [f"{lower}@markPrice@1s", f"{lower}@aggTrade"]
+    names.append("!forceOrder@arr")
+    return names
+
+def combined_stream_url(base_url: str, symbols: Sequence[str]) -> str:
+    return f"{base_url}/stream?streams={'/'.join(stream_names(symbols))}"
+
+def _format_time(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000).strftime("%Y-%m-%d %H:%M:%S")
+
+def normalize_mark_price(data: Dict) -> Dict:
+    return {
+        'symbol': data['s'],
+        'mark_price': float(data['p']),
+        'index_price': float(data.get('i', 0)),
+        'funding_rate': float(data.get('r', 0)),
+        'time': data['E'] / 1000
+    }
+
+def normalize_agg_trade(data: Dict, mark_price: Optional[float] = None) -> Dict:
+    """aggTrade -> trade row; buyer-is-maker means the aggressor sold"""
+    price, quantity = float(data['p']), float(data['q'])
+    return {
+        "time": _format_time(data['T']),
+        "symbol": data['s'],
+        "type": "SELL" if data['m'] else "BUY",
+        "amount_usd": round(price * quantity, 2),
+        "quantity": round(quantity, 6),
+        "price": round(price, 6),
+        "trade_id": f"AGG_{data['a']}",
+        "exchange": "Binance",
+        # Distance from the mark price, in %
+        "market_impact": round(abs(price / mark_price - 1) * 100, 2) if mark_price else 0.0
+    }
+
+def normalize_liquidation(data: Dict) -> Dict:
+    """forceOrder -> liquidated position row; a SELL order closes a LONG"""
+    order = data['o']
+    price = float(order.get('ap') or order['p'])
+    quantity = float(order.get('z') or order['q'])
+    return {
+        "time": _format_time(order['T']),
+        "symbol": order['s'],
+        "side": "LONG" if order['S'] == "SELL" else "SHORT",
+        "amount_usd": round(price * quantity, 2),
+        "position_size": round(quantity, 6),
+        "current_price": round(price, 6),
+        "liquidation_price": round(price, 6),
+        "position_id": f"LIQ_{order['s']}_{order['T']}",
+        "exchange": "Binance",
+        "status": "LIQUIDATED"
+    }
+
+class BinanceFuturesStream:
+    """Reconnecting consumer of the Binance futures combined stream"""
+
+    def __init__(self, symbols: Sequence[str] = SYMBOLS, base_url: str = None,
+                 min_trade_usd: float = MIN_TRADE_USD, trades: EventRingBuffer = BINANCE_TRADES,
+                 liquidations: EventRingBuffer = LIQUIDATIONS, mark_prices: Dict = MARK_PRICES,
+                 heartbeat_timeout: float = HEARTBEAT_TIMEOUT, reconnect_delay: float = 1):
+        self.symbols = list(symbols)
+        self.base_url = base_url or BINANCE_FUTURES_WS_URL
+        self.min_trade_usd = min_trade_usd
+        self.trades = trades
+        self.liquidations = liquidations
+        self.mark_prices = mark_prices
+        self.heartbeat_timeout = heartbeat_timeout
+        self.reconnect_delay = reconnect_delay
+        self.stats = {'received': 0, 'mark_prices': 0, 'trades': 0, 'filtered': 0,
+                      'liquidations': 0, 'errors': 0, 'reconnects': 0, 'stale': 0}
+        self._stopping = False
+
+    @property
+    def url(self) -> str:
+        return combined_stream_url(self.base_url, self.symbols)
+
+    def handle(self, message: Dict):
+        """Route one combined-stream message"""
+        self.stats['received'] += 1
+        data = message.get('data', message)
+        event = data.get('e')
+
+        if event == 'markPriceUpdate':
+            self.mark_prices[data['s']] = normalize_mark_price(data)
+            self.stats['mark_prices'] += 1
+
+        elif event == 'aggTrade':
+            if float(data['p']) * float(data['q']) < self.min_trade_usd:
+                self.stats['filtered'] += 1
+                return
+            mark = self.mark_prices.get(data['s'])
+            trade = normalize_agg_trade(data, mark['mark_price'] if mark else None)
+            self.trades.push(trade, data['T'] / 1000)
+            self.stats['trades'] += 1
+            publish_alerts(whale_event(symbol_to_token(trade['symbol']), trade['type'], trade['amount_usd'],
+                                       {'exchange': 'Binance'}))
+
+        elif event == 'forceOrder':
+            liquidation = normalize_liquidation(data)
+            self.liquidations.push(liquidation, data['o']['T'] / 1000)
+            self.stats['liquidations'] += 1
+
+    async def _consume(self):
+        opened = time.monotonic()
+        async with connect(self.url, ping_interval=20, ping_timeout=20, max_queue=256) as ws:
+            logger.info(f"Connected to Binance futures stream ({len(self.symbols)} symbols)")
+            while not self._stopping:
+                if time.monotonic() - opened > MAX_CONNECTION_AGE:
+                    logger.info("Rotating Binance stream connection before the 24h limit")
+                    return
+                try:
+                    raw = await asyncio.wait_for(ws.recv(), timeout=self.heartbeat_timeout)
+                except asyncio.TimeoutError:
+                    self.stats['stale'] += 1
+                    logger.warning(f"No Binance stream data for {self.heartbeat_timeout}s, reconnecting")
+                    return
+                try:
+                    self.handle(json.loads(raw))
+                except (KeyError, ValueError, TypeError) as e:
+                    self.stats['errors'] += 1
+                    logger.warning(f"Error decoding Binance stream message: {e}")
+
+    async def run(self):
+        """Consume the stream until stop() is called, reconnecting on errors"""
+        delay = self.reconnect_delay
+        while not self._stopping:
+            started = time.monotonic()
+            try:
+                await self._consume()
+            except (OSError, WebSocketException) as e:
+                logger.warning(f"Binance stream disconnected: {e}")
+            if self._stopping:
+                break
+
+            if time.monotonic() - started > MAX_RECONNECT_DELAY:
+                delay = self.reconnect_delay
+            self.stats['reconnects'] += 1
+            logger.info(f"Reconnecting Binance stream in {delay}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    def stop(self):
+        self._stopping = True
+
+_STREAM_LOCK = threading.Lock()
+_STREAM_THREAD: Optional[threading.Thread] = None
+
+def start_binance_stream(symbols: Sequence[str] = SYMBOLS) -> bool:
+    """Start the stream once per process in a background thread. Returns True if running."""
+    global _STREAM_THREAD
+
+    with _STREAM_LOCK:
+        if _STREAM_THREAD is None or not _STREAM_THREAD.is_alive():
+            stream = BinanceFuturesStream(symbols)
+            _STREAM_THREAD = threading.Thread(
+                target=lambda: asyncio.run(stream.run()), name="binance-stream", daemon=True
+            )
+            _STREAM_THREAD.start()
+            logger.info("Binance futures stream started")
+    return True
+
+def get_recent_binance_trades(count: int = 20) -> List[Dict]:
+    """Most recent large futures trades, newest last"""
+    return BINANCE_TRADES.latest(count)
+
+def get_recent_liquidations(count: int = 20) -> List[Dict]:
+    """Most recent liquidations, newest last"""
+    return LIQUIDATIONS.latest(count)
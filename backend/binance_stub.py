@@ -0,0 +1,273 @@
+"""
+Local stand-in for the Binance Futures data endpoints.
+
+Serves deterministic long/short ratio series, open interest and mark
+prices with a configurable per-request latency, reports request weight the way Binance
+does (X-MBX-USED-WEIGHT-1M, 429 + Retry-After when exceeded) and can fail
+chosen symbols, so the position fetcher can be benchmarked offline.
+
+    python backend/binance_stub.py --symbols 6 100 --latency 0.2
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PERIOD_SECONDS = {
+    '5m': 300, '15m': 900, '30m': 1800, '1h': 3600, '2h': 7200,
+    '4h': 14400, '6h': 21600, '12h': 43200, '1d': 86400
+}
+
+def make_symbols(count: int) -> List[str]:
+    """The dashboard symbols followed by synthetic ones up to `count`"""
+    from backend.whale_position_binance import SYMBOLS
+    symbols = list(SYMBOLS[:count])
+    symbols += [f"SYM{i:03d}USDT" for i in range(count - len(symbols))]
+    return symbols
+
+def ratio_row(symbol: str, timestamp_ms: int) -> Dict:
+    """Deterministic topLongShortPositionRatio row for one period"""
+    rng = random.Random(f"{symbol}:{timestamp_ms}")
+    long_ratio = rng.uniform(0.3, 0.7)
+    return {
+        "symbol": symbol,
+        "longShortRatio": f"{long_ratio / (1 - long_ratio):.4f}",
+        "longPositionRatio": f"{long_ratio:.4f}",
+        "shortPositionRatio": f"{1 - long_ratio:.4f}",
+        "timestamp": timestamp_ms
+    }
+
+class BinanceFuturesStub:
+    """In-process HTTP server for the futures data endpoints the dashboard uses"""
+
+    def __init__(self, latency: float = 0.0, fail_symbols: Iterable[str] = (),
+                 weight_limit: int = 2400, clock=None, symbols: Iterable[str] = (),
+                 host: str = "127.0.0.1", port: int = 0):
+        from backend.simulator import BASE_PRICES, SystemClock
+
+        self.latency = latency
+        self.clock = clock or SystemClock()
+        self.fail_symbols = set(fail_symbols)
+        self.weight_limit = weight_limit
+        self.requests: Dict[str, int] = {}
+        self.rows_served = 0
+        self.known_symbols = set(symbols) or {f"{token}USDT" for token in BASE_PRICES}
+        self._window = int(time.time() // 60)
+        self._used = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _charge(self, path: str, weight: int = 1) -> Optional[int]:
+        """Count request weight; returns the used weight, or None when over the limit"""
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+            window = int(time.time() // 60)
+            if window != self._window:
+                self._window, self._used = window, 0
+            if self._used + weight > self.weight_limit:
+                return None
+            self._used += weight
+            return self._used
+
+    def mark_price(self, symbol: str) -> float:
+        """Simulated price for dashboard tokens, a stable made-up one for the rest"""
+        from backend.simulator import BASE_PRICES, symbol_to_token
+        base = BASE_PRICES.get(symbol_to_token(symbol)) or random.Random(symbol).uniform(0.1, 500)
+        drift = random.Random(f"{symbol}:{int(self.clock.now() // 60)}").uniform(-0.01, 0.01)
+        return base * (1 + drift)
+
+    def open_interest(self, symbol: str) -> float:
+        """Smoothly oscillating open interest (in contracts) so deltas are meaningful"""
+        rng = random.Random(symbol)
+        base, phase = rng.uniform(1e4, 1e6), rng.uniform(0, 2 * math.pi)
+        return base * (1 + 0.05 * math.sin(self.clock.now() / 1800 + phase))
+
+    def ratio_series(self, symbol: str, period: str, limit: int,
+                     start_time: Optional[int], end_time: Optional[int]) -> List[Dict]:
+        step = PERIOD_SECONDS[period] * 1000
+        latest = int(self.clock.now() * 1000) // step * step
+        end = min(end_time, latest) // step * step if end_time else latest
+        if start_time:
+            first = -(-start_time // step) * step
+            stamps = range(first, min(end, first + (limit - 1) * step) + 1, step)
+        else:
+            stamps = range(end - (limit - 1) * step, end + 1, step)
+        rows = [ratio_row(symbol, ts) for ts in stamps]
+        with self._lock:
+            self.rows_served += len(rows)
+        return rows
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int, payload, headers: Dict = None):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, str(value))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+                symbol = query.get('symbol', '')
+
+                used = stub._charge(parsed.path)
+                if used is None:
+                    self._reply(429, {"code": -1003, "msg": "Too many requests"}, {"Retry-After": 1})
+                    return
+                if stub.latency:
+                    time.sleep(stub.latency)
+                headers = {"X-MBX-USED-WEIGHT-1M": used}
+
+                if parsed.path == "/fapi/v1/premiumIndex":
+                    self._reply(200, [
+                        {"symbol": sym, "markPrice": f"{stub.mark_price(sym):.4f}", "time": int(stub.clock.now() * 1000)}
+                        for sym in ([symbol] if symbol else stub.known_symbols)
+                    ], headers)
+                elif symbol in stub.fail_symbols:
+                    self._reply(400, {"code": -1121, "msg": "Invalid symbol."}, headers)
+                elif parsed.path == "/futures/data/topLongShortPositionRatio":
+                    period = query.get('period', '5m')
+                    limit = min(int(query.get('limit', 30)), 500)
+                    start = int(query['startTime']) if 'startTime' in query else None
+                    end = int(query['endTime']) if 'endTime' in query else None
+                    self._reply(200, stub.ratio_series(symbol, period, limit, start, end), headers)
+                elif parsed.path == "/fapi/v1/openInterest":
+                    now = stub.clock.now()
+                    self._reply(200, {
+                        "symbol": symbol,
+                        "openInterest": f"{stub.open_interest(symbol):.3f}",
+                        "time": int(now * 1000)
+                    }, headers)
+                else:
+                    self._reply(404, {"code": -1, "msg": "Not found"}, headers)
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+def benchmark_cold_refresh(stub: BinanceFuturesStub, symbols: List[str], workers: int) -> Dict:
+    """Time one get_binance_whale_positions() call against the stub, with no cache and no stored history"""
+    import tempfile
+    from backend import whale_position_binance as wpb
+    from backend.ratio_history import RatioHistory
+
+    wpb.BINANCE_FUTURES_URL = stub.url
+    wpb.POSITIONS_CACHE.clear()
+    with tempfile.TemporaryDirectory() as tmp:
+        wpb.RATIO_HISTORY = RatioHistory(wpb.fetch_position_ratios, os.path.join(tmp, "ratios.db"))
+        start = time.perf_counter()
+        positions = wpb.get_binance_whale_positions(limit=5, symbols=symbols, workers=workers)
+        elapsed = time.perf_counter() - start
+        wpb.RATIO_HISTORY.close()
+    return {
+        'elapsed': elapsed,
+        'positions': len(positions),
+        'symbols_ok': len({pos['symbol'] for pos in positions})
+    }
+
+def benchmark_history_traffic(symbols: List[str], refreshes: int = 12) -> Dict:
+    """
+    Upstream rows downloaded per refresh, with one 5m period closing between
+    refreshes: re-downloading the last `limit` periods vs the startTime cursor.
+    """
+    import tempfile
+    from backend import whale_position_binance as wpb
+    from backend.ratio_history import RatioHistory
+    from backend.simulator import SimulatedClock
+
+    clock = SimulatedClock(start=time.time())
+    stub = BinanceFuturesStub(clock=clock).start()
+    wpb.BINANCE_FUTURES_URL = stub.url
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            wpb.RATIO_HISTORY = RatioHistory(wpb.fetch_position_ratios, os.path.join(tmp, "ratios.db"), clock)
+            wpb.sync_position_ratios(symbols, limit=5)
+            cold_rows = stub.rows_served
+
+            for _ in range(refreshes):
+                clock.advance(300)
+                wpb.sync_position_ratios(symbols, limit=5)
+            steady_rows = stub.rows_served - cold_rows
+
+            stored = sum(len(wpb.RATIO_HISTORY.get_range(symbol)) for symbol in symbols)
+            wpb.RATIO_HISTORY.close()
+    finally:
+        stub.stop()
+
+    return {
+        'cold_rows': cold_rows,
+        'rows_per_refresh': steady_rows / refreshes,
+        'full_rows_per_refresh': 5 * len(symbols),
+        'stored': stored
+    }
+
+def main():
+    import logging
+    import backend.whale_position_binance  # noqa: F401  (configures logging on import)
+
+    parser = argparse.ArgumentParser(description='Benchmark cold position refresh against a local futures stub')
+    parser.add_argument('--symbols', type=int, nargs='+', default=[6, 100], help='Universe sizes to test')
+    parser.add_argument('--latency', type=float, default=0.2, help='Simulated round-trip per request (s)')
+    parser.add_argument('--workers', type=int, default=8, help='Worker pool size for the parallel run')
+    parser.add_argument('--fail', type=int, default=2, help='Number of symbols the stub rejects')
+    parser.add_argument('--history', action='store_true', help='Measure upstream rows per refresh with the ratio history')
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    for count in args.symbols:
+        symbols = make_symbols(count)
+        stub = BinanceFuturesStub(latency=args.latency, fail_symbols=symbols[-args.fail:] if args.fail else ()).start()
+        try:
+            sequential = benchmark_cold_refresh(stub, symbols, workers=1)
+            parallel = benchmark_cold_refresh(stub, symbols, workers=args.workers)
+        finally:
+            stub.stop()
+        print(f"{count:>4} symbols: sequential {sequential['elapsed']:.2f}s, "
+              f"{args.workers} workers {parallel['elapsed']:.2f}s "
+              f"({sequential['elapsed'] / parallel['elapsed']:.1f}x), "
+              f"{parallel['symbols_ok']}/{count} symbols returned")
+
+    if args.history:
+        for count in args.symbols:
+            result = benchmark_history_traffic(make_symbols(count))
+            print(f"{count:>4} symbols: cold sync {result['cold_rows']:,} rows, then "
+                  f"{result['rows_per_refresh']:.0f} rows/refresh with cursors vs "
+                  f"{result['full_rows_per_refresh']:,} re-downloading (stored {result['stored']:,} rows)")
+
+if __name__ == "__main__":
+    main()
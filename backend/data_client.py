@@ -0,0 +1,269 @@
+"""
+Reader side of the data service (backend/data_service.py).
+
+DataServiceClient keeps the last snapshot of each topic and revalidates it
+with If-None-Match at most every `min_interval` seconds, so all sessions of
+a dashboard process share one copy and an unchanged topic costs an empty
+304. The module-level readers are what the dashboard and the Telegram bot
+call; while the service is not running they fall back to the in-process
+backend, checking for the service again every RETRY_INTERVAL seconds.
+Reading never starts ingestion: the whale, open interest, Binance and
+heatmap readers return only what this process already holds, which is
+nothing unless LOCAL_INGESTION asked it to run the ingestion loops itself
+(backend.data_service.start_local_ingestion()).
+push_stream_url() tells the dashboard where browsers can follow the push
+stream instead of rerunning to poll. /health is cached the same way, so
+checking whether the service runs costs at most one request a second.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Dict, List, Optional
+
+import requests
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DATA_SERVICE_URL = os.environ.get("DATA_SERVICE_URL", "http://127.0.0.1:8765")
+# Address browsers use for the push stream, if they reach the service differently
+DATA_SERVICE_PUBLIC_URL = os.environ.get("DATA_SERVICE_PUBLIC_URL", DATA_SERVICE_URL)
+MIN_POLL_INTERVAL = 1.0   # seconds a snapshot is reused before revalidating
+RETRY_INTERVAL = 30       # seconds before retrying an unreachable service
+REQUEST_TIMEOUT = 2
+# Run ingestion inside the dashboard process when there is no data service (run.py --local-ingestion)
+LOCAL_INGESTION = os.environ.get("LOCAL_INGESTION", "0") == "1"
+
+class DataServiceClient:
+    """Caching HTTP reader for data service snapshots and event streams"""
+
+    def __init__(self, base_url: Optional[str] = None, min_interval: float = MIN_POLL_INTERVAL,
+                 timeout: float = REQUEST_TIMEOUT):
+        self.base_url = base_url or DATA_SERVICE_URL
+        self.min_interval = min_interval
+        self.timeout = timeout
+        self._cache: Dict[str, Dict] = {}
+        self._down_until = 0.0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    @property
+    def available(self) -> bool:
+        """False while the service is considered down"""
+        return time.monotonic() >= self._down_until
+
+    def _get(self, path: str, headers: Optional[Dict] = None) -> Optional[requests.Response]:
+        if not self.available:
+            return None
+        try:
+            return self._session().get(f"{self.base_url}{path}", headers=headers, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            self._down_until = time.monotonic() + RETRY_INTERVAL
+            logger.warning(f"Data service unreachable ({e}), using local backend for {RETRY_INTERVAL}s")
+            return None
+
+    def _fresh(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached and time.monotonic() - cached['checked'] < self.min_interval:
+            return cached
+        return None
+
+    def snapshot(self, topic: str) -> Optional[Dict]:
+        """{'version', 'timestamp', 'data'} for a topic, or None if the service has none"""
+        fresh = self._fresh(topic)
+        if fresh:
+            return fresh
+
+        with self._lock:
+            cached = self._cache.get(topic)
+        headers = {"If-None-Match": f'"{cached["version"]}"'} if cached else None
+        response = self._get(f"/snapshot/{topic}", headers)
+        if response is None:
+            return None
+        if response.status_code == 304 and cached:
+            cached['checked'] = time.monotonic()
+            return cached
+        if response.status_code != 200:
+            return None
+
+        entry = response.json()
+        entry['checked'] = time.monotonic()
+        with self._lock:
+            self._cache[topic] = entry
+        return entry
+
+    def events(self, stream: str, latest: int = 15) -> Optional[Dict]:
+        """Newest events of a stream with 'last_seq' and 'last_timestamp'"""
+        key = f"events:{stream}:{latest}"
+        fresh = self._fresh(key)
+        if fresh:
+            return fresh['data']
+
+        response = self._get(f"/events/{stream}?latest={latest}")
+        if response is None or response.status_code != 200:
+            return None
+        data = response.json()
+        with self._lock:
+            self._cache[key] = {'data': data, 'checked': time.monotonic()}
+        return data
+
+    def health(self) -> Optional[Dict]:
+        """Topic versions and service stats, or None if the service is not reachable"""
+        fresh = self._fresh('health')
+        if fresh:
+            return fresh['data']
+
+        response = self._get("/health")
+        if response is None or response.status_code != 200:
+            return None
+        data = response.json()
+        with self._lock:
+            self._cache['health'] = {'data': data, 'checked': time.monotonic()}
+        return data
+
+# One client per process, shared by every session and the bot handlers
+DATA_CLIENT = DataServiceClient()
+
+def data_service_running() -> bool:
+    return DATA_CLIENT.health() is not None
+
+def get_source_intervals() -> Dict[str, float]:
+    """Expected seconds between new data per source: the service's refresh intervals, or the local cache durations"""
+    health = DATA_CLIENT.health()
+    if health is not None and 'intervals' in health:
+        return health['intervals']
+
+    from backend.price_feed import CACHE_DURATION as PRICE_CACHE_DURATION
+    from backend.news_feed import CACHE_DURATION as NEWS_CACHE_DURATION
+    from backend.whale_tracker import EXPECTED_WHALE_TX_INTERVAL
+    return {'prices': PRICE_CACHE_DURATION, 'news': NEWS_CACHE_DURATION, 'whale_tx': EXPECTED_WHALE_TX_INTERVAL}
+
+def push_stream_url() -> Optional[str]:
+    """Base URL of the service's /stream endpoint for browsers, or None if it is not running"""
+    return DATA_SERVICE_PUBLIC_URL if data_service_running() else None
+
+def _snapshot_data(topic: str):
+    entry = DATA_CLIENT.snapshot(topic)
+    return entry['data'] if entry else None
+
+def get_prices() -> Optional[Dict]:
+    data = _snapshot_data('prices')
+    if data is None:
+        from backend.price_feed import get_prices as fetch_local
+        data = fetch_local()
+    return data
+
+def fetch_news() -> List[Dict]:
+    data = _snapshot_data('news')
+    if data is None:
+        from backend.news_feed import fetch_news as fetch_local
+        data = fetch_local()
+    return data
+
+def get_news_snapshot() -> Dict:
+    """News with a version that changes only when the stories do: {'version', 'data'}"""
+    entry = DATA_CLIENT.snapshot('news')
+    if entry is not None:
+        return {'version': entry['version'], 'data': entry['data']}
+
+    from backend.news_feed import NEWS_CACHE, fetch_news as fetch_local
+    data = fetch_local()
+    # Local news is refetched as a whole, so the fetch time identifies its content
+    return {'version': NEWS_CACHE.get('timestamp', 0), 'data': data}
+
+def get_cached_prices() -> Optional[Dict]:
+    """Prices without ever fetching upstream in this process"""
+    data = _snapshot_data('prices')
+    if data is None:
+        from backend.price_feed import get_cached_prices as cached_local
+        data = cached_local()
+    return data
+
+def get_cached_news() -> Optional[List[Dict]]:
+    data = _snapshot_data('news')
+    if data is None:
+        from backend.news_feed import get_cached_news as cached_local
+        data = cached_local()
+    return data
+
+def get_cached_positions() -> Optional[List[Dict]]:
+    data = _snapshot_data('positions')
+    if data is None:
+        from backend.whale_position_binance import get_cached_positions as cached_local
+        data = cached_local()
+    return data
+
+def get_whale_feed(count: int = 15) -> Dict:
+    """
+    Newest whale transactions with the feed cursor:
+    {'last_seq', 'last_timestamp', 'events', 'next_in'}
+    """
+    feed = DATA_CLIENT.events('whale_tx', count)
+    if feed is not None:
+        return feed
+
+    from backend.event_buffer import WHALE_EVENTS
+    from backend.whale_tracker import seconds_until_next_whale_tx
+
+    return {
+        'last_seq': WHALE_EVENTS.last_seq,
+        'last_timestamp': WHALE_EVENTS.last_timestamp(),
+        'events': WHALE_EVENTS.latest(count),
+        'next_in': seconds_until_next_whale_tx()
+    }
+
+def get_open_interest_deltas() -> Dict[str, Dict[str, Dict]]:
+    """OI changes per window ('5m', '1h', ...) and symbol"""
+    data = _snapshot_data('open_interest')
+    if data is None:
+        from backend.open_interest import get_open_interest_deltas as deltas_local
+        data = deltas_local()
+    return data
+
+def _binance_events(stream: str, count: int) -> List[Dict]:
+    feed = DATA_CLIENT.events(stream, count)
+    if feed is not None:
+        return feed['events']
+
+    from backend import binance_stream
+    if stream == 'liquidations':
+        return binance_stream.get_recent_liquidations(count)
+    return binance_stream.get_recent_binance_trades(count)
+
+def get_binance_trades(count: int = 20) -> List[Dict]:
+    """Most recent large Binance futures trades, newest last"""
+    return _binance_events('binance_trades', count)
+
+def get_liquidations(count: int = 20) -> List[Dict]:
+    """Most recent Binance futures liquidations, newest last"""
+    return _binance_events('liquidations', count)
+
+def get_alerts(count: int = 20) -> List[Dict]:
+    """Most recent alerts raised by the alert rules, newest last"""
+    feed = DATA_CLIENT.events('alerts', count)
+    if feed is not None:
+        return feed['events']
+
+    from backend.alert_rules import get_recent_alerts
+    return get_recent_alerts(count)
+
+def get_liquidation_heatmap(symbol: str) -> Optional[Dict]:
+    heatmaps = _snapshot_data('heatmap')
+    if heatmaps is None:
+        from backend.liquidation_heatmap import get_liquidation_heatmap as compute_local
+        return compute_local(symbol)
+
+    heatmap = heatmaps.get(symbol)
+    if heatmap is None:
+        return None
+    import numpy as np
+    return {key: np.asarray(value) if isinstance(value, list) else value for key, value in heatmap.items()}
@@ -0,0 +1,590 @@
+"""
+Standalone data service: owns all ingestion and serves versioned snapshots.
+
+Runs as its own process (python -m backend.data_service, or run.py --service).
+Each source is refreshed by one background loop on its own interval,
+however many dashboards or bots are connected. A result is JSON-encoded
+once and becomes a new version only when its content changed, so
+ingestion cost stays flat as readers are added and a reader that is
+already up to date gets an empty 304.
+
+    GET /snapshot/<topic>          {"version", "timestamp", "data"}; ETag / If-None-Match
+    GET /events/<stream>?latest=N  newest N events plus the sequence cursor
+    GET /stream?topics=a,b         Server-Sent Events: initial state, then only changes
+    GET /health                    version and update interval of every topic
+
+The push stream carries new event rows and the changed keys of dict
+snapshots (e.g. one coin's price). Every change is encoded once into a
+shared change log that each connected client follows with its own cursor.
+
+A dashboard deployed without the service can run the same ingestion loops
+in its own process with start_local_ingestion(), behind an explicit switch
+(LOCAL_INGESTION=1, run.py --local-ingestion); readers never start it.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.event_buffer import EventRingBuffer, WHALE_EVENTS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DATA_SERVICE_HOST = os.environ.get("DATA_SERVICE_HOST", "127.0.0.1")
+DATA_SERVICE_PORT = int(os.environ.get("DATA_SERVICE_PORT", "8765"))
+
+WHALE_TX_TICK = 1.0   # seconds between checks for a due simulated whale transaction
+PUSH_POLL = 0.25      # seconds between checks of the event streams for new rows
+PUSH_HEARTBEAT = 15   # seconds of silence before a keep-alive comment is sent
+PUSH_ROWS = 15        # event rows in the initial push state
+
+def _to_json(value):
+    """json.dumps default for NumPy values"""
+    if isinstance(value, np.ndarray):
+        return np.round(value, 2).tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def heatmap_snapshot() -> Dict:
+    """Advance the simulated market by one step, then encode every symbol's heatmap"""
+    from backend.liquidation_heatmap import get_all_liquidation_heatmaps, step_liquidation_market
+    step_liquidation_market()
+    return {
+        symbol: {key: heatmap[key] for key in ('price', 'long_usd', 'short_usd', 'reference_price')}
+        for symbol, heatmap in get_all_liquidation_heatmaps().items()
+    }
+
+def default_streams() -> Dict[str, EventRingBuffer]:
+    """Event stream name -> buffer: whale transactions, Binance futures trades and liquidations, and alerts"""
+    from backend.alert_rules import ALERTS
+    from backend.binance_stream import BINANCE_TRADES, LIQUIDATIONS
+    return {'whale_tx': WHALE_EVENTS, 'binance_trades': BINANCE_TRADES, 'liquidations': LIQUIDATIONS,
+            'alerts': ALERTS}
+
+def open_interest_snapshot() -> Dict:
+    """OI changes per window and symbol; the collector polls Binance on its own thread"""
+    from backend.open_interest import start_open_interest_collector, get_open_interest_deltas
+    start_open_interest_collector()
+    return get_open_interest_deltas()
+
+def default_sources() -> Dict[str, Tuple[Callable, float]]:
+    """Topic -> (fetch function, refresh interval in seconds), matching the backend cache durations"""
+    from backend.price_feed import get_prices
+    from backend.news_feed import fetch_news
+    from backend.whale_position_binance import get_binance_whale_positions
+    from backend.open_interest import POLL_INTERVAL as OI_POLL_INTERVAL
+    from backend.liquidation_heatmap import MARKET_STEP_INTERVAL
+
+    return {
+        'prices': (get_prices, 60),
+        'news': (fetch_news, 300),
+        'positions': (get_binance_whale_positions, 300),
+        'heatmap': (heatmap_snapshot, MARKET_STEP_INTERVAL),
+        'open_interest': (open_interest_snapshot, OI_POLL_INTERVAL)
+    }
+
+class SnapshotStore:
+    """Latest encoded snapshot per topic with a version that changes with the content"""
+
+    def __init__(self):
+        self._topics: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, topic: str, data, timestamp: Optional[float] = None) -> int:
+        """Store new data for a topic; returns its version (unchanged if the content is the same)"""
+        payload = json.dumps(data, default=_to_json, separators=(',', ':'))
+        with self._lock:
+            current = self._topics.get(topic)
+            if current is not None and current['payload'] == payload:
+                return current['version']
+            version = current['version'] + 1 if current else 1
+            timestamp = timestamp if timestamp is not None else time.time()
+            body = f'{{"version":{version},"timestamp":{timestamp},"data":{payload}}}'.encode()
+            self._topics[topic] = {'version': version, 'timestamp': timestamp, 'payload': payload, 'body': body}
+            return version
+
+    def get(self, topic: str) -> Optional[Dict]:
+        with self._lock:
+            return self._topics.get(topic)
+
+    def versions(self) -> Dict[str, int]:
+        with self._lock:
+            return {topic: entry['version'] for topic, entry in self._topics.items()}
+
+def sse_message(event: str, data) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, default=_to_json, separators=(',', ':'))}\n\n".encode()
+
+def changed_items(previous, current) -> Optional[Dict]:
+    """Keys of a dict snapshot that were added or changed, and those removed; None if not comparable"""
+    if not isinstance(previous, dict) or not isinstance(current, dict):
+        return None
+    return {
+        'changed': {key: value for key, value in current.items() if previous.get(key) != value},
+        'removed': [key for key in previous if key not in current]
+    }
+
+class ChangeLog:
+    """Encoded push messages tagged by topic, followed by every stream client"""
+
+    def __init__(self, capacity: int = 1000):
+        self.buffer = EventRingBuffer(capacity)
+        self._changed = threading.Condition()
+        self._closed = False
+
+    @property
+    def last_seq(self) -> int:
+        return self.buffer.last_seq
+
+    def append(self, topic: str, message: bytes):
+        self.buffer.push((topic, message))
+        with self._changed:
+            self._changed.notify_all()
+
+    def wait(self, cursor: int, timeout: float) -> bool:
+        """Block until there is something after `cursor`; False on timeout"""
+        with self._changed:
+            return self._changed.wait_for(lambda: self._closed or self.buffer.last_seq > cursor, timeout)
+
+    def close(self):
+        """Wake every waiting client so it can disconnect"""
+        with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+
+    def read_since(self, cursor: int):
+        return self.buffer.read_since(cursor)
+
+class DataService:
+    """Background ingestion loops plus the HTTP API readers poll"""
+
+    def __init__(self, sources: Optional[Dict[str, Tuple[Callable, float]]] = None,
+                 streams: Optional[Dict[str, EventRingBuffer]] = None,
+                 host: str = DATA_SERVICE_HOST, port: int = DATA_SERVICE_PORT,
+                 simulate_whale_tx: bool = True, serve: bool = True):
+        self.sources = sources if sources is not None else default_sources()
+        self.streams = streams if streams is not None else default_streams()
+        self.simulate_whale_tx = simulate_whale_tx
+        self.store = SnapshotStore()
+        self.changes = ChangeLog()
+        self._latest: Dict[str, object] = {}
+        self.stats = {'refreshes': 0, 'refresh_errors': 0, 'requests': 0, 'not_modified': 0, 'bytes_sent': 0,
+                      'push_clients': 0, 'push_messages': 0, 'push_bytes': 0, 'push_cpu_ns': 0}
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+        self._server = None
+        if serve:
+            self._server = ThreadingHTTPServer((host, port), self._make_handler())
+            self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def refresh(self, topic: str):
+        """Fetch one source and publish the result"""
+        fetch, _ = self.sources[topic]
+        try:
+            data = fetch()
+        except Exception as e:
+            self._count('refresh_errors')
+            logger.error(f"Error refreshing {topic}: {e}")
+            return
+        self._count('refreshes')
+        if data is not None:
+            self.publish(topic, data)
+
+    def publish(self, topic: str, data):
+        """Store a snapshot and, when it changed, log the change for push clients"""
+        previous = self._latest.get(topic)
+        current = self.store.get(topic)
+        version = self.store.publish(topic, data)
+        if current is not None and version == current['version']:
+            return
+        self._latest[topic] = data
+        delta = changed_items(previous, data)
+        if delta is None:
+            self.changes.append(topic, sse_message(topic, {'version': version, 'data': data}))
+        elif delta['changed'] or delta['removed']:
+            self.changes.append(topic, sse_message(topic, {'version': version, **delta}))
+
+    def _stream_timing(self, stream: str) -> Dict:
+        """Seconds since the newest event and, for whale_tx, until the next one is due"""
+        from backend.simulator import get_simulator
+
+        last_timestamp = self.streams[stream].last_timestamp()
+        timing = {'age': max(0.0, get_simulator().clock.now() - last_timestamp) if last_timestamp else None}
+        if stream == 'whale_tx':
+            from backend.whale_tracker import seconds_until_next_whale_tx
+            timing['next_in'] = seconds_until_next_whale_tx()
+        return timing
+
+    def _pump_streams(self):
+        """Copy new event rows into the change log, one encoded message per row"""
+        cursors = {name: buffer.last_seq for name, buffer in self.streams.items()}
+        while not self._stop.is_set():
+            started = time.thread_time_ns()
+            for name, buffer in self.streams.items():
+                rows, cursor = buffer.read_since(cursors[name])
+                if rows:
+                    timing = self._stream_timing(name)
+                    for offset, row in enumerate(rows):
+                        seq = cursor - len(rows) + offset + 1
+                        self.changes.append(name, sse_message(name, {'seq': seq, 'row': row, **timing}))
+                cursors[name] = cursor
+            self._count('push_cpu_ns', time.thread_time_ns() - started)
+            self._stop.wait(PUSH_POLL)
+
+    def initial_state(self, topics) -> bytes:
+        """One 'init' message per topic with the full current state"""
+        messages = []
+        for topic in topics:
+            if topic in self.streams:
+                buffer = self.streams[topic]
+                messages.append(sse_message('init', {
+                    'topic': topic,
+                    'last_seq': buffer.last_seq,
+                    'rows': buffer.latest(PUSH_ROWS),
+                    **self._stream_timing(topic)
+                }))
+            elif topic in self._latest:
+                messages.append(sse_message('init', {
+                    'topic': topic,
+                    'version': self.store.get(topic)['version'],
+                    'data': self._latest[topic]
+                }))
+        return b"".join(messages)
+
+    def stream_to(self, wfile, topics) -> None:
+        """Serve one push client until it disconnects or the service stops"""
+        started = time.thread_time_ns()
+        self._count('push_clients')
+        try:
+            cursor = self.changes.last_seq
+            wfile.write(self.initial_state(topics))
+            wfile.flush()
+            while True:
+                if not self.changes.wait(cursor, PUSH_HEARTBEAT):
+                    wfile.write(b": keep-alive\n\n")
+                    wfile.flush()
+                    continue
+                if self._stop.is_set():
+                    break
+                messages, cursor = self.changes.read_since(cursor)
+                wanted = [message for topic, message in messages if topic in topics]
+                if wanted:
+                    chunk = b"".join(wanted)
+                    wfile.write(chunk)
+                    wfile.flush()
+                    self._count('push_messages', len(wanted))
+                    self._count('push_bytes', len(chunk))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self._count('push_clients', -1)
+            self._count('push_cpu_ns', time.thread_time_ns() - started)
+
+    def _refresh_loop(self, topic: str, interval: float):
+        while not self._stop.is_set():
+            self.refresh(topic)
+            self._stop.wait(interval)
+
+    def _whale_tx_loop(self):
+        """Feed the whale transaction buffer: live stream if configured, otherwise the simulation"""
+        from backend.whale_stream import start_whale_stream
+        from backend.whale_tracker import publish_fake_whale_tx
+
+        if start_whale_stream():
+            return
+        while not self._stop.is_set():
+            publish_fake_whale_tx()
+            self._stop.wait(WHALE_TX_TICK)
+
+    def _spawn(self, target, name: str, *args):
+        thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def start(self):
+        for topic, (_, interval) in self.sources.items():
+            self._spawn(self._refresh_loop, f"refresh-{topic}", topic, interval)
+        if self.simulate_whale_tx and 'whale_tx' in self.streams:
+            self._spawn(self._whale_tx_loop, "whale-tx")
+        if 'binance_trades' in self.streams or 'liquidations' in self.streams:
+            from backend.binance_stream import start_binance_stream
+            start_binance_stream()
+        if self._server is None:
+            logger.info(f"Ingesting in-process (topics: {', '.join(self.sources)})")
+            return self
+        if self.streams:
+            self._spawn(self._pump_streams, "push-pump")
+        self._spawn(self._server.serve_forever, "data-service-http")
+        logger.info(f"Data service listening on {self.url} (topics: {', '.join(self.sources)})")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.changes.close()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def update_intervals(self) -> Dict[str, float]:
+        """Expected seconds between new data per topic, for readers scheduling their refreshes"""
+        intervals = {topic: interval for topic, (_, interval) in self.sources.items()}
+        if self.simulate_whale_tx and 'whale_tx' in self.streams:
+            from backend.whale_tracker import EXPECTED_WHALE_TX_INTERVAL
+            intervals['whale_tx'] = EXPECTED_WHALE_TX_INTERVAL
+        return intervals
+
+    def events(self, stream: str, latest: int) -> Optional[Dict]:
+        buffer = self.streams.get(stream)
+        if buffer is None:
+            return None
+        result = {
+            'last_seq': buffer.last_seq,
+            'last_timestamp': buffer.last_timestamp(),
+            'events': buffer.latest(latest)
+        }
+        if stream == 'whale_tx':
+            result['next_in'] = self._stream_timing(stream)['next_in']
+        return result
+
+    def _make_handler(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int, body: bytes = b"", headers: Dict = None):
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, str(value))
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+                service._count('bytes_sent', len(body))
+
+            def do_GET(self):
+                service._count('requests')
+                parsed = urlparse(self.path)
+                parts = parsed.path.strip('/').split('/')
+                query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+
+                if parts[0] == 'snapshot' and len(parts) == 2:
+                    entry = service.store.get(parts[1])
+                    if entry is None:
+                        self._reply(404, b'{"error":"no data yet"}')
+                        return
+                    etag = f'"{entry["version"]}"'
+                    if self.headers.get("If-None-Match") == etag:
+                        service._count('not_modified')
+                        self._reply(304, headers={"ETag": etag})
+                        return
+                    self._reply(200, entry['body'], {"ETag": etag})
+
+                elif parts[0] == 'events' and len(parts) == 2:
+                    buffer = service.streams.get(parts[1])
+                    if buffer is None:
+                        self._reply(404, b'{"error":"unknown stream"}')
+                        return
+                    try:
+                        latest = int(query.get('latest', 15))
+                    except ValueError:
+                        self._reply(400, b'{"error":"latest must be an integer"}')
+                        return
+                    result = service.events(parts[1], min(max(latest, 1), buffer.capacity))
+                    self._reply(200, json.dumps(result, default=_to_json).encode())
+
+                elif parts[0] == 'stream':
+                    topics = set(query.get('topics', 'whale_tx,prices').split(','))
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.send_header("Cache-Control", "no-cache")
+                    self.send_header("Access-Control-Allow-Origin", "*")
+                    self.end_headers()
+                    self.close_connection = True
+                    service.stream_to(self.wfile, topics)
+
+                elif parts[0] == 'health':
+                    self._reply(200, json.dumps({
+                        'versions': service.store.versions(),
+                        'intervals': service.update_intervals(),
+                        'stats': service.stats
+                    }).encode())
+
+                else:
+                    self._reply(404, b'{"error":"not found"}')
+
+        return Handler
+
+_LOCAL: Dict[str, DataService] = {}
+_LOCAL_LOCK = threading.Lock()
+
+def start_local_ingestion() -> DataService:
+    """
+    Run every ingestion loop inside this process without serving it, once per
+    process; the data_client readers then find the data in the local backend
+    """
+    with _LOCAL_LOCK:
+        if 'service' not in _LOCAL:
+            _LOCAL['service'] = DataService(serve=False).start()
+        return _LOCAL['service']
+
+def benchmark_readers(user_counts=(1, 10, 100), seconds: float = 3.0, poll_interval: float = 1.0):
+    """
+    Upstream fetches and server work as reader count grows: every reader polls
+    every topic once per `poll_interval` against sources that count their calls
+    """
+    from backend.data_client import DataServiceClient
+
+    calls = {'prices': 0, 'news': 0}
+
+    def counted(topic, value):
+        def fetch():
+            calls[topic] += 1
+            return value
+        return fetch
+
+    sources = {
+        'prices': (counted('prices', {'bitcoin': {'usd': 104500.0, 'usd_24h_change': 1.2}}), 1.0),
+        'news': (counted('news', [{'title': f'Headline {i}', 'summary': 'x' * 300, 'link': 'https://example.com'}
+                                  for i in range(20)]), 5.0)
+    }
+    for users in user_counts:
+        calls.update(prices=0, news=0)
+        service = DataService(sources, streams={}, port=0, simulate_whale_tx=False).start()
+        clients = [DataServiceClient(service.url, min_interval=0) for _ in range(users)]
+        stop = threading.Event()
+
+        def reader(client):
+            while not stop.is_set():
+                for topic in sources:
+                    client.snapshot(topic)
+                stop.wait(poll_interval)
+
+        threads = [threading.Thread(target=reader, args=(client,)) for client in clients]
+        start = time.process_time()
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        cpu = time.process_time() - start
+        service.stop()
+
+        stats = service.stats
+        print(f"{users:>4} readers: upstream fetches prices={calls['prices']} news={calls['news']}, "
+              f"{stats['requests']} requests ({stats['not_modified']} not modified), "
+              f"{stats['bytes_sent'] / 1024:.0f} KiB sent, {cpu * 1e3:.0f}ms CPU")
+
+def benchmark_push(clients: int = 100, updates: int = 50):
+    """
+    Bytes per update and server CPU with `clients` connected push clients:
+    each new whale transaction is one SSE message, against resending the
+    15-row table (as JSON by /events, as Arrow by a Streamlit rerun)
+    """
+    import requests
+    from backend.whale_tracker import get_fake_whale_tx
+
+    buffer = EventRingBuffer()
+    rows = []
+    while len(rows) < PUSH_ROWS + updates:
+        tx = get_fake_whale_tx()
+        if tx:
+            rows.append(tx)
+    for row in rows[:PUSH_ROWS]:
+        buffer.push(row)
+
+    service = DataService({}, streams={'whale_tx': buffer}, port=0, simulate_whale_tx=False).start()
+    received = [0] * clients
+    connected = threading.Barrier(clients + 1)
+
+    def client(index: int):
+        with requests.get(f"{service.url}/stream?topics=whale_tx", stream=True, timeout=30) as response:
+            connected.wait()
+            for line in response.iter_lines():
+                if line.startswith(b"event: whale_tx"):
+                    received[index] += 1
+                    if received[index] == updates:
+                        return
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    connected.wait()
+    initial_bytes = service.stats['push_bytes']
+
+    for row in rows[PUSH_ROWS:]:
+        buffer.push(row)
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join()
+    service.stop()
+    time.sleep(0.5)  # let the stream threads record their CPU time
+
+    stats = service.stats
+    per_update = (stats['push_bytes'] - initial_bytes) / (clients * updates)
+    table_json = len(json.dumps(service.events('whale_tx', PUSH_ROWS), default=_to_json).encode())
+    print(f"{clients} push clients, {updates} whale transactions, all delivered: {sum(received) == clients * updates}")
+    print(f"  bytes per update per client: push {per_update:.0f}B, /events poll {table_json}B (JSON table)", end="")
+    try:
+        import pandas as pd
+        from streamlit.dataframe_util import convert_pandas_df_to_arrow_bytes
+        arrow = len(convert_pandas_df_to_arrow_bytes(pd.DataFrame(buffer.latest(PUSH_ROWS))))
+        print(f", Streamlit rerun {arrow}B (Arrow table)")
+    except ImportError:
+        print()
+    print(f"  server CPU: {stats['push_cpu_ns'] / 1e6 / updates:.2f}ms per update for {clients} clients "
+          f"(connect, initial state and {updates} updates: {stats['push_cpu_ns'] / 1e6:.0f}ms total)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the data ingestion service')
+    parser.add_argument('--host', default=DATA_SERVICE_HOST, help='Host to bind to')
+    parser.add_argument('--port', type=int, default=DATA_SERVICE_PORT, help='Port to bind to')
+    parser.add_argument('--benchmark', action='store_true', help='Measure ingestion cost against reader count')
+    parser.add_argument('--benchmark-push', action='store_true', help='Measure bytes and CPU per pushed update')
+    args = parser.parse_args()
+
+    if args.benchmark or args.benchmark_push:
+        logging.getLogger().setLevel(logging.WARNING)
+        if args.benchmark:
+            benchmark_readers()
+        if args.benchmark_push:
+            benchmark_push()
+        return
+
+    service = DataService(host=args.host, port=args.port).start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        logger.info("Data service stopped")
+        service.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Process-wide ring buffer of events with monotonic sequence numbers.
+
+Producers push events once; every reader (dashboard session, bot, ...)
+keeps only the sequence number of the last event it has seen and asks for
+what is newer. Memory is fixed by the capacity, not by the number of
+readers, and all readers see the same events in the same order.
+"""
+
+import time
+import logging
+import threading
+from typing import Any, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+WHALE_EVENT_CAPACITY = 1000
+
+class EventRingBuffer:
+    """Fixed-capacity, thread-safe event log; sequence numbers start at 1"""
+
+    def __init__(self, capacity: int = WHALE_EVENT_CAPACITY):
+        self.capacity = capacity
+        self._slots: List[Optional[Tuple[int, float, Any]]] = [None] * capacity
+        self._last_seq = 0
+        self._lock = threading.Lock()
+
+    @property
+    def last_seq(self) -> int:
+        """Sequence number of the newest event (0 when empty)"""
+        return self._last_seq
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest event still held"""
+        return max(1, self._last_seq - self.capacity + 1)
+
+    def push(self, event: Any, timestamp: Optional[float] = None) -> int:
+        """Append an event, overwriting the oldest one when full; returns its sequence number"""
+        with self._lock:
+            self._last_seq += 1
+            seq = self._last_seq
+            self._slots[seq % self.capacity] = (seq, timestamp if timestamp is not None else time.time(), event)
+            return seq
+
+    # deque-compatible name so the buffer can stand in wherever a deque was used
+    append = push
+
+    def read_since(self, cursor: int, limit: Optional[int] = None) -> Tuple[List[Any], int]:
+        """
+        Events with sequence number > cursor (oldest first) and the new cursor.
+        Events that were overwritten before the reader got to them are skipped.
+        """
+        with self._lock:
+            last = self._last_seq
+            start = max(cursor + 1, self.first_seq)
+            if limit is not None:
+                start = max(start, last - limit + 1)
+            events = [self._slots[seq % self.capacity][2] for seq in range(start, last + 1)]
+            return events, last
+
+    def latest(self, count: int) -> List[Any]:
+        """The newest `count` events, oldest first"""
+        events, _ = self.read_since(0, limit=count)
+        return events
+
+    def last_timestamp(self) -> Optional[float]:
+        """Push time of the newest event"""
+        with self._lock:
+            if self._last_seq == 0:
+                return None
+            return self._slots[self._last_seq % self.capacity][1]
+
+    def __len__(self) -> int:
+        return min(self._last_seq, self.capacity)
+
+# Whale transactions shared by every dashboard session
+WHALE_EVENTS = EventRingBuffer(WHALE_EVENT_CAPACITY)
+
+if __name__ == "__main__":
+    # Many readers, one producer: each reader sees events in order and never
+    # twice; events overwritten before a reader gets to them are skipped
+    buffer = EventRingBuffer(capacity=10_000)
+    readers = 100
+    total = 200_000
+    seen = [0] * readers
+    in_order = [True] * readers
+    done = threading.Event()
+
+    def reader(index: int):
+        cursor = 0
+        last = -1
+        while not done.is_set() or cursor < buffer.last_seq:
+            events, cursor = buffer.read_since(cursor)
+            for event in events:
+                in_order[index] &= event['n'] > last
+                last = event['n']
+            seen[index] += len(events)
+            time.sleep(0.001)
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    for thread in threads:
+        thread.start()
+
+    start = time.perf_counter()
+    for i in range(total):
+        buffer.push({'n': i})
+    push_elapsed = time.perf_counter() - start
+    done.set()
+    for thread in threads:
+        thread.join()
+
+    print(f"Pushed {total:,} events in {push_elapsed:.2f}s ({total / push_elapsed:,.0f}/sec) "
+          f"with {readers} concurrent readers")
+    print(f"Events seen per reader: min {min(seen):,}, max {max(seen):,} "
+          f"(buffer holds {len(buffer):,}, readers that fell behind skip overwritten events)")
+    print(f"Every reader saw its events in order without duplicates: {all(in_order)}")
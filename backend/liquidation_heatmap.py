@@ -0,0 +1,229 @@
+"""
+Liquidation heatmap: USD size of positions that would be liquidated at each price.
+
+Each symbol gets a fixed price grid around a reference price (buckets of
+BUCKET_PCT percent, RANGE_PCT percent either side). Estimated liquidation
+prices are binned with a single np.bincount over (symbol, side, bucket), so
+a batch of a million positions costs one vectorized pass. Opening positions
+adds their weights and closing them subtracts the same weights, so the map
+is updated incrementally instead of being recomputed.
+
+The process-wide simulated market is built and advanced only through
+step_liquidation_market(), called by the data service's heatmap refresh
+loop; reading a heatmap never changes it, and there is none to read in a
+process that does not run that loop.
+"""
+
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from backend.simulator import LEVERAGES, SYMBOL_WEIGHTS, get_simulator
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BUCKET_PCT = 0.5     # width of one price bucket, % of the reference price
+RANGE_PCT = 30.0     # grid covers reference price +/- this many %
+MARKET_STEP_INTERVAL = 20   # seconds between steps of the simulated market
+LONG, SHORT = 1, -1
+
+def estimate_liquidation_prices(entry_price: np.ndarray, leverage: np.ndarray, side: np.ndarray) -> np.ndarray:
+    """
+    Approximate liquidation price, same model as the simulator's positions:
+    a long is liquidated 80%/leverage below entry, a short the same distance above
+    """
+    return entry_price * (1 - side * 0.8 / leverage)
+
+class LiquidationHeatmap:
+    """Incrementally maintained liquidation histograms per symbol and side"""
+
+    def __init__(self, bucket_pct: float = BUCKET_PCT, range_pct: float = RANGE_PCT):
+        self.bucket = bucket_pct / 100
+        self.low = 1 - range_pct / 100
+        self.n_buckets = int(round(2 * range_pct / bucket_pct))
+        self.symbols: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._reference = np.empty(0)
+        # [symbol, side (0 = long, 1 = short), bucket] -> USD
+        self._usd = np.zeros((0, 2, self.n_buckets))
+        self._count = np.zeros((0, 2, self.n_buckets), dtype=np.int64)
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def symbol_codes(self, symbols: Sequence[str], reference_prices: Dict[str, float]) -> Dict[str, int]:
+        """Register symbols (fixing their price grid on first sight) and return their codes"""
+        with self._lock:
+            for symbol in symbols:
+                if symbol not in self._index:
+                    self._index[symbol] = len(self.symbols)
+                    self.symbols.append(symbol)
+                    self._reference = np.append(self._reference, reference_prices[symbol])
+                    self._usd = np.concatenate([self._usd, np.zeros((1, 2, self.n_buckets))])
+                    self._count = np.concatenate([self._count, np.zeros((1, 2, self.n_buckets), dtype=np.int64)])
+            return {symbol: self._index[symbol] for symbol in symbols}
+
+    def _bin(self, codes: np.ndarray, side: np.ndarray, liquidation_price: np.ndarray):
+        """Flat (symbol, side, bucket) index per position and a mask of those inside the grid"""
+        relative = liquidation_price / self._reference[codes]
+        bucket = np.floor((relative - self.low) / self.bucket).astype(np.int64)
+        inside = (bucket >= 0) & (bucket < self.n_buckets)
+        side_index = (side < 0).astype(np.int64)
+        flat = (codes * 2 + side_index) * self.n_buckets + bucket
+        return flat[inside], inside
+
+    def _apply(self, codes, side, liquidation_price, amount_usd, sign: int):
+        codes = np.asarray(codes, dtype=np.int64)
+        with self._lock:
+            flat, inside = self._bin(codes, np.asarray(side), np.asarray(liquidation_price, dtype=np.float64))
+            size = self._usd.size
+            weights = np.asarray(amount_usd, dtype=np.float64)[inside]
+            self._usd += sign * np.bincount(flat, weights=weights, minlength=size).reshape(self._usd.shape)
+            self._count += sign * np.bincount(flat, minlength=size).reshape(self._count.shape)
+            self.version += 1
+
+    def add_positions(self, codes, side, liquidation_price, amount_usd):
+        """Add a batch of open positions (codes from symbol_codes(), side +1 long / -1 short)"""
+        self._apply(codes, side, liquidation_price, amount_usd, 1)
+
+    def remove_positions(self, codes, side, liquidation_price, amount_usd):
+        """Remove closed positions; pass the same values they were added with"""
+        self._apply(codes, side, liquidation_price, amount_usd, -1)
+
+    def heatmap(self, symbol: str) -> Optional[Dict[str, np.ndarray]]:
+        """Bucket prices and liquidation USD / position counts for one symbol"""
+        with self._lock:
+            code = self._index.get(symbol)
+            if code is None:
+                return None
+            reference = self._reference[code]
+            lower_edges = reference * (self.low + self.bucket * np.arange(self.n_buckets))
+            return {
+                'price': lower_edges + reference * self.bucket / 2,
+                'long_usd': np.clip(self._usd[code, 0], 0, None),
+                'short_usd': np.clip(self._usd[code, 1], 0, None),
+                'long_count': self._count[code, 0].copy(),
+                'short_count': self._count[code, 1].copy(),
+                'reference_price': reference
+            }
+
+class SimulatedLiquidationMarket:
+    """
+    A large simulated population of open futures positions feeding a heatmap.
+    step() closes a fraction of them and opens replacements, updating the
+    heatmap incrementally.
+    """
+
+    def __init__(self, count: int = 100_000, heatmap: Optional[LiquidationHeatmap] = None, sim=None):
+        self.sim = sim or get_simulator()
+        self.heatmap = heatmap or LiquidationHeatmap()
+        self.symbols = list(SYMBOL_WEIGHTS)
+        weights = np.array(list(SYMBOL_WEIGHTS.values()))
+        self._weights = weights / weights.sum()
+        prices = {symbol: self.sim.price(symbol) for symbol in self.symbols}
+        codes = self.heatmap.symbol_codes(self.symbols, prices)
+        self._codes = np.array([codes[symbol] for symbol in self.symbols])
+        self.columns = self._generate(count)
+        self.heatmap.add_positions(*self._heatmap_args(self.columns))
+
+    def _generate(self, n: int) -> Dict[str, np.ndarray]:
+        rng = self.sim.np_rng
+        which = rng.choice(len(self.symbols), size=n, p=self._weights)
+        prices = np.array([self.sim.price(symbol) for symbol in self.symbols])
+        entry = prices[which] * (1 + rng.uniform(-0.05, 0.05, size=n))
+        side = np.where(rng.random(n) < 0.55, LONG, SHORT)
+        leverage = rng.choice(LEVERAGES, size=n).astype(np.float64)
+        return {
+            'code': self._codes[which],
+            'side': side,
+            'entry_price': entry,
+            'leverage': leverage,
+            'liquidation_price': estimate_liquidation_prices(entry, leverage, side),
+            'amount_usd': rng.pareto(1.5, size=n) * 50_000 + 10_000
+        }
+
+    @staticmethod
+    def _heatmap_args(columns: Dict[str, np.ndarray]):
+        return columns['code'], columns['side'], columns['liquidation_price'], columns['amount_usd']
+
+    def step(self, fraction: float = 0.01):
+        """Close `fraction` of the positions at random and open as many new ones"""
+        n = len(self.columns['code'])
+        k = max(1, int(n * fraction))
+        closed = self.sim.np_rng.choice(n, size=k, replace=False)
+        self.heatmap.remove_positions(*(column[closed] for column in self._heatmap_args(self.columns)))
+
+        opened = self._generate(k)
+        for name, column in self.columns.items():
+            column[closed] = opened[name]
+        self.heatmap.add_positions(*self._heatmap_args(opened))
+
+def bin_on_grid(heatmap: Dict[str, np.ndarray], liquidation_price, side, amount_usd) -> Dict[str, np.ndarray]:
+    """Long/short liquidation USD of the given positions on the price grid of a heatmap() result"""
+    prices = heatmap['price']
+    n = len(prices)
+    width = prices[1] - prices[0]
+    bucket = np.floor((np.asarray(liquidation_price, dtype=np.float64) - prices[0] + width / 2) / width).astype(np.int64)
+    inside = (bucket >= 0) & (bucket < n)
+    side = np.asarray(side)
+    amount_usd = np.asarray(amount_usd, dtype=np.float64)
+    return {
+        name: np.bincount(bucket[inside & mask], weights=amount_usd[inside & mask], minlength=n)
+        for name, mask in (('long_usd', side > 0), ('short_usd', side < 0))
+    }
+
+_MARKET: Dict = {}
+_MARKET_LOCK = threading.Lock()
+
+def _get_market() -> SimulatedLiquidationMarket:
+    with _MARKET_LOCK:
+        if 'market' not in _MARKET:
+            _MARKET['market'] = SimulatedLiquidationMarket()
+        return _MARKET['market']
+
+def step_liquidation_market(churn: float = 0.01):
+    """Advance the process-wide market by one step, building it on first use"""
+    market = _get_market()
+    with _MARKET_LOCK:
+        market.step(churn)
+
+def get_liquidation_heatmap(symbol: str) -> Optional[Dict[str, np.ndarray]]:
+    """Heatmap for one symbol from the process-wide simulated market (read-only), None before it is built"""
+    market = _MARKET.get('market')
+    return market.heatmap.heatmap(symbol) if market is not None else None
+
+def get_all_liquidation_heatmaps() -> Dict[str, Dict[str, np.ndarray]]:
+    """Heatmaps for every simulated symbol (read-only), empty before the market is built"""
+    market = _MARKET.get('market')
+    if market is None:
+        return {}
+    return {symbol: market.heatmap.heatmap(symbol) for symbol in market.symbols}
+
+if __name__ == "__main__":
+    import time
+    from backend.simulator import MarketSimulator, SimulatedClock
+
+    sim = MarketSimulator(seed=1, clock=SimulatedClock())
+    market = SimulatedLiquidationMarket(count=10, sim=sim)
+    columns = market._generate(1_000_000)
+
+    heatmap = LiquidationHeatmap()
+    heatmap.symbol_codes(market.symbols, {symbol: sim.price(symbol) for symbol in market.symbols})
+    start = time.perf_counter()
+    heatmap.add_positions(*SimulatedLiquidationMarket._heatmap_args(columns))
+    print(f"Binned 1,000,000 positions in {(time.perf_counter() - start) * 1e3:.0f}ms")
+
+    # Incremental update: close and reopen 1% of the book
+    closed = np.arange(10_000)
+    start = time.perf_counter()
+    heatmap.remove_positions(*(column[closed] for column in SimulatedLiquidationMarket._heatmap_args(columns)))
+    heatmap.add_positions(*(column[closed] for column in SimulatedLiquidationMarket._heatmap_args(columns)))
+    print(f"Closed and reopened 10,000 positions in {(time.perf_counter() - start) * 1e3:.1f}ms")
+
+    btc = heatmap.heatmap("BTCUSDT")
+    top = np.argsort(btc['long_usd'] + btc['short_usd'])[-3:][::-1]
+    for i in top:
+        print(f"  BTC ${btc['price'][i]:,.0f}: longs ${btc['long_usd'][i] / 1e6:,.1f}M, "
+              f"shorts ${btc['short_usd'][i] / 1e6:,.1f}M")
@@ -2,7 +2,7 @@ import logging
 import feedparser
 import requests
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Optional
 import time
 import re
 import random
@@ -23,6 +23,12 @@ def clean_text(text):
     text = ' '.join(text.split())
     return text
 
+def get_cached_news() -> Optional[List[Dict]]:
+    """
+    Return the last fetched news without hitting the feeds (None if never fetched)
+    """
+    return NEWS_CACHE.get('data')
+
 def fetch_news() -> List[Dict]:
     """
     Fetch cryptocurrency news from multiple sources with caching
@@ -0,0 +1,260 @@
+"""
+Open interest collector and in-memory time series.
+
+Every poll fetches open interest for all tracked symbols concurrently (one
+request per symbol, Binance has no bulk endpoint) plus all mark prices in a
+single premiumIndex call, and appends one sample per symbol. Samples are
+kept in NumPy columns (timestamp, OI, OI in USD) with one row per symbol,
+so OI changes over any window are answered from memory with a binary
+search per symbol and no API calls. When the mark price request fails the
+last known mark price is used, and before any is known the USD value is NaN
+and left out of the USD deltas.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from backend.simulator import SystemClock
+from backend.whale_position_binance import SYMBOLS, MAX_WORKERS, get_open_interest_data, get_mark_prices
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 60                    # seconds between polls
+SERIES_CAPACITY = 7 * 24 * 60         # samples kept per symbol (7 days at 1/min)
+DELTA_WINDOWS = {'5m': 300, '1h': 3600, '4h': 14400, '24h': 86400}
+
+class OpenInterestSeries:
+    """Fixed-capacity columnar OI history, one row of samples per symbol"""
+
+    def __init__(self, capacity: int = SERIES_CAPACITY):
+        self.capacity = capacity
+        self.symbols: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._timestamp = np.empty((0, capacity), dtype=np.float64)
+        self._oi = np.empty((0, capacity), dtype=np.float64)
+        self._oi_usd = np.empty((0, capacity), dtype=np.float64)
+        self._length = np.empty(0, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def _row(self, symbol: str) -> int:
+        row = self._index.get(symbol)
+        if row is None:
+            row = self._index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            blank = np.zeros((1, self.capacity))
+            self._timestamp = np.vstack([self._timestamp, blank])
+            self._oi = np.vstack([self._oi, blank])
+            self._oi_usd = np.vstack([self._oi_usd, blank])
+            self._length = np.append(self._length, 0)
+        return row
+
+    def append(self, symbol: str, timestamp: float, oi: float, oi_usd: float):
+        """Add one sample; when a row is full its older half is dropped (amortized O(1))"""
+        with self._lock:
+            row = self._row(symbol)
+            n = self._length[row]
+            if n == self.capacity:
+                keep = self.capacity // 2
+                for column in (self._timestamp, self._oi, self._oi_usd):
+                    column[row, :keep] = column[row, n - keep:n]
+                n = keep
+            self._timestamp[row, n] = timestamp
+            self._oi[row, n] = oi
+            self._oi_usd[row, n] = oi_usd
+            self._length[row] = n + 1
+
+    def history(self, symbol: str) -> Dict[str, np.ndarray]:
+        """Copies of one symbol's columns, oldest first"""
+        with self._lock:
+            row = self._index.get(symbol)
+            n = self._length[row] if row is not None else 0
+            if not n:
+                return {'timestamp': np.empty(0), 'oi': np.empty(0), 'oi_usd': np.empty(0)}
+            return {
+                'timestamp': self._timestamp[row, :n].copy(),
+                'oi': self._oi[row, :n].copy(),
+                'oi_usd': self._oi_usd[row, :n].copy()
+            }
+
+    def to_columns(self) -> Dict[str, np.ndarray]:
+        """Every sample as flat (timestamp, symbol, oi, oi_usd) columns"""
+        with self._lock:
+            lengths = self._length
+            rows = np.repeat(np.arange(len(self.symbols)), lengths)
+            mask = np.arange(self.capacity) < lengths[:, None]
+            return {
+                'timestamp': self._timestamp[mask],
+                'symbol': np.array(self.symbols, dtype=object)[rows] if len(rows) else np.empty(0, dtype=object),
+                'oi': self._oi[mask],
+                'oi_usd': self._oi_usd[mask]
+            }
+
+    def deltas(self, window: float, now: Optional[float] = None) -> Dict[str, Dict]:
+        """
+        Latest OI per symbol and its change against the last sample at or before
+        `now - window` (or the oldest sample, when the history is shorter)
+        """
+        result = {}
+        with self._lock:
+            for symbol, row in self._index.items():
+                n = self._length[row]
+                if not n:
+                    continue
+                timestamps = self._timestamp[row, :n]
+                latest_time = timestamps[n - 1] if now is None else now
+                base = max(0, int(np.searchsorted(timestamps, latest_time - window, side='right')) - 1)
+                oi, oi_usd = self._oi[row, n - 1], self._oi_usd[row, n - 1]
+                base_oi, base_usd = self._oi[row, base], self._oi_usd[row, base]
+                if not np.isfinite(base_usd):
+                    # Samples taken before any mark price was known have no USD value
+                    known = np.isfinite(self._oi_usd[row, base:n])
+                    if known.any():
+                        base_usd = self._oi_usd[row, base + int(np.argmax(known))]
+                result[symbol] = {
+                    'open_interest': float(oi),
+                    'open_interest_usd': float(oi_usd) if np.isfinite(oi_usd) else None,
+                    'oi_change': float(oi - base_oi),
+                    'oi_change_pct': float((oi / base_oi - 1) * 100) if base_oi else 0.0,
+                    'oi_usd_change': float(oi_usd - base_usd) if np.isfinite(oi_usd - base_usd) else None,
+                    'since': float(timestamps[base])
+                }
+        return result
+
+    def __len__(self) -> int:
+        return int(self._length.sum())
+
+class OpenInterestCollector:
+    """Polls open interest for all symbols on a schedule and appends to a series"""
+
+    def __init__(self, symbols: Sequence[str] = SYMBOLS, series: Optional[OpenInterestSeries] = None,
+                 interval: float = POLL_INTERVAL, workers: int = MAX_WORKERS, clock=None):
+        self.symbols = list(symbols)
+        self.series = series if series is not None else OpenInterestSeries()
+        self.interval = interval
+        self.workers = workers
+        self.clock = clock or SystemClock()
+        self.stats = {'polls': 0, 'samples': 0, 'failed': 0}
+        self._mark_prices: Dict[str, float] = {}
+        self._stop = threading.Event()
+
+    def poll_once(self) -> int:
+        """Fetch OI for every symbol concurrently; returns the number of samples stored"""
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(self.symbols) + 1))) as executor:
+            prices_future = executor.submit(get_mark_prices)
+            oi_futures = {symbol: executor.submit(get_open_interest_data, symbol) for symbol in self.symbols}
+            # An empty result (failed request) keeps the previous mark prices
+            self._mark_prices.update(prices_future.result())
+            timestamp = self.clock.now()
+
+            stored = 0
+            for symbol, future in oi_futures.items():
+                data = future.result()
+                if data is None:
+                    self.stats['failed'] += 1
+                    continue
+                oi = data['open_interest']
+                self.series.append(symbol, timestamp, oi, oi * self._mark_prices.get(symbol, np.nan))
+                stored += 1
+
+        self.stats['polls'] += 1
+        self.stats['samples'] += stored
+        return stored
+
+    def run(self):
+        logger.info(f"Open interest collector started for {len(self.symbols)} symbols every {self.interval}s")
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error(f"Open interest poll failed: {e}")
+            self._stop.wait(self.interval)
+
+    def stop(self):
+        self._stop.set()
+
+# Process-wide series read by the dashboard and bot
+OI_SERIES = OpenInterestSeries()
+_COLLECTOR: Dict = {}
+_COLLECTOR_LOCK = threading.Lock()
+
+def start_open_interest_collector(symbols: Sequence[str] = SYMBOLS, interval: float = POLL_INTERVAL) -> OpenInterestCollector:
+    """Start the background collector once per process"""
+    with _COLLECTOR_LOCK:
+        if 'collector' not in _COLLECTOR:
+            collector = OpenInterestCollector(symbols, OI_SERIES, interval)
+            threading.Thread(target=collector.run, name="oi-collector", daemon=True).start()
+            _COLLECTOR['collector'] = collector
+        return _COLLECTOR['collector']
+
+def get_open_interest_deltas(windows: Dict[str, float] = DELTA_WINDOWS) -> Dict[str, Dict[str, Dict]]:
+    """OI changes per window and symbol, from memory"""
+    return {name: OI_SERIES.deltas(seconds) for name, seconds in windows.items()}
+
+def open_interest_table(deltas: Dict[str, Dict[str, Dict]], positions: Optional[List[Dict]] = None) -> List[Dict]:
+    """
+    One row per symbol: OI in USD, its % change per window and the latest
+    top-trader long/short ratio, so OI growth can be read against positioning
+    """
+    latest_ratio: Dict[str, Dict] = {}
+    for pos in positions or []:
+        if pos['symbol'] not in latest_ratio or pos['time'] > latest_ratio[pos['symbol']]['time']:
+            latest_ratio[pos['symbol']] = pos
+
+    rows: Dict[str, Dict] = {}
+    for window, by_symbol in deltas.items():
+        for symbol, delta in by_symbol.items():
+            row = rows.setdefault(symbol, {'symbol': symbol, 'open_interest_usd': delta['open_interest_usd']})
+            row[f'change_{window}_pct'] = delta['oi_change_pct']
+    for symbol, row in rows.items():
+        ratio = latest_ratio.get(symbol)
+        row['long_ratio'] = ratio['long_ratio'] if ratio else None
+        row['short_ratio'] = ratio['short_ratio'] if ratio else None
+    return sorted(rows.values(), key=lambda row: row['open_interest_usd'] or 0, reverse=True)
+
+if __name__ == "__main__":
+    import time
+    from backend import whale_position_binance as wpb
+    from backend.binance_stub import BinanceFuturesStub, make_symbols
+    from backend.simulator import SimulatedClock
+
+    # Poll 100 symbols against the local stub over a simulated day, then query deltas
+    logging.getLogger().setLevel(logging.WARNING)
+    symbols = make_symbols(100)
+    clock = SimulatedClock(start=time.time())
+    stub = BinanceFuturesStub(latency=0.02, clock=clock, symbols=symbols).start()
+    wpb.BINANCE_FUTURES_URL = stub.url
+    wpb.RATE_LIMITER.limit = 10 ** 9     # the stub's own limit is what we test against here
+    stub.weight_limit = 10 ** 9
+
+    collector = OpenInterestCollector(symbols, OpenInterestSeries(), workers=16, clock=clock)
+    start = time.perf_counter()
+    collector.poll_once()
+    print(f"One poll of {len(symbols)} symbols: {time.perf_counter() - start:.2f}s "
+          f"({stub.requests.get('/fapi/v1/openInterest', 0)} OI requests, "
+          f"{stub.requests.get('/fapi/v1/premiumIndex', 0)} mark price request)")
+
+    # Fill a day of 1-minute samples directly from the stub's model
+    stub.latency = 0
+    for _ in range(24 * 60):
+        clock.advance(60)
+        for symbol in symbols:
+            oi = stub.open_interest(symbol)
+            collector.series.append(symbol, clock.now(), oi, oi * stub.mark_price(symbol))
+    stub.stop()
+    print(f"Series holds {len(collector.series):,} samples")
+
+    requests_before = sum(stub.requests.values())
+    start = time.perf_counter()
+    for _ in range(100):
+        deltas = {name: collector.series.deltas(seconds) for name, seconds in DELTA_WINDOWS.items()}
+    elapsed = (time.perf_counter() - start) / 100
+    print(f"Deltas for {len(DELTA_WINDOWS)} windows x {len(symbols)} symbols: {elapsed * 1e3:.2f}ms, "
+          f"API calls during queries: {sum(stub.requests.values()) - requests_before}")
+    btc = deltas['1h']['BTCUSDT']
+    print(f"BTCUSDT 1h: OI {btc['open_interest']:,.0f} ({btc['oi_change_pct']:+.2f}%), "
+          f"${btc['open_interest_usd'] / 1e6:,.1f}M ({btc['oi_usd_change'] / 1e6:+,.1f}M)")
@@ -0,0 +1,226 @@
+"""
+Numeric book of open futures positions, stored as a struct of NumPy arrays.
+
+Entry price, size, side, leverage and PnL are kept as numbers, one array
+per field, so marking every position to market is a single vectorized
+operation and nothing is parsed back from display strings. Formatting
+happens only in to_display_frame(), for the rows actually rendered.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from backend.liquidation_heatmap import estimate_liquidation_prices
+from backend.simulator import symbol_to_token
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+NUMERIC_FIELDS = {
+    'opened_at': np.float64,
+    'symbol': np.int64,         # code into PositionBook.symbols
+    'side': np.int8,            # +1 LONG, -1 SHORT
+    'amount_usd': np.float64,   # notional at entry
+    'size': np.float64,
+    'entry_price': np.float64,
+    'current_price': np.float64,
+    'leverage': np.float64,
+    'pnl': np.float64
+}
+LABEL_FIELDS = ('position_id', 'exchange')
+
+class PositionBook:
+    """Open positions as parallel arrays; `version` changes on every mutation"""
+
+    def __init__(self):
+        self.symbols: List[str] = []
+        self._symbol_index: Dict[str, int] = {}
+        self.columns: Dict[str, np.ndarray] = {name: np.empty(0, dtype=dtype) for name, dtype in NUMERIC_FIELDS.items()}
+        for name in LABEL_FIELDS:
+            self.columns[name] = np.empty(0, dtype=object)
+        self.version = 0
+        self._summary: Optional[tuple] = None
+
+    def __len__(self) -> int:
+        return len(self.columns['side'])
+
+    def symbol_code(self, symbol: str) -> int:
+        code = self._symbol_index.get(symbol)
+        if code is None:
+            code = self._symbol_index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return code
+
+    def append_columns(self, **columns):
+        """Append positions given as arrays (symbol as codes from symbol_code())"""
+        for name, current in self.columns.items():
+            added = np.asarray(columns[name], dtype=current.dtype)
+            self.columns[name] = np.concatenate([current, added])
+        self.version += 1
+
+    def add_positions(self, positions: Iterable[Dict]):
+        """Append positions in the simulator's open_position() format"""
+        positions = list(positions)
+        if not positions:
+            return
+        self.append_columns(
+            opened_at=[pos['time'] for pos in positions],
+            symbol=[self.symbol_code(pos['symbol']) for pos in positions],
+            side=[1 if pos['side'] == 'LONG' else -1 for pos in positions],
+            amount_usd=[pos['amount_usd'] for pos in positions],
+            size=[pos['position_size'] for pos in positions],
+            entry_price=[pos['entry_price'] for pos in positions],
+            current_price=[pos['current_price'] for pos in positions],
+            leverage=[pos['leverage'] for pos in positions],
+            pnl=[pos['unrealized_pnl'] for pos in positions],
+            position_id=[pos['position_id'] for pos in positions],
+            exchange=[pos['exchange'] for pos in positions]
+        )
+
+    def remove(self, indices):
+        """Close positions by row index (or boolean mask)"""
+        keep = np.ones(len(self), dtype=bool)
+        keep[indices] = False
+        for name, column in self.columns.items():
+            self.columns[name] = column[keep]
+        self.version += 1
+
+    def clear(self):
+        self.remove(slice(None))
+
+    def price_vector(self, prices: Dict[str, float]) -> np.ndarray:
+        """Prices indexed by symbol code, keyed by symbol or token; missing ones are NaN"""
+        return np.array([prices.get(symbol, prices.get(symbol_to_token(symbol), np.nan)) for symbol in self.symbols],
+                        dtype=np.float64)
+
+    def mark_to_market(self, prices):
+        """
+        Revalue every position at the given prices (dict by symbol or array by
+        symbol code) in one vectorized pass; positions without a price keep theirs
+        """
+        if isinstance(prices, dict):
+            prices = self.price_vector(prices)
+        columns = self.columns
+        current = prices[columns['symbol']] if len(prices) else np.empty(0)
+        current = np.where(np.isnan(current), columns['current_price'], current)
+        columns['current_price'] = current
+        columns['pnl'] = columns['side'] * columns['amount_usd'] * (current / columns['entry_price'] - 1)
+        self.version += 1
+
+    def liquidation_levels(self, symbol: str):
+        """Estimated liquidation prices, sides and USD amounts of one symbol's positions"""
+        mask = self.columns['symbol'] == self._symbol_index.get(symbol, -1)
+        columns = {name: self.columns[name][mask] for name in ('entry_price', 'leverage', 'side', 'amount_usd')}
+        liquidation = estimate_liquidation_prices(columns['entry_price'], columns['leverage'], columns['side'])
+        return liquidation, columns['side'], columns['amount_usd']
+
+    def summary(self) -> Dict:
+        """Totals for the summary panel, recomputed only when the book has changed"""
+        if self._summary is not None and self._summary[0] == self.version:
+            return self._summary[1]
+
+        columns = self.columns
+        longs = int(np.count_nonzero(columns['side'] > 0))
+        total_value = float(columns['amount_usd'].sum())
+        total_pnl = float(columns['pnl'].sum())
+        result = {
+            'total_positions': len(self),
+            'long_positions': longs,
+            'short_positions': len(self) - longs,
+            'total_value': total_value,
+            'total_pnl': total_pnl,
+            'pnl_percentage': total_pnl / total_value * 100 if total_value > 0 else 0.0
+        }
+        self._summary = (self.version, result)
+        return result
+
+    def to_display_frame(self, rows: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """Formatted table for the dashboard; only the selected rows are formatted"""
+        columns = {name: column[rows] if rows is not None else column for name, column in self.columns.items()}
+        amount, leverage, pnl = columns['amount_usd'], columns['leverage'], columns['pnl']
+        liquidation = estimate_liquidation_prices(columns['entry_price'], leverage, columns['side'])
+        symbols = np.array(self.symbols, dtype=object)
+
+        return pd.DataFrame({
+            "Time": [datetime.fromtimestamp(ts).strftime("%H:%M:%S") for ts in columns['opened_at']],
+            "Symbol": [symbol.replace("USDT", "") for symbol in symbols[columns['symbol']]],
+            "Side": np.where(columns['side'] > 0, "LONG", "SHORT"),
+            "Amount (USD)": [f"${value:,.0f}" for value in amount],
+            "Size": [f"{value:.4f}" for value in columns['size']],
+            "Entry Price": [f"${value:,.2f}" for value in columns['entry_price']],
+            "Current Price": [f"${value:,.2f}" for value in columns['current_price']],
+            "Leverage": [f"{value:.0f}x" for value in leverage],
+            "Margin": [f"${value:,.0f}" for value in amount / leverage],
+            "PnL": [f"${value:,.0f}" for value in pnl],
+            "PnL %": [f"{value:+.1f}%" for value in pnl / amount * 100],
+            "Liq. Price": [f"${value:,.2f}" for value in liquidation],
+            "Exchange": columns['exchange']
+        })
+
+if __name__ == "__main__":
+    import time
+    from backend.simulator import BASE_PRICES
+
+    n = 100_000
+    rng = np.random.default_rng(1)
+    book = PositionBook()
+    tokens = list(BASE_PRICES)
+    codes = np.array([book.symbol_code(f"{token}USDT") for token in tokens])
+    base = np.array([BASE_PRICES[token] for token in tokens])
+
+    which = rng.integers(0, len(tokens), size=n)
+    entry = base[which] * (1 + rng.uniform(-0.05, 0.05, size=n))
+    amount = rng.integers(50_000, 5_000_000, size=n).astype(np.float64)
+    book.append_columns(
+        opened_at=np.full(n, time.time()), symbol=codes[which], side=np.where(rng.random(n) < 0.55, 1, -1),
+        amount_usd=amount, size=amount / entry, entry_price=entry, current_price=entry,
+        leverage=rng.choice([2, 5, 10, 25, 50], size=n), pnl=np.zeros(n),
+        position_id=[f"POS_{i}" for i in range(n)], exchange=np.full(n, "Binance", dtype=object)
+    )
+
+    ticks = 200
+    start = time.perf_counter()
+    for _ in range(ticks):
+        base = base * (1 + rng.normal(0, 0.001, size=len(base)))
+        book.mark_to_market(base)
+    per_tick = (time.perf_counter() - start) / ticks
+    print(f"Mark-to-market of {n:,} positions: {per_tick * 1e3:.2f}ms per tick")
+
+    # Summary panel CPU per rerun: string parsing of the display table vs the memoized numeric summary
+    def parse_summary(frame):
+        amounts, pnl_values = [], []
+        for _, row in frame.iterrows():
+            amounts.append(float(row['Amount (USD)'].replace('$', '').replace(',', '')))
+            pnl_values.append(float(row['PnL'].replace('$', '').replace(',', '')))
+        return len(frame[frame['Side'] == 'LONG']), len(frame[frame['Side'] == 'SHORT']), sum(amounts), sum(pnl_values)
+
+    for count in (10, 10_000):
+        sample = PositionBook()
+        sample.symbols, sample._symbol_index = book.symbols, book._symbol_index
+        sample.append_columns(**{name: column[:count] for name, column in book.columns.items()})
+        frame = sample.to_display_frame()
+
+        start = time.process_time()
+        parse_summary(frame)
+        parsed = time.process_time() - start
+
+        start = time.process_time()
+        sample.summary()
+        cold = time.process_time() - start
+
+        reruns = 1000
+        start = time.process_time()
+        for _ in range(reruns):
+            sample.summary()
+        memoized = (time.process_time() - start) / reruns
+        print(f"Summary at {count:>6,} positions: iterrows parsing {parsed * 1e3:8.2f}ms, "
+              f"vectorized {cold * 1e3:.3f}ms, unchanged rerun {memoized * 1e6:.2f}µs CPU")
+
+    start = time.perf_counter()
+    frame = book.to_display_frame(np.arange(20))
+    print(f"Formatting 20 rows for display: {(time.perf_counter() - start) * 1e3:.2f}ms")
+    print(frame.head(3).to_string(index=False))
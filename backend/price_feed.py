@@ -1,7 +1,11 @@
 import requests
 import logging
 import time
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from backend.simulator import get_simulator, BASE_PRICES, CIRCULATING_SUPPLY, BASE_VOLUME_24H
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -10,6 +14,74 @@ logger = logging.getLogger(__name__)
 PRICE_CACHE = {}
 CACHE_DURATION = 60  # seconds
 
+# Ticker symbol -> CoinGecko coin id
+SYMBOL_TO_COIN_ID = {
+    'BTC': 'bitcoin',
+    'ETH': 'ethereum',
+    'SOL': 'solana',
+    'BNB': 'binancecoin',
+    'ADA': 'cardano',
+    'DOT': 'polkadot'
+}
+
+# In-memory USD price snapshot used to value whale transactions.
+# Tokens map to a fixed slot (token -> coin id -> index) so a lookup is a
+# dict hit plus an array read; the array is replaced, never mutated, so
+# readers on other threads always see a complete snapshot. Only real
+# CoinGecko prices are published here, never fallback or simulated ones;
+# 'timestamp' is when they were fetched (None while only the built-in base
+# prices are there), so a failing API leaves the last real prices in place.
+SNAPSHOT_TOKENS: List[str] = list(SYMBOL_TO_COIN_ID)
+COIN_ID_INDEX = {coin_id: i for i, coin_id in enumerate(SYMBOL_TO_COIN_ID.values())}
+TOKEN_INDEX = {token: COIN_ID_INDEX[coin_id] for token, coin_id in SYMBOL_TO_COIN_ID.items()}
+PRICE_SNAPSHOT = {
+    'prices': np.array([BASE_PRICES[token] for token in SNAPSHOT_TOKENS], dtype=np.float64),
+    'timestamp': None
+}
+
+def update_price_snapshot(data: Dict, timestamp: Optional[float] = None):
+    """
+    Copy CoinGecko-style {coin_id: {'usd': price}} data into the valuation snapshot
+    """
+    prices = PRICE_SNAPSHOT['prices'].copy()
+    for coin_id, values in data.items():
+        index = COIN_ID_INDEX.get(coin_id)
+        if index is not None and values.get('usd'):
+            prices[index] = values['usd']
+    PRICE_SNAPSHOT['prices'] = prices
+    PRICE_SNAPSHOT['timestamp'] = timestamp if timestamp is not None else time.time()
+
+def price_snapshot_age() -> Optional[float]:
+    """Seconds since the valuation snapshot was last updated from CoinGecko (None if never)"""
+    timestamp = PRICE_SNAPSHOT['timestamp']
+    return time.time() - timestamp if timestamp is not None else None
+
+def get_token_price(token: str) -> float:
+    """
+    USD price of a token from the snapshot (0 for untracked tokens)
+    """
+    index = TOKEN_INDEX.get(token)
+    return float(PRICE_SNAPSHOT['prices'][index]) if index is not None else 0.0
+
+def token_price_vector(tokens: Sequence[str]) -> np.ndarray:
+    """
+    Snapshot prices for a list of tokens, in the same order (0 for untracked tokens)
+    """
+    prices = PRICE_SNAPSHOT['prices']
+    return np.array([prices[TOKEN_INDEX[t]] if t in TOKEN_INDEX else 0.0 for t in tokens])
+
+def value_amounts(token_codes: np.ndarray, amounts: np.ndarray, tokens: Sequence[str]) -> np.ndarray:
+    """
+    USD values of many transactions at once; token_codes index into `tokens`
+    """
+    return token_price_vector(tokens)[token_codes] * amounts
+
+def get_cached_prices() -> Optional[Dict]:
+    """
+    Return the last fetched prices without hitting the API (None if never fetched)
+    """
+    return PRICE_CACHE.get('data')
+
 def get_prices() -> Optional[Dict]:
     """
     Fetch cryptocurrency prices from CoinGecko API with caching and error handling
@@ -50,6 +122,10 @@ def get_prices() -> Optional[Dict]:
             # Cache the successful response
             PRICE_CACHE['data'] = data
             PRICE_CACHE['timestamp'] = current_time
+            update_price_snapshot(data, current_time)
+
+            from backend.alert_rules import publish_price_alerts
+            publish_price_alerts(data)
             
             return data
             
@@ -75,47 +151,25 @@ def get_prices() -> Optional[Dict]:
 
 def get_fallback_prices() -> Dict:
     """
-    Return fallback price data when API is unavailable
-    """
-    logger.info("Using fallback price data")
-    return {
-        "bitcoin": {
-            "usd": 104906,
-            "usd_24h_change": 2.4,
-            "usd_market_cap": 2050000000000,
-            "usd_24h_vol": 28000000000
-        },
-        "ethereum": {
-            "usd": 2526.53,
-            "usd_24h_change": -0.8,
-            "usd_market_cap": 304000000000,
-            "usd_24h_vol": 12000000000
-        },
-        "solana": {
-            "usd": 145.74,
-            "usd_24h_change": 1.2,
-            "usd_market_cap": 69000000000,
-            "usd_24h_vol": 2500000000
-        },
-        "binancecoin": {
-            "usd": 692.45,
-            "usd_24h_change": 0.5,
-            "usd_market_cap": 100000000000,
-            "usd_24h_vol": 1800000000
-        },
-        "cardano": {
-            "usd": 1.23,
-            "usd_24h_change": -1.5,
-            "usd_market_cap": 43000000000,
-            "usd_24h_vol": 850000000
-        },
-        "polkadot": {
-            "usd": 7.89,
-            "usd_24h_change": 3.2,
-            "usd_market_cap": 11000000000,
-            "usd_24h_vol": 420000000
+    Return fallback price data when API is unavailable (for display only:
+    whale valuations keep the last real snapshot)
+    """
+    age = price_snapshot_age()
+    logger.info("Using fallback price data; valuations use "
+                + (f"the CoinGecko snapshot from {age:.0f}s ago" if age is not None else "the base prices"))
+    sim = get_simulator()
+    prices = sim.prices()
+    
+    fallback = {}
+    for symbol, coin_id in SYMBOL_TO_COIN_ID.items():
+        price = prices[symbol]
+        fallback[coin_id] = {
+            "usd": round(price, 2),
+            "usd_24h_change": round(sim.change_24h(symbol), 2),
+            "usd_market_cap": round(price * CIRCULATING_SUPPLY[symbol]),
+            "usd_24h_vol": BASE_VOLUME_24H[symbol]
         }
-    }
+    return fallback
 
 def format_price_data(raw_data: Dict) -> Dict:
     """
@@ -141,4 +195,21 @@ if __name__ == "__main__":
         for coin, data in formatted.items():
             print(f"{coin.upper()}: {data}")
     else:
-        print("Failed to fetch prices")
\ No newline at end of file
+        print("Failed to fetch prices")
+
+    # Benchmark snapshot valuation: scalar lookups vs one vectorized multiply
+    n = 1_000_000
+    rng = np.random.default_rng(0)
+    codes = rng.integers(0, len(SNAPSHOT_TOKENS), size=n)
+    amounts = rng.uniform(1, 10_000, size=n)
+
+    start = time.perf_counter()
+    for i in range(100_000):
+        get_token_price(SNAPSHOT_TOKENS[codes[i]])
+    scalar = (time.perf_counter() - start) / 100_000
+
+    start = time.perf_counter()
+    values = value_amounts(codes, amounts, SNAPSHOT_TOKENS)
+    batch = time.perf_counter() - start
+    print(f"Scalar lookup: {scalar * 1e9:.0f}ns/tx, batch valuation of {n:,} tx: {batch * 1e3:.1f}ms "
+          f"(total ${values.sum() / 1e9:,.1f}B)")
\ No newline at end of file
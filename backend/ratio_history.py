@@ -0,0 +1,181 @@
+"""
+Persistent long/short ratio history per symbol.
+
+Rows are stored in SQLite keyed by (symbol, period, timestamp). A sync only
+asks Binance for periods after the newest stored row (startTime cursor), so
+once the history is warm each refresh downloads at most the periods that
+closed since the last one. Holes in an existing database (e.g. from a run
+that was stopped for a while) are found with one query the first time a
+symbol is synced and backfilled; any range is served from local storage.
+"""
+
+import os
+import sqlite3
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from backend.simulator import SystemClock
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Next to this module, not in whatever directory the process was started from
+RATIO_HISTORY_DB = os.environ.get(
+    "RATIO_HISTORY_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "ratio_history.db")
+)
+
+PERIOD_MS = {
+    '5m': 300_000, '15m': 900_000, '30m': 1_800_000, '1h': 3_600_000, '2h': 7_200_000,
+    '4h': 14_400_000, '6h': 21_600_000, '12h': 43_200_000, '1d': 86_400_000
+}
+
+INITIAL_PERIODS = 30   # periods downloaded for a symbol seen for the first time
+PAGE_LIMIT = 500       # Binance maximum rows per request
+MAX_GAPS = 20          # holes backfilled per sync
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS position_ratios (
+    symbol TEXT NOT NULL,
+    period TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    long_ratio REAL NOT NULL,
+    short_ratio REAL NOT NULL,
+    PRIMARY KEY (symbol, period, timestamp)
+) WITHOUT ROWID
+"""
+
+class RatioHistory:
+    """
+    Local store of top-trader position ratios, kept current with startTime cursors.
+
+    `fetch(symbol, limit, period, start_time, end_time)` returns raw Binance
+    rows; it is injected so the store does not depend on a particular client.
+    """
+
+    def __init__(self, fetch: Callable[..., List[Dict]], path: str = RATIO_HISTORY_DB, clock=None):
+        self.fetch = fetch
+        self.path = path
+        self.clock = clock or SystemClock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._cursors: Dict[Tuple[str, str], Optional[int]] = {}
+        self._gap_checked = set()
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(SCHEMA)
+            self._conn.commit()
+        return self._conn
+
+    def cursor(self, symbol: str, period: str = '5m') -> Optional[int]:
+        """Timestamp (ms) of the newest stored period, None if the symbol has no history"""
+        key = (symbol, period)
+        with self._lock:
+            if key not in self._cursors:
+                row = self._db().execute(
+                    "SELECT MAX(timestamp) FROM position_ratios WHERE symbol = ? AND period = ?", key
+                ).fetchone()
+                self._cursors[key] = row[0]
+            return self._cursors[key]
+
+    def _store(self, symbol: str, period: str, rows: List[Dict]) -> int:
+        values = [
+            (symbol, period, int(row["timestamp"]), float(row["longPositionRatio"]), float(row["shortPositionRatio"]))
+            for row in rows
+        ]
+        if not values:
+            return 0
+        with self._lock:
+            db = self._db()
+            before = db.total_changes
+            db.executemany("INSERT OR IGNORE INTO position_ratios VALUES (?, ?, ?, ?, ?)", values)
+            db.commit()
+            inserted = db.total_changes - before
+            newest = max(value[2] for value in values)
+            cursor = self._cursors.get((symbol, period))
+            self._cursors[(symbol, period)] = max(cursor, newest) if cursor is not None else newest
+        return inserted
+
+    def latest_period(self, period: str = '5m') -> int:
+        """Start of the most recent period Binance can have published"""
+        step = PERIOD_MS[period]
+        return int(self.clock.now() * 1000) // step * step
+
+    def backfill(self, symbol: str, period: str, start_ms: int, end_ms: int) -> int:
+        """Download [start_ms, end_ms] page by page; returns the number of new rows"""
+        step = PERIOD_MS[period]
+        inserted = 0
+        while start_ms <= end_ms:
+            rows = self.fetch(symbol, PAGE_LIMIT, period, start_time=start_ms, end_time=end_ms)
+            if not rows:
+                break
+            inserted += self._store(symbol, period, rows)
+            start_ms = max(int(row["timestamp"]) for row in rows) + step
+        return inserted
+
+    def find_gaps(self, symbol: str, period: str = '5m') -> List[Tuple[int, int]]:
+        """Missing (start, end) ranges between stored periods"""
+        step = PERIOD_MS[period]
+        with self._lock:
+            rows = self._db().execute(
+                """
+                SELECT prev + ?, timestamp - ? FROM (
+                    SELECT timestamp, LAG(timestamp) OVER (ORDER BY timestamp) AS prev
+                    FROM position_ratios WHERE symbol = ? AND period = ?
+                ) WHERE timestamp - prev > ? LIMIT ?
+                """,
+                (step, step, symbol, period, step, MAX_GAPS)
+            ).fetchall()
+        return [(start, end) for start, end in rows]
+
+    def sync(self, symbol: str, period: str = '5m') -> int:
+        """Bring one symbol up to date; returns the number of new rows"""
+        latest = self.latest_period(period)
+        cursor = self.cursor(symbol, period)
+
+        if cursor is None:
+            rows = self.fetch(symbol, INITIAL_PERIODS, period)
+            return self._store(symbol, period, rows)
+
+        inserted = 0
+        if (symbol, period) not in self._gap_checked:
+            for start, end in self.find_gaps(symbol, period):
+                inserted += self.backfill(symbol, period, start, end)
+            self._gap_checked.add((symbol, period))
+        if cursor < latest:
+            inserted += self.backfill(symbol, period, cursor + PERIOD_MS[period], latest)
+        return inserted
+
+    def get_range(self, symbol: str, period: str = '5m', start_ms: Optional[int] = None,
+                  end_ms: Optional[int] = None, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Stored rows in [start_ms, end_ms], oldest first; with `limit`, the newest `limit` rows
+        """
+        query = "SELECT timestamp, long_ratio, short_ratio FROM position_ratios WHERE symbol = ? AND period = ?"
+        params: list = [symbol, period]
+        if start_ms is not None:
+            query += " AND timestamp >= ?"
+            params.append(start_ms)
+        if end_ms is not None:
+            query += " AND timestamp <= ?"
+            params.append(end_ms)
+        query += " ORDER BY timestamp DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._db().execute(query, params).fetchall()
+        return [
+            {'timestamp': ts, 'long_ratio': long_ratio, 'short_ratio': short_ratio}
+            for ts, long_ratio, short_ratio in reversed(rows)
+        ]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -1,9 +1,11 @@
-import random
 import datetime
 import logging
 from typing import List, Dict, Optional
 import json
 
+from backend.aggregation import ActivityAggregate
+from backend.simulator import get_simulator
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -16,98 +18,27 @@ def get_simulated_open_positions(min_usd=10000, count=10) -> List[Dict]:
     """
     logger.info(f"Generating {count} simulated whale positions...")
     
+    sim = get_simulator()
     positions = []
-    current_time = datetime.datetime.now()
     
     for i in range(count):
-        # Generate random time within last 2 hours
-        time_offset = random.randint(0, 7200)  # 0 to 2 hours in seconds
-        position_time = current_time - datetime.timedelta(seconds=time_offset)
-        
-        # Generate position amount with realistic distribution
-        if random.random() < 0.1:  # 10% chance of very large position
-            amount = random.randint(min_usd * 10, min_usd * 50)
-        elif random.random() < 0.3:  # 30% chance of large position
-            amount = random.randint(min_usd * 3, min_usd * 10)
-        else:  # 60% chance of regular position
-            amount = random.randint(min_usd, min_usd * 3)
-        
-        # Select symbol with weighted probability (BTC and ETH more common)
-        symbol_weights = {
-            "BTCUSDT": 0.3,
-            "ETHUSDT": 0.25,
-            "SOLUSDT": 0.15,
-            "ADAUSDT": 0.1,
-            "BNBUSDT": 0.08,
-            "DOTUSDT": 0.05,
-            "MATICUSDT": 0.04,
-            "LINKUSDT": 0.03
-        }
-        
-        symbol = random.choices(
-            list(symbol_weights.keys()),
-            weights=list(symbol_weights.values())
-        )[0]
-        
-        # Generate side with slight bias towards LONG
-        side = random.choices(["LONG", "SHORT"], weights=[0.55, 0.45])[0]
-        
-        # Generate entry price (simulated)
-        base_prices = {
-            "BTCUSDT": 104000,
-            "ETHUSDT": 2500,
-            "SOLUSDT": 145,
-            "ADAUSDT": 1.2,
-            "BNBUSDT": 690,
-            "DOTUSDT": 7.8,
-            "MATICUSDT": 0.85,
-            "LINKUSDT": 15.5
-        }
-        
-        base_price = base_prices.get(symbol, 100)
-        price_variation = random.uniform(-0.05, 0.05)  # ±5% variation
-        entry_price = base_price * (1 + price_variation)
-        
-        # Calculate position size in coins
-        position_size = amount / entry_price
-        
-        # Generate leverage (common values in futures)
-        leverage = random.choice([1, 2, 3, 5, 10, 20, 25, 50])
-        
-        # Generate PnL (unrealized)
-        pnl_percentage = random.uniform(-0.15, 0.25)  # -15% to +25%
-        unrealized_pnl = amount * pnl_percentage
-        
-        # Generate margin used
-        margin_used = amount / leverage
-        
-        # Generate current price based on PnL
-        if side == "LONG":
-            current_price = entry_price * (1 + (unrealized_pnl / amount))
-        else:
-            current_price = entry_price * (1 - (unrealized_pnl / amount))
-        
-        # Generate liquidation price
-        if side == "LONG":
-            liquidation_price = entry_price * (1 - (0.8 / leverage))
-        else:
-            liquidation_price = entry_price * (1 + (0.8 / leverage))
+        pos = sim.open_position(min_usd=min_usd)
         
         positions.append({
-            "time": position_time.strftime("%Y-%m-%d %H:%M:%S"),
-            "symbol": symbol,
-            "side": side,
-            "amount_usd": amount,
-            "position_size": round(position_size, 6),
-            "entry_price": round(entry_price, 6),
-            "current_price": round(current_price, 6),
-            "leverage": f"{leverage}x",
-            "margin_used": round(margin_used, 2),
-            "unrealized_pnl": round(unrealized_pnl, 2),
-            "pnl_percentage": round(pnl_percentage * 100, 2),
-            "liquidation_price": round(liquidation_price, 6),
-            "position_id": f"POS_{random.randint(100000, 999999)}",
-            "exchange": random.choice(["Binance", "Bybit", "OKX", "Bitget"])
+            "time": datetime.datetime.fromtimestamp(pos['time']).strftime("%Y-%m-%d %H:%M:%S"),
+            "symbol": pos['symbol'],
+            "side": pos['side'],
+            "amount_usd": pos['amount_usd'],
+            "position_size": round(pos['position_size'], 6),
+            "entry_price": round(pos['entry_price'], 6),
+            "current_price": round(pos['current_price'], 6),
+            "leverage": f"{pos['leverage']}x",
+            "margin_used": round(pos['margin_used'], 2),
+            "unrealized_pnl": round(pos['unrealized_pnl'], 2),
+            "pnl_percentage": round(pos['pnl_percentage'] * 100, 2),
+            "liquidation_price": round(pos['liquidation_price'], 6),
+            "position_id": pos['position_id'],
+            "exchange": pos['exchange']
         })
     
     return positions
@@ -118,69 +49,22 @@ def get_simulated_recent_trades(min_usd=5000, count=20) -> List[Dict]:
     """
     logger.info(f"Generating {count} simulated whale trades...")
     
+    sim = get_simulator()
     trades = []
-    current_time = datetime.datetime.now()
     
     for i in range(count):
-        # Generate random time within last 4 hours
-        time_offset = random.randint(0, 14400)  # 0 to 4 hours in seconds
-        trade_time = current_time - datetime.timedelta(seconds=time_offset)
-        
-        # Generate trade amount
-        if random.random() < 0.15:  # 15% chance of very large trade
-            amount = random.randint(min_usd * 20, min_usd * 100)
-        else:
-            amount = random.randint(min_usd, min_usd * 10)
-        
-        # Select symbol
-        symbol_weights = {
-            "BTCUSDT": 0.35,
-            "ETHUSDT": 0.25,
-            "SOLUSDT": 0.15,
-            "ADAUSDT": 0.08,
-            "BNBUSDT": 0.07,
-            "DOTUSDT": 0.04,
-            "MATICUSDT": 0.03,
-            "LINKUSDT": 0.03
-        }
-        
-        symbol = random.choices(
-            list(symbol_weights.keys()),
-            weights=list(symbol_weights.values())
-        )[0]
-        
-        # Generate trade type
-        trade_type = random.choice(["BUY", "SELL"])
-        
-        # Generate prices
-        base_prices = {
-            "BTCUSDT": 104000,
-            "ETHUSDT": 2500,
-            "SOLUSDT": 145,
-            "ADAUSDT": 1.2,
-            "BNBUSDT": 690,
-            "DOTUSDT": 7.8,
-            "MATICUSDT": 0.85,
-            "LINKUSDT": 15.5
-        }
-        
-        base_price = base_prices.get(symbol, 100)
-        price_variation = random.uniform(-0.03, 0.03)  # ±3% variation
-        trade_price = base_price * (1 + price_variation)
-        
-        # Calculate quantity
-        quantity = amount / trade_price
+        trade = sim.whale_trade(min_usd=min_usd)
         
         trades.append({
-            "time": trade_time.strftime("%Y-%m-%d %H:%M:%S"),
-            "symbol": symbol,
-            "type": trade_type,
-            "amount_usd": amount,
-            "quantity": round(quantity, 6),
-            "price": round(trade_price, 6),
-            "trade_id": f"TRD_{random.randint(1000000, 9999999)}",
-            "exchange": random.choice(["Binance", "Coinbase", "Kraken", "Bybit"]),
-            "market_impact": round(random.uniform(0.1, 2.5), 2)  # % market impact
+            "time": datetime.datetime.fromtimestamp(trade['time']).strftime("%Y-%m-%d %H:%M:%S"),
+            "symbol": trade['symbol'],
+            "type": trade['type'],
+            "amount_usd": trade['amount_usd'],
+            "quantity": round(trade['quantity'], 6),
+            "price": round(trade['price'], 6),
+            "trade_id": trade['trade_id'],
+            "exchange": trade['exchange'],
+            "market_impact": round(trade['market_impact'], 2)  # % market impact
         })
     
     return trades
@@ -191,65 +75,42 @@ def analyze_whale_activity(positions: List[Dict], trades: List[Dict]) -> Dict:
     """
     logger.info("Analyzing whale activity patterns...")
     
-    # Analyze positions
-    total_position_value = sum(pos['amount_usd'] for pos in positions)
-    long_positions = [pos for pos in positions if pos['side'] == 'LONG']
-    short_positions = [pos for pos in positions if pos['side'] == 'SHORT']
-    
-    long_value = sum(pos['amount_usd'] for pos in long_positions)
-    short_value = sum(pos['amount_usd'] for pos in short_positions)
-    
-    # Analyze trades
-    total_trade_value = sum(trade['amount_usd'] for trade in trades)
-    buy_trades = [trade for trade in trades if trade['type'] == 'BUY']
-    sell_trades = [trade for trade in trades if trade['type'] == 'SELL']
-    
-    buy_value = sum(trade['amount_usd'] for trade in buy_trades)
-    sell_value = sum(trade['amount_usd'] for trade in sell_trades)
-    
-    # Symbol analysis
-    position_symbols = {}
-    trade_symbols = {}
-    
-    for pos in positions:
-        symbol = pos['symbol']
-        if symbol not in position_symbols:
-            position_symbols[symbol] = {'count': 0, 'value': 0}
-        position_symbols[symbol]['count'] += 1
-        position_symbols[symbol]['value'] += pos['amount_usd']
-    
-    for trade in trades:
-        symbol = trade['symbol']
-        if symbol not in trade_symbols:
-            trade_symbols[symbol] = {'count': 0, 'value': 0}
-        trade_symbols[symbol]['count'] += 1
-        trade_symbols[symbol]['value'] += trade['amount_usd']
+    # One pass over each list; callers that keep the aggregates can update them incrementally
+    return summarize_whale_activity(
+        ActivityAggregate(positions, side_key='side'),
+        ActivityAggregate(trades, side_key='type')
+    )
+
+def summarize_whale_activity(positions: ActivityAggregate, trades: ActivityAggregate) -> Dict:
+    """
+    Build the activity report from position and trade aggregates
+    """
+    longs, shorts = positions.side('LONG'), positions.side('SHORT')
+    buys, sells = trades.side('BUY'), trades.side('SELL')
     
     return {
         "summary": {
-            "total_open_positions": len(positions),
-            "total_position_value_usd": total_position_value,
-            "long_short_ratio": round(long_value / short_value, 2) if short_value > 0 else "∞",
-            "total_recent_trades": len(trades),
-            "total_trade_value_usd": total_trade_value,
-            "buy_sell_ratio": round(buy_value / sell_value, 2) if sell_value > 0 else "∞"
+            "total_open_positions": positions.count,
+            "total_position_value_usd": positions.value,
+            "long_short_ratio": positions.ratio('LONG', 'SHORT'),
+            "total_recent_trades": trades.count,
+            "total_trade_value_usd": trades.value,
+            "buy_sell_ratio": trades.ratio('BUY', 'SELL')
         },
         "positions": {
-            "long_positions": len(long_positions),
-            "long_value_usd": long_value,
-            "short_positions": len(short_positions),
-            "short_value_usd": short_value
+            "long_positions": longs['count'],
+            "long_value_usd": longs['value'],
+            "short_positions": shorts['count'],
+            "short_value_usd": shorts['value']
         },
         "trades": {
-            "buy_trades": len(buy_trades),
-            "buy_value_usd": buy_value,
-            "sell_trades": len(sell_trades),
-            "sell_value_usd": sell_value
+            "buy_trades": buys['count'],
+            "buy_value_usd": buys['value'],
+            "sell_trades": sells['count'],
+            "sell_value_usd": sells['value']
         },
-        "top_symbols_positions": sorted(position_symbols.items(), 
-                                      key=lambda x: x[1]['value'], reverse=True)[:5],
-        "top_symbols_trades": sorted(trade_symbols.items(), 
-                                   key=lambda x: x[1]['value'], reverse=True)[:5]
+        "top_symbols_positions": positions.top_symbols(5),
+        "top_symbols_trades": trades.top_symbols(5)
     }
 
 def display_whale_report(positions: List[Dict], trades: List[Dict], analysis: Dict):
@@ -309,7 +170,7 @@ def main():
     
     # Optional: Save to JSON
     output_data = {
-        "timestamp": datetime.datetime.now().isoformat(),
+        "timestamp": get_simulator().now().isoformat(),
         "positions": positions,
         "trades": trades,
         "analysis": analysis
@@ -1,120 +1,239 @@
+import os
 import requests
 import datetime
 import logging
-import random
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
 
+from backend.aggregation import ActivityAggregate
+from backend.alert_rules import get_alert_engine, position_event
+from backend.ratio_history import RatioHistory
+from backend.simulator import get_simulator
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Binance Futures API endpoints
-BINANCE_TOP_POSITIONS_API = "https://fapi.binance.com/futures/data/topLongShortPositionRatio"
-BINANCE_OPEN_INTEREST_API = "https://fapi.binance.com/fapi/v1/openInterest"
+# Binance Futures API endpoints (base URL can point at a local stub)
+BINANCE_FUTURES_URL = os.environ.get("BINANCE_FUTURES_URL", "https://fapi.binance.com")
+TOP_POSITIONS_PATH = "/futures/data/topLongShortPositionRatio"
+OPEN_INTEREST_PATH = "/fapi/v1/openInterest"
+PREMIUM_INDEX_PATH = "/fapi/v1/premiumIndex"
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# Concurrency and Binance request-weight budget
+MAX_WORKERS = 8
+WEIGHT_LIMIT_PER_MINUTE = 2400
+REQUEST_WEIGHT = {
+    TOP_POSITIONS_PATH: 1,
+    OPEN_INTEREST_PATH: 1,
+    PREMIUM_INDEX_PATH: 10   # all symbols in one call
+}
 
 # Symbols to track
 SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "ADAUSDT", "BNBUSDT", "DOTUSDT"]
 
-# Cache for positions data
+# Cache for positions data: 'positions'/'timestamp' hold the default universe,
+# 'by_key' every (symbols, limit, threshold_usd) combination that was fetched
 POSITIONS_CACHE = {}
 CACHE_DURATION = 300  # 5 minutes
+DEFAULT_CACHE_KEY = (tuple(SYMBOLS), 5, 10000)   # get_binance_whale_positions() defaults
+
+def get_cached_positions() -> Optional[List[Dict]]:
+    """
+    Return the last fetched whale positions (default symbols and parameters)
+    without hitting the API (None if never fetched)
+    """
+    return POSITIONS_CACHE.get('positions')
+
+class WeightRateLimiter:
+    """
+    Client-side copy of Binance's per-minute request-weight limit.
+
+    Callers reserve weight before each request and block when the current
+    minute is used up. The used weight reported by the server
+    (X-MBX-USED-WEIGHT-1M) and Retry-After on 429/418 take precedence over
+    the local count.
+    """
+
+    def __init__(self, limit_per_minute: int = WEIGHT_LIMIT_PER_MINUTE):
+        self.limit = limit_per_minute
+        self._window = int(time.time() // 60)
+        self._used = 0
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, weight: int = 1):
+        while True:
+            with self._lock:
+                now = time.time()
+                window = int(now // 60)
+                if window != self._window:
+                    self._window, self._used = window, 0
+                if now >= self._blocked_until and self._used + weight <= self.limit:
+                    self._used += weight
+                    return
+                wait = max(self._blocked_until, (window + 1) * 60) - now
+            logger.warning(f"Binance weight limit reached, waiting {wait:.1f}s")
+            time.sleep(wait)
+
+    def update(self, response: requests.Response):
+        with self._lock:
+            used = response.headers.get('X-MBX-USED-WEIGHT-1M')
+            if used is not None and int(time.time() // 60) == self._window:
+                self._used = max(self._used, int(used))
+            if response.status_code in (418, 429):
+                retry_after = float(response.headers.get('Retry-After', 60))
+                self._blocked_until = max(self._blocked_until, time.time() + retry_after)
+
+RATE_LIMITER = WeightRateLimiter()
+
+_session_local = threading.local()
+
+def _get_session() -> requests.Session:
+    """One pooled HTTP session per worker thread"""
+    session = getattr(_session_local, 'session', None)
+    if session is None:
+        session = _session_local.session = requests.Session()
+        session.headers.update(HEADERS)
+    return session
+
+def binance_get(path: str, params: Dict, timeout: int = 10) -> requests.Response:
+    """GET a Binance Futures endpoint within the request-weight budget"""
+    RATE_LIMITER.acquire(REQUEST_WEIGHT.get(path, 1))
+    response = _get_session().get(BINANCE_FUTURES_URL + path, params=params, timeout=timeout)
+    RATE_LIMITER.update(response)
+    return response
+
+def fetch_position_ratios(symbol: str, limit: int = 5, period: str = "5m",
+                          start_time: Optional[int] = None, end_time: Optional[int] = None) -> List[Dict]:
+    """
+    Raw top-trader long/short position ratios for one symbol (raises on failure)
+    """
+    params = {
+        "symbol": symbol,
+        "period": period,  # Options: "5m", "15m", "30m", "1h", "2h", "4h", "6h", "12h", "1d"
+        "limit": limit
+    }
+    if start_time is not None:
+        params["startTime"] = start_time
+    if end_time is not None:
+        params["endTime"] = end_time
+    response = binance_get(TOP_POSITIONS_PATH, params)
+    if response.status_code != 200:
+        raise requests.exceptions.HTTPError(f"status {response.status_code}")
+
+    data = response.json()
+    if not isinstance(data, list):
+        raise ValueError("Invalid data format")
+    return data
+
+# Local ratio history, kept current with startTime cursors
+RATIO_HISTORY = RatioHistory(fetch_position_ratios)
+
+def sync_position_ratios(symbols: List[str], limit: int = 5,
+                         workers: int = MAX_WORKERS) -> Dict[str, List[Dict]]:
+    """
+    Update the ratio history for many symbols concurrently and return the
+    latest `limit` stored periods per symbol. Symbols whose sync fails are
+    logged and served from what is already stored, so callers get partial results.
+    """
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(symbols)))) as executor:
+        futures = {symbol: executor.submit(RATIO_HISTORY.sync, symbol) for symbol in symbols}
+        for symbol, future in futures.items():
+            try:
+                future.result()
+            except requests.exceptions.HTTPError as e:
+                failed += 1
+                logger.warning(f"Failed to fetch data for {symbol}: {e}")
+            except requests.exceptions.RequestException as e:
+                failed += 1
+                logger.error(f"Network error fetching {symbol}: {e}")
+            except Exception as e:
+                failed += 1
+                logger.warning(f"Failed to fetch data for {symbol}: {e}")
+
+    logger.info(f"Synced position ratios for {len(symbols) - failed}/{len(symbols)} symbols")
+    results = {}
+    for symbol in symbols:
+        rows = RATIO_HISTORY.get_range(symbol, limit=limit)
+        if rows:
+            results[symbol] = rows
+    return results
 
-def get_binance_whale_positions(limit=5, threshold_usd=10000) -> List[Dict]:
+def get_binance_whale_positions(limit=5, threshold_usd=10000, symbols: Optional[List[str]] = None,
+                                workers: int = MAX_WORKERS) -> List[Dict]:
     """
     Get whale positions from Binance Futures API
     """
     current_time = time.time()
+    symbols = symbols or SYMBOLS
     
-    # Check cache first
-    if ('positions' in POSITIONS_CACHE and 
-        'timestamp' in POSITIONS_CACHE and 
-        current_time - POSITIONS_CACHE['timestamp'] < CACHE_DURATION):
+    # Check cache first; a result is only reused for the same symbols and parameters
+    cache_key = (tuple(symbols), limit, threshold_usd)
+    cached = POSITIONS_CACHE.get('by_key', {}).get(cache_key)
+    if cached and current_time - cached['timestamp'] < CACHE_DURATION:
         logger.info("Using cached positions data")
-        return POSITIONS_CACHE['positions']
+        return cached['positions']
     
     logger.info("Fetching whale positions from Binance...")
     
+    ratios = sync_position_ratios(symbols, limit, workers)
     positions = []
+    rng = get_simulator().random
     
-    for symbol in SYMBOLS:
-        try:
-            params = {
-                "symbol": symbol,
-                "period": "5m",  # Options: "5m", "15m", "30m", "1h", "2h", "4h", "6h", "12h", "1d"
-                "limit": limit
-            }
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
-            response = requests.get(
-                BINANCE_TOP_POSITIONS_API, 
-                params=params, 
-                headers=headers,
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
+    # Build positions in symbol order so seeded runs stay reproducible
+    for symbol in symbols:
+        for item in ratios.get(symbol, []):
+            try:
+                timestamp = int(item["timestamp"]) / 1000
+                readable_time = datetime.datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
+                
+                long_ratio = item["long_ratio"]
+                short_ratio = item["short_ratio"]
+                
+                # Calculate dominant side
+                dominant_side = "LONG" if long_ratio > short_ratio else "SHORT"
+                ratio_diff = abs(long_ratio - short_ratio)
+                
+                # Estimate position size based on ratio and market conditions
+                base_amount = threshold_usd
+                if ratio_diff > 0.1:  # Strong bias
+                    estimated_amount = rng.randint(base_amount * 2, base_amount * 5)
+                elif ratio_diff > 0.05:  # Moderate bias
+                    estimated_amount = rng.randint(base_amount, base_amount * 3)
+                else:  # Balanced
+                    estimated_amount = rng.randint(base_amount // 2, base_amount * 2)
                 
-                if isinstance(data, list) and data:
-                    for item in data:
-                        try:
-                            timestamp = int(item["timestamp"]) / 1000
-                            readable_time = datetime.datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
-                            
-                            long_ratio = float(item["longPositionRatio"])
-                            short_ratio = float(item["shortPositionRatio"])
-                            
-                            # Calculate dominant side
-                            dominant_side = "LONG" if long_ratio > short_ratio else "SHORT"
-                            ratio_diff = abs(long_ratio - short_ratio)
-                            
-                            # Estimate position size based on ratio and market conditions
-                            base_amount = threshold_usd
-                            if ratio_diff > 0.1:  # Strong bias
-                                estimated_amount = random.randint(base_amount * 2, base_amount * 5)
-                            elif ratio_diff > 0.05:  # Moderate bias
-                                estimated_amount = random.randint(base_amount, base_amount * 3)
-                            else:  # Balanced
-                                estimated_amount = random.randint(base_amount // 2, base_amount * 2)
-                            
-                            positions.append({
-                                "time": readable_time,
-                                "symbol": symbol,
-                                "side": dominant_side,
-                                "long_ratio": round(long_ratio, 4),
-                                "short_ratio": round(short_ratio, 4),
-                                "ratio_diff": round(ratio_diff, 4),
-                                "amount_usd": estimated_amount,
-                                "confidence": "High" if ratio_diff > 0.1 else "Medium" if ratio_diff > 0.05 else "Low"
-                            })
-                            
-                        except (KeyError, ValueError) as e:
-                            logger.warning(f"Error parsing position data for {symbol}: {e}")
-                            continue
-                            
-                else:
-                    logger.warning(f"Invalid data format for {symbol}")
-                    
-            else:
-                logger.warning(f"Failed to fetch data for {symbol}: {response.status_code}")
+                positions.append({
+                    "time": readable_time,
+                    "symbol": symbol,
+                    "side": dominant_side,
+                    "long_ratio": round(long_ratio, 4),
+                    "short_ratio": round(short_ratio, 4),
+                    "ratio_diff": round(ratio_diff, 4),
+                    "amount_usd": estimated_amount,
+                    "confidence": "High" if ratio_diff > 0.1 else "Medium" if ratio_diff > 0.05 else "Low"
+                })
                 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Network error fetching {symbol}: {e}")
-            continue
-        except Exception as e:
-            logger.error(f"Unexpected error fetching {symbol}: {e}")
-            continue
+            except (KeyError, ValueError) as e:
+                logger.warning(f"Error parsing position data for {symbol}: {e}")
+                continue
     
     if positions:
         # Sort by amount descending
         positions.sort(key=lambda x: x['amount_usd'], reverse=True)
         
         # Cache successful response
-        POSITIONS_CACHE['positions'] = positions
-        POSITIONS_CACHE['timestamp'] = current_time
+        POSITIONS_CACHE.setdefault('by_key', {})[cache_key] = {'positions': positions, 'timestamp': current_time}
+        if cache_key == DEFAULT_CACHE_KEY:
+            POSITIONS_CACHE['positions'] = positions
+            POSITIONS_CACHE['timestamp'] = current_time
         
         logger.info(f"Successfully fetched {len(positions)} whale positions")
         return positions
@@ -127,17 +246,7 @@ def get_open_interest_data(symbol: str) -> Optional[Dict]:
     Get open interest data for a symbol
     """
     try:
-        params = {"symbol": symbol}
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(
-            BINANCE_OPEN_INTEREST_API,
-            params=params,
-            headers=headers,
-            timeout=10
-        )
+        response = binance_get(OPEN_INTEREST_PATH, {"symbol": symbol})
         
         if response.status_code == 200:
             data = response.json()
@@ -154,28 +263,43 @@ def get_open_interest_data(symbol: str) -> Optional[Dict]:
         logger.error(f"Error fetching open interest for {symbol}: {e}")
         return None
 
+def get_mark_prices() -> Dict[str, float]:
+    """
+    Mark prices of all futures symbols in a single request (empty on failure)
+    """
+    try:
+        response = binance_get(PREMIUM_INDEX_PATH, {})
+        if response.status_code == 200:
+            return {item["symbol"]: float(item["markPrice"]) for item in response.json()}
+        logger.warning(f"Failed to get mark prices: {response.status_code}")
+    except Exception as e:
+        logger.error(f"Error fetching mark prices: {e}")
+    return {}
+
 def get_fallback_positions(min_usd=10000) -> List[Dict]:
     """
     Generate fallback position data when API is unavailable
     """
     logger.info("Using fallback whale positions data")
     
+    sim = get_simulator()
+    rng = sim.random
     positions = []
-    current_time = datetime.datetime.now()
+    current_time = sim.now()
     
     for symbol in SYMBOLS:
-        for i in range(random.randint(1, 3)):  # 1-3 positions per symbol
-            time_offset = random.randint(0, 1800)  # Up to 30 minutes ago
+        for i in range(rng.randint(1, 3)):  # 1-3 positions per symbol
+            time_offset = rng.randint(0, 1800)  # Up to 30 minutes ago
             position_time = (current_time - datetime.timedelta(seconds=time_offset))
             
             # Generate realistic ratios
-            long_ratio = random.uniform(0.3, 0.7)
+            long_ratio = rng.uniform(0.3, 0.7)
             short_ratio = 1.0 - long_ratio
             
             dominant_side = "LONG" if long_ratio > short_ratio else "SHORT"
             ratio_diff = abs(long_ratio - short_ratio)
             
-            amount = random.randint(min_usd, min_usd * 8)
+            amount = rng.randint(min_usd, min_usd * 8)
             
             positions.append({
                 "time": position_time.strftime("%Y-%m-%d %H:%M"),
@@ -203,20 +327,19 @@ def get_position_summary() -> Dict:
         if not positions:
             return {}
         
-        total_amount = sum(pos['amount_usd'] for pos in positions)
-        long_positions = [pos for pos in positions if pos['side'] == 'LONG']
-        short_positions = [pos for pos in positions if pos['side'] == 'SHORT']
+        stats = ActivityAggregate(positions)
+        long_count = stats.side('LONG')['count']
+        short_count = stats.side('SHORT')['count']
         
         return {
-            'total_positions': len(positions),
-            'total_amount_usd': f"${total_amount:,.0f}",
-            'long_positions': len(long_positions),
-            'short_positions': len(short_positions),
-            'long_percentage': round(len(long_positions) / len(positions) * 100, 1) if positions else 0,
-            'short_percentage': round(len(short_positions) / len(positions) * 100, 1) if positions else 0,
-            'most_active_symbol': max(set(pos['symbol'] for pos in positions), 
-                                    key=lambda x: sum(1 for pos in positions if pos['symbol'] == x)) if positions else "N/A",
-            'sentiment': "Bullish" if len(long_positions) > len(short_positions) else "Bearish" if len(short_positions) > len(long_positions) else "Neutral"
+            'total_positions': stats.count,
+            'total_amount_usd': f"${stats.value:,.0f}",
+            'long_positions': long_count,
+            'short_positions': short_count,
+            'long_percentage': round(long_count / stats.count * 100, 1),
+            'short_percentage': round(short_count / stats.count * 100, 1),
+            'most_active_symbol': stats.most_active_symbol() or "N/A",
+            'sentiment': "Bullish" if long_count > short_count else "Bearish" if short_count > long_count else "Neutral"
         }
         
     except Exception as e:
@@ -244,23 +367,11 @@ def format_positions_for_display(positions: List[Dict]) -> List[Dict]:
     
     return formatted_positions
 
-def get_position_alerts(positions: List[Dict], threshold_ratio=0.15) -> List[str]:
+def get_position_alerts(positions: List[Dict]) -> List[str]:
     """
-    Generate alerts for significant position imbalances
+    Generate alerts for significant position imbalances from the process-wide alert rules
     """
-    alerts = []
-    
-    for pos in positions:
-        if pos['ratio_diff'] > threshold_ratio:
-            side = pos['side']
-            symbol = pos['symbol']
-            ratio = pos['ratio_diff'] * 100
-            amount = pos['amount_usd']
-            
-            alert = f"🚨 Strong {side} bias detected in {symbol}: {ratio:.1f}% imbalance, ~${amount:,} position"
-            alerts.append(alert)
-    
-    return alerts
+    return get_alert_engine().evaluate_many(position_event(pos) for pos in positions)
 
 if __name__ == "__main__":
     # Test whale positions tracking
@@ -0,0 +1,259 @@
+"""
+Rolling-window statistics over the whale transaction stream.
+
+Transactions are summed into fixed time buckets. Every window (1h, 24h, 7d)
+keeps running totals that are updated when a transaction is recorded and
+when a bucket slides out of the window, so recording is O(1) amortized and
+reading a window is constant time regardless of how many events it holds.
+The largest transaction per window comes from a max-heap of bucket maxima
+with lazy expiry; the heap is rebuilt from the live buckets whenever it grows
+past twice the window's bucket count, so its size stays bounded.
+"""
+
+import heapq
+import logging
+import threading
+from typing import Dict, Optional
+
+from backend.simulator import get_simulator
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BUCKET_SECONDS = 60
+WINDOWS = {
+    '1h': 3600,
+    '24h': 24 * 3600,
+    '7d': 7 * 24 * 3600
+}
+
+BUY_TYPES = ('buy', 'long')
+SELL_TYPES = ('sell', 'short')
+
+class _Totals:
+    """Sums shared by a bucket and a window"""
+
+    __slots__ = ('count', 'volume', 'buy_volume', 'sell_volume',
+                 'token_count', 'token_volume', 'exchange_volume')
+
+    def __init__(self):
+        self.count = 0
+        self.volume = 0.0
+        self.buy_volume = 0.0
+        self.sell_volume = 0.0
+        self.token_count: Dict[str, int] = {}
+        self.token_volume: Dict[str, float] = {}
+        self.exchange_volume: Dict[str, float] = {}
+
+    def add(self, token: str, side: int, usd_value: float, exchange: str, sign: int = 1):
+        """Count one transaction in (sign 1) or out of (sign -1) the totals"""
+        usd_value *= sign
+        self.count += sign
+        self.volume += usd_value
+        if side > 0:
+            self.buy_volume += usd_value
+        elif side < 0:
+            self.sell_volume += usd_value
+        self.token_count[token] = self.token_count.get(token, 0) + sign
+        self.token_volume[token] = self.token_volume.get(token, 0.0) + usd_value
+        self.exchange_volume[exchange] = self.exchange_volume.get(exchange, 0.0) + usd_value
+
+    def subtract(self, other: '_Totals'):
+        self.count -= other.count
+        self.volume -= other.volume
+        self.buy_volume -= other.buy_volume
+        self.sell_volume -= other.sell_volume
+        for key, value in other.token_count.items():
+            self.token_count[key] -= value
+        for key, value in other.token_volume.items():
+            self.token_volume[key] -= value
+        for key, value in other.exchange_volume.items():
+            self.exchange_volume[key] -= value
+
+class _Bucket(_Totals):
+    __slots__ = ('max_usd', 'max_seq', 'max_token')
+
+    def __init__(self):
+        super().__init__()
+        self.max_usd = 0.0
+        self.max_seq = 0
+        self.max_token = ''
+
+class _Window(_Totals):
+    __slots__ = ('buckets', 'oldest', 'heap')
+
+    def __init__(self, buckets: int):
+        super().__init__()
+        self.buckets = buckets
+        self.oldest: Optional[int] = None   # oldest bucket id still inside the window
+        self.heap = []                      # (-usd, bucket_id, seq, token) max-heap
+
+class RollingWhaleStats:
+    """Incremental 1h/24h/7d aggregates of whale transactions"""
+
+    def __init__(self, windows: Dict[str, int] = WINDOWS, bucket_seconds: int = BUCKET_SECONDS,
+                 clock=None):
+        self.bucket_seconds = bucket_seconds
+        self._clock = clock
+        self._windows = {
+            name: _Window(max(1, seconds // bucket_seconds)) for name, seconds in windows.items()
+        }
+        self._span = max(window.buckets for window in self._windows.values())
+        self._buckets: Dict[int, _Bucket] = {}
+        self._head: Optional[int] = None    # newest bucket id
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    @property
+    def clock(self):
+        return self._clock or get_simulator().clock
+
+    def _advance(self, bucket_id: int):
+        """Slide every window forward so that bucket_id is the newest bucket"""
+        if self._head is not None and bucket_id <= self._head:
+            return
+
+        for window in self._windows.values():
+            new_oldest = bucket_id - window.buckets + 1
+            if window.oldest is None or new_oldest - window.oldest >= window.buckets:
+                # Everything in the window expired at once
+                window.__init__(window.buckets)
+            else:
+                for expired in range(window.oldest, new_oldest):
+                    bucket = self._buckets.get(expired)
+                    if bucket is not None:
+                        window.subtract(bucket)
+            window.oldest = new_oldest
+
+        # Drop buckets that left the longest window
+        new_min = bucket_id - self._span + 1
+        if self._head is None or new_min - (self._head - self._span + 1) >= self._span:
+            self._buckets = {k: v for k, v in self._buckets.items() if k >= new_min}
+        else:
+            for expired in range(self._head - self._span + 1, new_min):
+                self._buckets.pop(expired, None)
+        self._head = bucket_id
+
+    def record(self, token: str, tx_type: str, usd_value: float, exchange: str,
+               timestamp: Optional[float] = None) -> float:
+        """Add one transaction; late events still count in the windows that cover them. Returns its timestamp."""
+        timestamp = timestamp if timestamp is not None else self.clock.now()
+        self._apply(token, tx_type, usd_value, exchange, timestamp, 1)
+        return timestamp
+
+    def retract(self, token: str, tx_type: str, usd_value: float, exchange: str, timestamp: float):
+        """
+        Take back a recorded transaction (e.g. a transfer undone by a chain
+        reorg); pass the timestamp record() returned. Totals are corrected, a
+        window's largest transaction is not.
+        """
+        self._apply(token, tx_type, usd_value, exchange, timestamp, -1)
+
+    def _apply(self, token: str, tx_type: str, usd_value: float, exchange: str, timestamp: float, sign: int):
+        bucket_id = int(timestamp // self.bucket_seconds)
+        kind = tx_type.lower()
+        side = 1 if kind in BUY_TYPES else -1 if kind in SELL_TYPES else 0
+
+        with self._lock:
+            self._advance(bucket_id)
+            if bucket_id <= self._head - self._span:
+                return
+
+            bucket = self._buckets.get(bucket_id)
+            if bucket is None:
+                if sign < 0:
+                    return
+                bucket = self._buckets[bucket_id] = _Bucket()
+            bucket.add(token, side, usd_value, exchange, sign)
+
+            # Only a new bucket maximum can become a window maximum
+            new_max = sign > 0 and usd_value > bucket.max_usd
+            if new_max:
+                self._seq += 1
+                bucket.max_usd, bucket.max_seq, bucket.max_token = usd_value, self._seq, token
+
+            for window in self._windows.values():
+                if bucket_id < window.oldest:
+                    continue
+                window.add(token, side, usd_value, exchange, sign)
+                if new_max:
+                    heapq.heappush(window.heap, (-usd_value, bucket_id, self._seq, token))
+                    # Superseded bucket maxima are never at the top; drop them in bulk
+                    if len(window.heap) > 2 * window.buckets:
+                        self._rebuild_heap(window)
+
+    def _rebuild_heap(self, window: _Window):
+        """Reset a window's heap to one entry per live bucket (amortized O(1) per push)"""
+        window.heap = []
+        for bucket_id in range(window.oldest, self._head + 1):
+            bucket = self._buckets.get(bucket_id)
+            if bucket is not None and bucket.max_seq:
+                window.heap.append((-bucket.max_usd, bucket_id, bucket.max_seq, bucket.max_token))
+        heapq.heapify(window.heap)
+
+    def get(self, window: str = '24h') -> Dict:
+        """Aggregates for one window (constant time)"""
+        with self._lock:
+            self._advance(int(self.clock.now() // self.bucket_seconds))
+            totals = self._windows[window]
+
+            heap = totals.heap
+            while heap and heap[0][1] < totals.oldest:
+                heapq.heappop(heap)
+            largest = {'usd_value': -heap[0][0], 'token': heap[0][3]} if heap else None
+
+            return {
+                'window': window,
+                'count': totals.count,
+                'volume_usd': totals.volume,
+                'buy_volume_usd': totals.buy_volume,
+                'sell_volume_usd': totals.sell_volume,
+                'token_count': {k: v for k, v in totals.token_count.items() if v},
+                'token_volume_usd': {k: v for k, v in totals.token_volume.items() if totals.token_count.get(k)},
+                'exchange_volume_usd': {k: v for k, v in totals.exchange_volume.items() if v > 1e-9},
+                'largest': largest
+            }
+
+# Process-wide aggregator of real whale transactions: only the on-chain transfer
+# stream records here, never simulated transactions or exchange trades
+WHALE_STATS = RollingWhaleStats()
+
+def record_whale_transaction(token: str, tx_type: str, usd_value: float, exchange: str,
+                             timestamp: Optional[float] = None) -> float:
+    """Feed one transaction into the process-wide statistics; returns its timestamp"""
+    return WHALE_STATS.record(token, tx_type, usd_value, exchange, timestamp)
+
+def retract_whale_transaction(token: str, tx_type: str, usd_value: float, exchange: str, timestamp: float):
+    """Remove a transaction recorded with record_whale_transaction() from the statistics"""
+    WHALE_STATS.retract(token, tx_type, usd_value, exchange, timestamp)
+
+if __name__ == "__main__":
+    import time
+    from backend.simulator import MarketSimulator, SimulatedClock
+
+    # Benchmark: a week of events at 50/s, then query every window
+    sim = MarketSimulator(seed=1, clock=SimulatedClock())
+    stats = RollingWhaleStats(clock=sim.clock)
+    tokens = ['BTC', 'ETH', 'SOL', 'BNB', 'ADA', 'DOT']
+    exchanges = ['Binance', 'Coinbase', 'Kraken', 'OKX', 'Bybit', 'Huobi']
+    rng = sim.random
+
+    events = 7 * 24 * 3600 * 50 // 10
+    start = time.perf_counter()
+    for _ in range(events):
+        sim.clock.advance(0.2)
+        stats.record(rng.choice(tokens), rng.choice(['Buy', 'Sell', 'Transfer']),
+                     rng.paretovariate(1.5) * 100_000, rng.choice(exchanges))
+    elapsed = time.perf_counter() - start
+    print(f"Recorded {events:,} events in {elapsed:.2f}s ({events / elapsed:,.0f} events/sec)")
+    print("Heap entries: " + ", ".join(f"{name} {len(window.heap):,}/{2 * window.buckets:,} max"
+                                       for name, window in stats._windows.items()))
+
+    for name in WINDOWS:
+        start = time.perf_counter()
+        for _ in range(10_000):
+            result = stats.get(name)
+        per_query = (time.perf_counter() - start) / 10_000 * 1e6
+        print(f"{name:>4}: {result['count']:>9,} tx  ${result['volume_usd'] / 1e9:,.2f}B  "
+              f"largest ${result['largest']['usd_value'] / 1e6:,.1f}M {result['largest']['token']}  "
+              f"query {per_query:.1f}us")
@@ -0,0 +1,353 @@
+"""
+Live on-chain whale transfers from an Alchemy (Ethereum JSON-RPC) WebSocket.
+
+Subscribes to ERC-20 Transfer logs of the tracked token contracts (and
+optionally to pending transactions), decodes them, values them with the
+latest cached prices and keeps the large ones in a bounded buffer that the
+dashboard reads via get_recent_transfers().
+
+A transfer seen in the mempool is published once; its mined log only
+confirms it. When a reorg removes a mined log (removed: true), whatever it
+published is retracted: a "reorg" row goes to the feed and its value leaves
+the rolling statistics.
+"""
+
+import json
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from websockets.asyncio.client import connect
+from websockets.exceptions import WebSocketException
+
+from backend.event_buffer import WHALE_EVENTS, EventRingBuffer
+from backend.price_feed import get_token_price
+from backend.whale_stats import record_whale_transaction, retract_whale_transaction
+from backend.whale_tracker import format_usd_value, get_transaction_impact
+from backend.alert_rules import publish_alerts, whale_event
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# keccak256("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+# transfer(address,uint256) selector, for pending transactions
+TRANSFER_SELECTOR = "0xa9059cbb"
+
+# ERC-20 contracts on Ethereum mainnet mapped to the dashboard tokens
+TRACKED_TOKENS = {
+    "0x2260fac5e5542a773aa44fbcfedf7c193bc2c599": {'symbol': 'BTC', 'decimals': 8},    # WBTC
+    "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2": {'symbol': 'ETH', 'decimals': 18},   # WETH
+    "0xb8c77482e45f1f44de1745f52c74426c631bdd52": {'symbol': 'BNB', 'decimals': 18},   # BNB (ERC-20)
+}
+
+MIN_TRANSFER_USD = 1_000_000
+QUEUE_SIZE = 10_000        # raw notifications waiting to be decoded
+MAX_RECONNECT_DELAY = 60   # seconds
+SEEN_TX_LIMIT = 50_000     # pending/mined de-duplication window
+BACKFILL_BLOCKS = 100      # block range per eth_getLogs call when resuming
+
+# Shared ring buffer read by every dashboard session
+WHALE_TRANSFERS = WHALE_EVENTS
+
+def is_stream_configured(url: Optional[str]) -> bool:
+    """True if the URL looks like a real WebSocket endpoint (not the config placeholder)"""
+    return bool(url) and url.startswith(("ws://", "wss://"))
+
+def _short(value: str, head: int = 6, tail: int = 4) -> str:
+    return f"{value[:head]}...{value[-tail:]}"
+
+def decode_transfer_log(log: Dict) -> Optional[Dict]:
+    """
+    Decode an ERC-20 Transfer log of a tracked token into a raw transfer dict
+    """
+    token = TRACKED_TOKENS.get(log.get('address', '').lower())
+    topics = log.get('topics', [])
+    if token is None or len(topics) != 3 or topics[0] != TRANSFER_TOPIC:
+        return None
+
+    return {
+        'token': token['symbol'],
+        'from': "0x" + topics[1][-40:],
+        'to': "0x" + topics[2][-40:],
+        'amount': int(log['data'], 16) / 10 ** token['decimals'],
+        'block': int(log['blockNumber'], 16) if log.get('blockNumber') else None,
+        'tx_hash': log['transactionHash'],
+        'log_index': int(log.get('logIndex', '0x0'), 16),
+        'removed': log.get('removed', False)
+    }
+
+def decode_pending_transaction(tx: Dict) -> Optional[Dict]:
+    """
+    Decode a pending transfer(address,uint256) call to a tracked token contract
+    """
+    token = TRACKED_TOKENS.get((tx.get('to') or '').lower())
+    data = tx.get('input', '')
+    if token is None or not data.startswith(TRANSFER_SELECTOR) or len(data) < 138:
+        return None
+
+    return {
+        'token': token['symbol'],
+        'from': tx['from'],
+        'to': "0x" + data[34:74],
+        'amount': int(data[74:138], 16) / 10 ** token['decimals'],
+        'block': None,
+        'tx_hash': tx['hash'],
+        'log_index': None,
+        'removed': False
+    }
+
+def format_transfer(transfer: Dict, usd_value: float, retracted: bool = False) -> Dict:
+    """Format a decoded transfer with the same columns as the whale transaction table"""
+    amount = transfer['amount']
+    if retracted:
+        kind = 'Transfer (reorg, batal)'
+    else:
+        kind = 'Transfer' if transfer['block'] is not None else 'Transfer (pending)'
+    return {
+        'Waktu': datetime.now().strftime('%H:%M:%S'),
+        'Tipe': kind,
+        'Token': transfer['token'],
+        'Jumlah': f"{amount:,.2f}",
+        'Nilai USD': format_usd_value(usd_value),
+        'Impact': get_transaction_impact(transfer['token'], 'Transfer', amount),
+        'Exchange': 'On-chain',
+        'Wallet': _short(transfer['from']),
+        'Hash': _short(transfer['tx_hash'], 10)
+    }
+
+def get_recent_transfers(count: int = 15) -> List[Dict]:
+    """Most recent large transfers, newest last"""
+    return WHALE_TRANSFERS.latest(count)
+
+class WhaleTransferStream:
+    """
+    Reconnecting JSON-RPC WebSocket consumer for large ERC-20 transfers.
+
+    Notifications go through a bounded asyncio queue: when decoding falls
+    behind, the reader stops pulling frames and the socket applies TCP
+    backpressure instead of buffering without limit. After a reconnect the
+    gap since the last seen block is backfilled with eth_getLogs.
+    """
+
+    def __init__(self, url: str, min_usd: float = MIN_TRANSFER_USD,
+                 buffer: EventRingBuffer = WHALE_TRANSFERS, include_pending: bool = False,
+                 queue_size: int = QUEUE_SIZE, reconnect_delay: float = 1):
+        self.url = url
+        self.min_usd = min_usd
+        self.buffer = buffer
+        self.include_pending = include_pending
+        self.queue_size = queue_size
+        self.reconnect_delay = reconnect_delay
+        self.last_block: Optional[int] = None   # resume point after a reconnect
+        self.head_block: Optional[int] = None   # highest block seen so far
+        self._synced = False
+        self.stats = {'received': 0, 'decoded': 0, 'pushed': 0, 'filtered': 0,
+                      'duplicates': 0, 'confirmed': 0, 'retracted': 0, 'reconnects': 0}
+        # tx_hash (pending) or (tx_hash, log_index) (mined) -> {'published': (usd, timestamp) or None, 'mined'}
+        self._seen_tx = OrderedDict()
+        self._request_id = 0
+        self._stopping = False
+
+    def _log_filter(self) -> Dict:
+        return {'address': list(TRACKED_TOKENS), 'topics': [TRANSFER_TOPIC]}
+
+    async def _call(self, ws, method: str, params: List, queue: asyncio.Queue):
+        """Send a JSON-RPC request and wait for its response, queueing notifications meanwhile"""
+        self._request_id += 1
+        request_id = self._request_id
+        await ws.send(json.dumps({'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params}))
+
+        async for raw in ws:
+            message = json.loads(raw)
+            if message.get('id') == request_id:
+                if 'error' in message:
+                    raise RuntimeError(f"{method} failed: {message['error']}")
+                return message.get('result')
+            if message.get('method') == 'eth_subscription':
+                await queue.put(message['params']['result'])
+        raise ConnectionError("Connection closed while waiting for response")
+
+    async def _backfill(self, ws, queue: asyncio.Queue):
+        """Replay logs mined while we were disconnected, in provider-sized block ranges"""
+        if self.last_block is None:
+            return
+        head = int(await self._call(ws, 'eth_blockNumber', [], queue), 16)
+        logger.info(f"Backfilling transfer logs from block {self.last_block} to {head}")
+
+        from_block = self.last_block
+        while from_block <= head:
+            to_block = min(from_block + BACKFILL_BLOCKS - 1, head)
+            params = [dict(self._log_filter(), fromBlock=hex(from_block), toBlock=hex(to_block))]
+            for log in await self._call(ws, 'eth_getLogs', params, queue):
+                await queue.put(log)
+            from_block = to_block + 1
+
+    def _handle(self, item: Dict):
+        self.stats['received'] += 1
+        if 'topics' in item:
+            transfer = decode_transfer_log(item)
+        else:
+            transfer = decode_pending_transaction(item)
+        if transfer is None:
+            return
+        self.stats['decoded'] += 1
+        if transfer['removed']:
+            self._retract(transfer)
+            return
+
+        # A pending transaction has no log index yet, so it is known by its hash alone
+        tx_hash = transfer['tx_hash']
+        mined = transfer['block'] is not None
+        key = (tx_hash, transfer['log_index']) if mined else tx_hash
+        if key in self._seen_tx:
+            self.stats['duplicates'] += 1
+            return
+
+        if mined:
+            self.head_block = max(self.head_block or 0, transfer['block'])
+            # Don't move the resume point past a gap that hasn't been backfilled yet
+            if self._synced:
+                self.last_block = self.head_block
+
+            pending = self._seen_tx.get(tx_hash)
+            if pending is not None and not pending['mined']:
+                # Already handled from the mempool; the mined log only confirms it
+                pending['mined'] = True
+                self._remember(key, pending['published'])
+                self.stats['confirmed'] += 1
+                return
+
+        usd_value = transfer['amount'] * get_token_price(transfer['token'])
+        if usd_value < self.min_usd:
+            self._remember(key, None)
+            self.stats['filtered'] += 1
+            return
+
+        timestamp = record_whale_transaction(transfer['token'], 'Transfer', usd_value, 'On-chain')
+        self.buffer.append(format_transfer(transfer, usd_value))
+        self._remember(key, (usd_value, timestamp))
+        self.stats['pushed'] += 1
+        publish_alerts(whale_event(transfer['token'], 'Transfer', usd_value, {'exchange': 'On-chain'}))
+
+    def _remember(self, key, published):
+        self._seen_tx[key] = {'published': published, 'mined': False}
+        if len(self._seen_tx) > SEEN_TX_LIMIT:
+            self._seen_tx.popitem(last=False)
+
+    def _retract(self, transfer: Dict):
+        """A reorg dropped a mined log: take back what it published, so a re-mined copy counts again"""
+        entry = self._seen_tx.pop((transfer['tx_hash'], transfer['log_index']), None)
+        if entry is None:
+            return
+        self._seen_tx.pop(transfer['tx_hash'], None)
+        self.stats['retracted'] += 1
+        if entry['published'] is None:
+            return
+
+        usd_value, timestamp = entry['published']
+        retract_whale_transaction(transfer['token'], 'Transfer', usd_value, 'On-chain', timestamp)
+        self.buffer.append(format_transfer(transfer, usd_value, retracted=True))
+
+    async def _process(self, queue: asyncio.Queue):
+        while True:
+            item = await queue.get()
+            try:
+                self._handle(item)
+            except (KeyError, ValueError) as e:
+                logger.warning(f"Error decoding transfer: {e}")
+            finally:
+                queue.task_done()
+
+    async def _consume(self, queue: asyncio.Queue):
+        self._synced = False
+        async with connect(self.url, ping_interval=20, max_queue=64, max_size=2 ** 24) as ws:
+            await self._call(ws, 'eth_subscribe', ['logs', self._log_filter()], queue)
+            if self.include_pending:
+                await self._call(ws, 'eth_subscribe', [
+                    'alchemy_pendingTransactions',
+                    {'toAddress': list(TRACKED_TOKENS), 'hashesOnly': False}
+                ], queue)
+            await self._backfill(ws, queue)
+            self._synced = True
+            logger.info(f"Subscribed to whale transfers (resume from block {self.last_block})")
+
+            async for raw in ws:
+                message = json.loads(raw)
+                if message.get('method') == 'eth_subscription':
+                    # Blocks while the queue is full -> backpressure on the socket
+                    await queue.put(message['params']['result'])
+
+    async def run(self):
+        """Consume the stream until stop() is called, reconnecting on errors"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        processor = asyncio.create_task(self._process(queue))
+        delay = self.reconnect_delay
+        try:
+            while not self._stopping:
+                started = time.monotonic()
+                try:
+                    await self._consume(queue)
+                except (OSError, WebSocketException, RuntimeError, ConnectionError) as e:
+                    logger.warning(f"Whale stream disconnected: {e}")
+                if self._stopping:
+                    break
+
+                # Reset the backoff after a connection that stayed up for a while
+                if time.monotonic() - started > MAX_RECONNECT_DELAY:
+                    delay = self.reconnect_delay
+                self.stats['reconnects'] += 1
+                logger.info(f"Reconnecting whale stream in {delay}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+            await queue.join()
+        finally:
+            processor.cancel()
+            await asyncio.gather(processor, return_exceptions=True)
+
+    def stop(self):
+        self._stopping = True
+
+_STREAM_LOCK = threading.Lock()
+_STREAM_THREAD: Optional[threading.Thread] = None
+
+def start_whale_stream(url: Optional[str] = None) -> bool:
+    """
+    Start the stream once per process in a background thread. Returns True if running.
+    """
+    global _STREAM_THREAD
+
+    if url is None:
+        from config import ALCHEMY_WEBSOCKET_URL
+        url = ALCHEMY_WEBSOCKET_URL
+
+    if not is_stream_configured(url):
+        return False
+
+    with _STREAM_LOCK:
+        if _STREAM_THREAD is None or not _STREAM_THREAD.is_alive():
+            stream = WhaleTransferStream(url)
+            _STREAM_THREAD = threading.Thread(
+                target=lambda: asyncio.run(stream.run()),
+                name="whale-stream",
+                daemon=True
+            )
+            _STREAM_THREAD.start()
+            logger.info("Whale transfer stream started")
+    return True
+
+if __name__ == "__main__":
+    from config import ALCHEMY_WEBSOCKET_URL
+
+    if not is_stream_configured(ALCHEMY_WEBSOCKET_URL):
+        print("ALCHEMY_WEBSOCKET_URL is not configured; try backend/ws_replay_server.py instead")
+    else:
+        stream = WhaleTransferStream(ALCHEMY_WEBSOCKET_URL, min_usd=100_000)
+        try:
+            asyncio.run(stream.run())
+        except KeyboardInterrupt:
+            print(f"Stopped: {stream.stats}")
@@ -1,9 +1,17 @@
-import random
+import time
+import threading
+from collections.abc import Sequence
 from datetime import datetime, timedelta
-import secrets
 import logging
 from typing import Dict, Optional, List
 
+import numpy as np
+
+from backend.event_buffer import WHALE_EVENTS, EventRingBuffer
+from backend.price_feed import get_token_price, value_amounts
+from backend.simulator import get_simulator
+from backend.whale_stats import WHALE_STATS
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -18,36 +26,51 @@ WHALE_TEMPLATES = [
     }
 ]
 
+# Amount range (in coins) per token, shared by the single and batch generators
+TOKEN_AMOUNT_RANGES = {
+    'BTC': (50, 2000),
+    'ETH': (200, 5000),
+    'SOL': (500, 10000),
+    'BNB': (500, 10000),
+    'ADA': (1000, 50000),
+    'DOT': (1000, 50000)
+}
+
+# Token amount above which a transaction gets an impact label, highest first
+IMPACT_THRESHOLDS = [
+    (5000, "🔴 High Impact"),
+    (1000, "🟡 Medium Impact")
+]
+
+def _token_hex(nbytes: int) -> str:
+    """Random hex string drawn from the shared simulator (reproducible when seeded)"""
+    return f"{get_simulator().random.getrandbits(nbytes * 8):0{nbytes * 2}x}"
+
 def generate_realistic_whale_address(token: str) -> str:
     """Generate realistic-looking wallet addresses for different tokens"""
     if token in ['BTC']:
         # Bitcoin address format
-        return f"bc1{secrets.token_hex(15)}...{secrets.token_hex(4)}"
+        return f"bc1{_token_hex(15)}...{_token_hex(4)}"
     elif token in ['ETH', 'BNB']:
         # Ethereum-style address
-        return f"0x{secrets.token_hex(4)}...{secrets.token_hex(4)}"
+        return f"0x{_token_hex(4)}...{_token_hex(4)}"
     elif token == 'SOL':
         # Solana address format
-        return f"{secrets.token_hex(6)}...{secrets.token_hex(4)}"
+        return f"{_token_hex(6)}...{_token_hex(4)}"
     else:
         # Generic format
-        return f"0x{secrets.token_hex(4)}...{secrets.token_hex(4)}"
+        return f"0x{_token_hex(4)}...{_token_hex(4)}"
+
+def get_transaction_usd(token: str, amount: float) -> float:
+    """Approximate USD value of a transaction from the live price snapshot"""
+    return amount * get_token_price(token)
 
 def calculate_transaction_value(token: str, amount: int) -> str:
     """Calculate approximate USD value based on current market prices"""
-    # Approximate prices (in production, get from price_feed)
-    token_prices = {
-        'BTC': 104906,
-        'ETH': 2526,
-        'SOL': 145,
-        'BNB': 692,
-        'ADA': 1.23,
-        'DOT': 7.89
-    }
-    
-    price = token_prices.get(token, 100)
-    total_value = amount * price
-    
+    return format_usd_value(get_transaction_usd(token, amount))
+
+def format_usd_value(total_value: float) -> str:
+    """Format a USD amount as $1.2M / $3.4K / $5.67"""
     if total_value >= 1_000_000:
         return f"${total_value/1_000_000:.1f}M"
     elif total_value >= 1_000:
@@ -57,12 +80,10 @@ def calculate_transaction_value(token: str, amount: int) -> str:
 
 def get_transaction_impact(token: str, transaction_type: str, amount: int) -> str:
     """Determine market impact level"""
-    if amount > 5000:
-        return "🔴 High Impact"
-    elif amount > 1000:
-        return "🟡 Medium Impact"
-    else:
-        return "🟢 Low Impact"
+    for threshold, label in IMPACT_THRESHOLDS:
+        if amount > threshold:
+            return label
+    return "🟢 Low Impact"
 
 def get_fake_whale_tx() -> Optional[Dict]:
     """Generate realistic whale transaction data"""
@@ -70,21 +91,16 @@ def get_fake_whale_tx() -> Optional[Dict]:
     
     try:
         template = WHALE_TEMPLATES[0]
+        sim = get_simulator()
+        rng = sim.random
         
         # Select random parameters
-        token = random.choice(template['tokens'])
-        tx_type = random.choice(template['types'])
-        exchange = random.choice(template['exchanges'])
+        token = rng.choice(template['tokens'])
+        tx_type = rng.choice(template['types'])
+        exchange = rng.choice(template['exchanges'])
         
         # Generate amount based on token (different ranges for different tokens)
-        if token == 'BTC':
-            amount = random.randint(50, 2000)
-        elif token == 'ETH':
-            amount = random.randint(200, 5000)
-        elif token in ['SOL', 'BNB']:
-            amount = random.randint(500, 10000)
-        else:
-            amount = random.randint(1000, 50000)
+        amount = rng.randint(*TOKEN_AMOUNT_RANGES.get(token, (1000, 50000)))
         
         # Generate transaction details
         wallet_address = generate_realistic_whale_address(token)
@@ -92,8 +108,8 @@ def get_fake_whale_tx() -> Optional[Dict]:
         impact = get_transaction_impact(token, tx_type, amount)
         
         # Add some randomness to timing
-        time_offset = random.randint(0, 300)  # Up to 5 minutes ago
-        tx_time = (datetime.now() - timedelta(seconds=time_offset)).strftime('%H:%M:%S')
+        time_offset = rng.randint(0, 300)  # Up to 5 minutes ago
+        tx_time = (sim.now() - timedelta(seconds=time_offset)).strftime('%H:%M:%S')
         
         transaction = {
             'Waktu': tx_time,
@@ -104,7 +120,7 @@ def get_fake_whale_tx() -> Optional[Dict]:
             'Impact': impact,
             'Exchange': exchange,
             'Wallet': wallet_address,
-            'Hash': f"0x{secrets.token_hex(8)}...{secrets.token_hex(4)}"
+            'Hash': f"0x{_token_hex(8)}...{_token_hex(4)}"
         }
         
         logger.info(f"Generated whale transaction: {token} {tx_type} for {tx_value}")
@@ -114,60 +130,187 @@ def get_fake_whale_tx() -> Optional[Dict]:
         logger.error(f"Error generating whale transaction: {str(e)}")
         return None
 
-def get_whale_statistics() -> Dict:
-    """Get whale transaction statistics for the dashboard"""
+# Seconds between simulated whale transactions, shared by all sessions
+WHALE_TX_INTERVAL = (15, 45)
+EXPECTED_WHALE_TX_INTERVAL = sum(WHALE_TX_INTERVAL) / 2
+_WHALE_FEED = {'next_due': 0.0}
+_WHALE_FEED_LOCK = threading.Lock()
+
+def publish_fake_whale_tx(buffer: EventRingBuffer = WHALE_EVENTS) -> Optional[int]:
+    """
+    Push a simulated whale transaction into the shared buffer when one is due.
+
+    Safe to call on every dashboard rerun: one transaction is generated per
+    interval for the whole process, however many sessions call it.
+    Returns the new sequence number, or None if nothing was due.
+    """
+    sim = get_simulator()
+    with _WHALE_FEED_LOCK:
+        now = sim.clock.now()
+        if now < _WHALE_FEED['next_due']:
+            return None
+        tx = get_fake_whale_tx()
+        if not tx:
+            return None
+        _WHALE_FEED['next_due'] = now + sim.random.uniform(*WHALE_TX_INTERVAL)
+        seq = buffer.push(tx, now)
+
+    from backend.alert_rules import publish_alerts
+    publish_alerts(whale_tx_event(tx))
+    return seq
+
+def seconds_until_next_whale_tx() -> float:
+    """Seconds until publish_fake_whale_tx() will generate the next transaction"""
+    return max(0.0, _WHALE_FEED['next_due'] - get_simulator().clock.now())
+
+def get_whale_statistics(window: str = '24h') -> Dict:
+    """Get whale transaction statistics for the dashboard from the rolling-window aggregates (on-chain transfers only)"""
     try:
+        stats = WHALE_STATS.get(window)
+        largest = stats['largest']
+        token_count = stats['token_count']
+        buy_volume, sell_volume = stats['buy_volume_usd'], stats['sell_volume_usd']
+
+        if buy_volume > sell_volume * 1.1:
+            sentiment = 'Bullish'
+        elif sell_volume > buy_volume * 1.1:
+            sentiment = 'Bearish'
+        else:
+            sentiment = 'Neutral'
+
         return {
-            'total_transactions_24h': random.randint(150, 300),
-            'total_volume_24h': f"${random.randint(500, 1200)}M",
-            'largest_transaction': f"${random.randint(50, 200)}M BTC",
-            'most_active_token': random.choice(['BTC', 'ETH', 'SOL']),
-            'whale_sentiment': random.choice(['Bullish', 'Bearish', 'Neutral'])
+            f'total_transactions_{window}': stats['count'],
+            f'total_volume_{window}': format_usd_value(stats['volume_usd']),
+            'largest_transaction': f"{format_usd_value(largest['usd_value'])} {largest['token']}" if largest else "N/A",
+            'most_active_token': max(token_count, key=token_count.get) if token_count else "N/A",
+            'whale_sentiment': sentiment
         }
     except Exception as e:
         logger.error(f"Error getting whale statistics: {str(e)}")
         return {}
 
-def generate_whale_alert(transaction: Dict) -> str:
-    """Generate whale alert message"""
+def whale_tx_event(transaction: Dict) -> Dict:
+    """Alert rule event for a whale transaction row, valued against the price snapshot"""
+    from backend.alert_rules import whale_event
+    token = transaction['Token']
+    amount = float(str(transaction['Jumlah']).replace(',', ''))
+    return whale_event(token, transaction['Tipe'], get_transaction_usd(token, amount),
+                       {'exchange': transaction['Exchange']})
+
+def generate_whale_alert(transaction: Dict) -> Optional[str]:
+    """Whale alert message from the process-wide alert rules, None if no rule matches"""
+    from backend.alert_rules import get_alert_engine
     try:
-        token = transaction['Token']
-        tx_type = transaction['Tipe']
-        amount = transaction['Jumlah']
-        value = transaction['Nilai USD']
-        exchange = transaction['Exchange']
-        
-        alerts = [
-            f"🚨 WHALE ALERT: Large {tx_type.lower()} detected! {amount} {token} ({value}) on {exchange}",
-            f"🐋 Big Move: {amount} {token} worth {value} just {tx_type.lower()}ed on {exchange}",
-            f"📈 Whale Activity: {value} {token} {tx_type.lower()} transaction spotted on {exchange}",
-        ]
-        
-        return random.choice(alerts)
-        
-    except Exception as e:
+        alerts = get_alert_engine().evaluate(whale_tx_event(transaction))
+    except (KeyError, ValueError) as e:
         logger.error(f"Error generating whale alert: {str(e)}")
-        return "🚨 Whale transaction detected!"
+        return None
+    return alerts[0] if alerts else None
+
+def generate_whale_batch(n: int, start_time: float = None, end_time: float = None,
+                         rng: np.random.Generator = None) -> Dict[str, np.ndarray]:
+    """
+    Generate n whale transactions at once as columnar arrays.
+
+    token/type/exchange are integer codes into the WHALE_TEMPLATES lists,
+    usd_value comes from one vectorized multiply against the price snapshot,
+    timestamp is epoch seconds and nonce seeds the wallet/hash strings,
+    which are only built when a row is displayed.
+    """
+    sim = get_simulator()
+    rng = rng if rng is not None else sim.np_rng
+    end_time = end_time if end_time is not None else sim.clock.now()
+    start_time = start_time if start_time is not None else end_time - 300
+
+    template = WHALE_TEMPLATES[0]
+    tokens = rng.integers(0, len(template['tokens']), size=n, dtype=np.uint8)
+
+    bounds = np.array([TOKEN_AMOUNT_RANGES[token] for token in template['tokens']], dtype=np.int64)
+    amounts = rng.integers(bounds[tokens, 0], bounds[tokens, 1], endpoint=True)
+
+    return {
+        'token': tokens,
+        'type': rng.integers(0, len(template['types']), size=n, dtype=np.uint8),
+        'amount': amounts,
+        'usd_value': value_amounts(tokens, amounts, template['tokens']),
+        'timestamp': np.sort(rng.uniform(start_time, end_time, size=n)),
+        'exchange': rng.integers(0, len(template['exchanges']), size=n, dtype=np.uint8),
+        'nonce': rng.integers(0, np.iinfo(np.uint64).max, size=n, dtype=np.uint64, endpoint=True)
+    }
+
+def _address_from_nonce(token: str, nonce: int) -> str:
+    """Deterministic counterpart of generate_realistic_whale_address"""
+    digest = f"{nonce:016x}"
+    if token == 'BTC':
+        return f"bc1{digest[:12]}...{digest[-4:]}"
+    elif token == 'SOL':
+        return f"{digest[:12]}...{digest[-4:]}"
+    return f"0x{digest[:8]}...{digest[-4:]}"
+
+class WhaleTxBatch(Sequence):
+    """
+    Read-only list-of-dicts view over columnar whale data.
+
+    Rows are formatted like get_fake_whale_tx() output only when accessed,
+    so large batches stay cheap until something is displayed.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], time_format: str = '%Y-%m-%d %H:%M:%S'):
+        self.columns = columns
+        self.time_format = time_format
+
+    def __len__(self) -> int:
+        return len(self.columns['amount'])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("whale batch index out of range")
+        return self._row(index)
 
-def get_historical_whale_data(hours: int = 24) -> List[Dict]:
+    def _row(self, i: int) -> Dict:
+        template = WHALE_TEMPLATES[0]
+        cols = self.columns
+        token = template['tokens'][cols['token'][i]]
+        tx_type = template['types'][cols['type'][i]]
+        amount = int(cols['amount'][i])
+        nonce = int(cols['nonce'][i])
+        tx_hash = f"{(nonce * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF:016x}"
+
+        return {
+            'Waktu': datetime.fromtimestamp(cols['timestamp'][i]).strftime(self.time_format),
+            'Tipe': tx_type,
+            'Token': token,
+            'Jumlah': f"{amount:,}",
+            'Nilai USD': format_usd_value(cols['usd_value'][i]),
+            'Impact': get_transaction_impact(token, tx_type, amount),
+            'Exchange': template['exchanges'][cols['exchange'][i]],
+            'Wallet': _address_from_nonce(token, nonce),
+            'Hash': f"0x{tx_hash[:12]}...{tx_hash[-4:]}"
+        }
+
+def get_historical_whale_data(hours: int = 24) -> Sequence:
     """Generate historical whale transaction data for analysis"""
     logger.info(f"Generating {hours}h of historical whale data...")
     
     try:
-        historical_data = []
-        transactions_per_hour = random.randint(5, 15)
-        
-        for hour in range(hours):
-            for _ in range(random.randint(1, transactions_per_hour)):
-                # Generate timestamp for this hour
-                time_ago = datetime.now() - timedelta(hours=hour, 
-                                                    minutes=random.randint(0, 59))
-                
-                tx = get_fake_whale_tx()
-                if tx:
-                    tx['Waktu'] = time_ago.strftime('%Y-%m-%d %H:%M:%S')
-                    historical_data.append(tx)
-        
+        sim = get_simulator()
+        rng = sim.np_rng
+        transactions_per_hour = int(rng.integers(5, 16))
+        per_hour = rng.integers(1, transactions_per_hour, size=hours, endpoint=True)
+
+        # Each hour's transactions fall somewhere within that hour
+        end_time = sim.clock.now()
+        hour_start = end_time - (np.arange(hours) + 1) * 3600
+        columns = generate_whale_batch(int(per_hour.sum()), rng=rng)
+        columns['timestamp'] = np.sort(
+            np.repeat(hour_start, per_hour) + rng.uniform(0, 3600, size=int(per_hour.sum()))
+        )[::-1]
+
+        historical_data = WhaleTxBatch(columns)
         logger.info(f"Generated {len(historical_data)} historical transactions")
         return historical_data
         
@@ -195,4 +338,11 @@ if __name__ == "__main__":
     for key, value in stats.items():
         print(f"  {key}: {value}")
     
+    # Benchmark the batch generator
+    start = time.perf_counter()
+    batch = WhaleTxBatch(generate_whale_batch(1_000_000))
+    elapsed = time.perf_counter() - start
+    print(f"\nGenerated {len(batch):,} whale transactions in {elapsed:.2f}s")
+    print(f"  First row: {batch[0]}")
+
     print("\nWhale tracker test completed successfully!")
\ No newline at end of file
@@ -0,0 +1,355 @@
+"""
+Local WebSocket stand-in that replays a recorded stream.
+
+Speaks just enough Ethereum JSON-RPC (eth_subscribe, eth_blockNumber,
+eth_getLogs) to drive backend.whale_stream without an Alchemy account. It
+can drop the connection every N messages and "mine" a few blocks while the
+client is away, which exercises reconnect-with-resume.
+
+With --binance it instead serves a Binance futures combined stream
+(markPrice, aggTrade, forceOrder) at a fixed message rate to drive
+backend.binance_stream, optionally dropping or stalling the connection.
+
+    python backend/ws_replay_server.py --logs 100000 --drop-every 20000
+    python backend/ws_replay_server.py --binance --messages 100000 --rate 10000
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from typing import Dict, List, Optional
+
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.whale_stream import TRACKED_TOKENS, TRANSFER_TOPIC
+
+def synthetic_block_stream(count: int, logs_per_block: int = 50, first_block: int = 19_000_000,
+                           seed: int = 42) -> List[Dict]:
+    """
+    Build a block stream of Transfer logs shaped like eth_subscription results
+    """
+    rng = random.Random(seed)
+    contracts = list(TRACKED_TOKENS.items())
+    logs = []
+
+    for i in range(count):
+        address, token = rng.choice(contracts)
+        # Mostly small transfers with a long tail of whales
+        amount = rng.paretovariate(1.2) * 10 ** (token['decimals'] - 1)
+        logs.append({
+            'address': address,
+            'topics': [
+                TRANSFER_TOPIC,
+                "0x" + "0" * 24 + f"{rng.getrandbits(160):040x}",
+                "0x" + "0" * 24 + f"{rng.getrandbits(160):040x}",
+            ],
+            'data': f"0x{int(amount):064x}",
+            'blockNumber': hex(first_block + i // logs_per_block),
+            'transactionHash': f"0x{rng.getrandbits(256):064x}",
+            'logIndex': hex(i % logs_per_block),
+            'removed': False
+        })
+    return logs
+
+def synthetic_binance_stream(count: int, symbols: List[str], seed: int = 42) -> List[Dict]:
+    """
+    Build combined-stream messages: mostly trades and mark prices, a few liquidations
+    """
+    from backend.simulator import BASE_PRICES, symbol_to_token
+
+    rng = random.Random(seed)
+    start_ms = int(time.time() * 1000)
+    messages = []
+
+    for i in range(count):
+        symbol = rng.choice(symbols)
+        price = BASE_PRICES.get(symbol_to_token(symbol), 100) * (1 + rng.uniform(-0.002, 0.002))
+        event_time = start_ms + i
+        kind = rng.random()
+
+        if kind < 0.6:
+            quantity = rng.paretovariate(1.3) * 1000 / price
+            stream = f"{symbol.lower()}@aggTrade"
+            data = {'e': 'aggTrade', 'E': event_time, 's': symbol, 'a': i, 'p': f"{price:.4f}",
+                    'q': f"{quantity:.6f}", 'f': i, 'l': i, 'T': event_time, 'm': rng.random() < 0.5}
+        elif kind < 0.97:
+            stream = f"{symbol.lower()}@markPrice@1s"
+            data = {'e': 'markPriceUpdate', 'E': event_time, 's': symbol, 'p': f"{price:.4f}",
+                    'i': f"{price * 0.9999:.4f}", 'r': "0.00010000", 'T': event_time + 3_600_000}
+        else:
+            quantity = rng.paretovariate(1.5) * 5000 / price
+            stream = "!forceOrder@arr"
+            data = {'e': 'forceOrder', 'E': event_time, 'o': {
+                's': symbol, 'S': rng.choice(['BUY', 'SELL']), 'o': 'LIMIT', 'f': 'IOC',
+                'q': f"{quantity:.6f}", 'p': f"{price:.4f}", 'ap': f"{price:.4f}", 'X': 'FILLED',
+                'l': f"{quantity:.6f}", 'z': f"{quantity:.6f}", 'T': event_time}}
+        messages.append({'stream': stream, 'data': data})
+    return messages
+
+def load_recording(path: str) -> List[Dict]:
+    """Load a recorded stream: a JSON list or one JSON object per line"""
+    with open(path, 'r') as f:
+        if path.endswith('.jsonl'):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+class JsonRpcReplayServer:
+    """Replays recorded logs to eth_subscribe("logs") clients"""
+
+    def __init__(self, logs: List[Dict], drop_every: Optional[int] = None, gap_blocks: int = 2):
+        self.logs = logs
+        self.drop_every = drop_every
+        self.gap_blocks = gap_blocks
+        self.cursor = 0            # shared "chain head" across connections
+        self.connections = 0
+        self._server = None
+
+    @property
+    def head_block(self) -> int:
+        if self.cursor == 0:
+            return -1
+        return int(self.logs[self.cursor - 1]['blockNumber'], 16)
+
+    def _logs_between(self, from_block: int, to_block: int) -> List[Dict]:
+        return [
+            log for log in self.logs[:self.cursor]
+            if from_block <= int(log['blockNumber'], 16) <= to_block
+        ]
+
+    def _mine_gap(self):
+        """Advance the head without sending, as if blocks were mined while the client was away"""
+        if self.cursor >= len(self.logs):
+            return
+        target = int(self.logs[self.cursor]['blockNumber'], 16) + self.gap_blocks
+        while self.cursor < len(self.logs) and int(self.logs[self.cursor]['blockNumber'], 16) < target:
+            self.cursor += 1
+
+    async def _stream(self, ws, subscription: str):
+        try:
+            await self._send_logs(ws, subscription)
+        except ConnectionClosed:
+            pass
+
+    async def _send_logs(self, ws, subscription: str):
+        sent = 0
+        while self.cursor < len(self.logs):
+            log = self.logs[self.cursor]
+            self.cursor += 1
+            await ws.send(json.dumps({
+                'jsonrpc': '2.0',
+                'method': 'eth_subscription',
+                'params': {'subscription': subscription, 'result': log}
+            }))
+            sent += 1
+            # Let the connection handler answer requests in between notifications
+            await asyncio.sleep(0)
+            if self.drop_every and sent >= self.drop_every:
+                self._mine_gap()
+                await ws.close()
+                return
+
+    async def _handler(self, ws):
+        self.connections += 1
+        streamer = None
+        try:
+            async for raw in ws:
+                request = json.loads(raw)
+                method, params = request.get('method'), request.get('params', [])
+
+                if method == 'eth_subscribe':
+                    subscription = f"0x{self.connections:032x}"
+                    await ws.send(json.dumps({'jsonrpc': '2.0', 'id': request['id'], 'result': subscription}))
+                    if params and params[0] == 'logs' and streamer is None:
+                        streamer = asyncio.create_task(self._stream(ws, subscription))
+
+                elif method == 'eth_blockNumber':
+                    await ws.send(json.dumps({'jsonrpc': '2.0', 'id': request['id'], 'result': hex(self.head_block)}))
+
+                elif method == 'eth_getLogs':
+                    query = params[0]
+                    to_block = query.get('toBlock', 'latest')
+                    to_block = self.head_block if to_block == 'latest' else int(to_block, 16)
+                    result = self._logs_between(int(query['fromBlock'], 16), to_block)
+                    await ws.send(json.dumps({'jsonrpc': '2.0', 'id': request['id'], 'result': result}))
+
+                else:
+                    await ws.send(json.dumps({
+                        'jsonrpc': '2.0', 'id': request.get('id'),
+                        'error': {'code': -32601, 'message': f"Method not found: {method}"}
+                    }))
+        except ConnectionClosed:
+            pass
+        finally:
+            if streamer is not None:
+                streamer.cancel()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._server = await serve(self._handler, host, port, max_size=None)
+        host, port = list(self._server.sockets)[0].getsockname()[:2]
+        return f"ws://{host}:{port}"
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+class BinanceStreamReplayServer:
+    """
+    Sends combined-stream messages to /stream clients at `rate` messages/sec.
+    The position in the recording is shared, so after a drop the next
+    connection continues where the previous one stopped (like the live
+    stream, nothing is replayed).
+    """
+
+    def __init__(self, messages: List[Dict], rate: Optional[float] = None,
+                 drop_every: Optional[int] = None, stall_every: Optional[int] = None,
+                 stall_seconds: float = 1.0, ping_interval: float = 1.0):
+        self.frames = [json.dumps(message) for message in messages]
+        self.rate = rate
+        self.drop_every = drop_every
+        self.stall_every = stall_every
+        self.stall_seconds = stall_seconds
+        self.ping_interval = ping_interval
+        self.cursor = 0
+        self.connections = 0
+        self._server = None
+
+    async def _handler(self, ws):
+        self.connections += 1
+        if not ws.request.path.startswith("/stream"):
+            await ws.close(code=1008, reason="unknown path")
+            return
+
+        sent = 0
+        start = time.perf_counter()
+        try:
+            while self.cursor < len(self.frames):
+                # Pace to the target rate in small batches
+                if self.rate:
+                    due = int((time.perf_counter() - start) * self.rate)
+                    if sent >= due:
+                        await asyncio.sleep(0.001)
+                        continue
+                await ws.send(self.frames[self.cursor])
+                self.cursor += 1
+                sent += 1
+                if not self.rate:
+                    await asyncio.sleep(0)
+
+                if self.drop_every and sent % self.drop_every == 0:
+                    await ws.close()
+                    return
+                if self.stall_every and sent % self.stall_every == 0:
+                    # Keep the socket open but go silent, like a stale upstream
+                    await asyncio.sleep(self.stall_seconds)
+                    return
+            await ws.wait_closed()
+        except ConnectionClosed:
+            pass
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._server = await serve(self._handler, host, port, ping_interval=self.ping_interval)
+        host, port = list(self._server.sockets)[0].getsockname()[:2]
+        return f"ws://{host}:{port}"
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+async def replay_binance_stream(messages: List[Dict], symbols: List[str], rate: Optional[float],
+                                drop_every: Optional[int], stall_every: Optional[int], min_usd: float) -> Dict:
+    """Run BinanceFuturesStream against the replay server until every message has been handled"""
+    from backend.event_buffer import EventRingBuffer
+    from backend.binance_stream import BinanceFuturesStream
+
+    # A stall is detected by the client's heartbeat timeout, so stall a bit longer than it
+    heartbeat = 0.3
+    server = BinanceStreamReplayServer(messages, rate, drop_every, stall_every, stall_seconds=heartbeat * 2)
+    url = await server.start()
+    stream = BinanceFuturesStream(symbols, base_url=url, min_trade_usd=min_usd,
+                                  trades=EventRingBuffer(1000), liquidations=EventRingBuffer(1000),
+                                  mark_prices={}, heartbeat_timeout=heartbeat, reconnect_delay=0.05)
+
+    start = time.perf_counter()
+    task = asyncio.create_task(stream.run())
+    while stream.stats['received'] < len(messages):
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+
+    stream.stop()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    await server.stop()
+    return {'elapsed': elapsed, 'connections': server.connections, **stream.stats}
+
+async def replay_whale_stream(logs: List[Dict], drop_every: Optional[int], min_usd: float) -> Dict:
+    """Run WhaleTransferStream against the replay server until every log has been handled"""
+    from backend.event_buffer import EventRingBuffer
+    from backend.price_feed import get_token_price
+    from backend.whale_stream import WhaleTransferStream, decode_transfer_log
+
+    expected = 0
+    for log in logs:
+        transfer = decode_transfer_log(log)
+        if transfer['amount'] * get_token_price(transfer['token']) >= min_usd:
+            expected += 1
+
+    server = JsonRpcReplayServer(logs, drop_every=drop_every)
+    url = await server.start()
+    stream = WhaleTransferStream(url, min_usd=min_usd, buffer=EventRingBuffer(200), reconnect_delay=0.05)
+
+    start = time.perf_counter()
+    task = asyncio.create_task(stream.run())
+    while stream.stats['decoded'] - stream.stats['duplicates'] < len(logs):
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    await server.stop()
+    return {'expected': expected, 'elapsed': elapsed, 'connections': server.connections, **stream.stats}
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a recorded block stream through the whale stream consumer')
+    parser.add_argument('--logs', type=int, default=50_000, help='Synthetic Transfer logs to replay')
+    parser.add_argument('--recording', help='Replay a recorded stream (.json/.jsonl) instead')
+    parser.add_argument('--drop-every', type=int, default=None, help='Drop the connection every N messages')
+    parser.add_argument('--min-usd', type=float, default=1_000_000, help='USD threshold for whale transfers')
+    parser.add_argument('--binance', action='store_true', help='Replay a Binance futures combined stream instead')
+    parser.add_argument('--messages', type=int, default=100_000, help='Binance messages to replay')
+    parser.add_argument('--rate', type=float, default=10_000, help='Binance messages per second (0 = unpaced)')
+    parser.add_argument('--stall-every', type=int, default=None, help='Go silent every N Binance messages')
+    args = parser.parse_args()
+
+    if args.binance:
+        from backend.whale_position_binance import SYMBOLS
+
+        messages = synthetic_binance_stream(args.messages, SYMBOLS)
+        result = asyncio.run(replay_binance_stream(
+            messages, SYMBOLS, args.rate or None, args.drop_every, args.stall_every, min_usd=100_000
+        ))
+        rate = result['received'] / result['elapsed'] if result['elapsed'] else 0
+        print(f"Replayed {len(messages):,} messages over {result['connections']} connection(s) "
+              f"(reconnects {result['reconnects']}, stale {result['stale']})")
+        print(f"Mark prices {result['mark_prices']:,}  trades {result['trades']:,} "
+              f"(filtered {result['filtered']:,})  liquidations {result['liquidations']:,}  errors {result['errors']}")
+        print(f"Elapsed: {result['elapsed']:.2f}s  Throughput: {rate:,.0f} messages/sec")
+        return
+
+    logs = load_recording(args.recording) if args.recording else synthetic_block_stream(args.logs)
+    result = asyncio.run(replay_whale_stream(logs, args.drop_every, args.min_usd))
+
+    rate = len(logs) / result['elapsed'] if result['elapsed'] else 0
+    print(f"Replayed {len(logs):,} logs over {result['connections']} connection(s)")
+    print(f"Pushed {result['pushed']:,} whale transfers (expected {result['expected']:,}), "
+          f"filtered {result['filtered']:,}, reconnects {result['reconnects']}")
+    print(f"Elapsed: {result['elapsed']:.2f}s  Throughput: {rate:,.0f} messages/sec")
+
+if __name__ == "__main__":
+    main()
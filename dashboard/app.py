@@ -1,11 +1,12 @@
 import sys
 import os
 import random
+import json
+import time
 import logging
+import threading
 import streamlit as st
-import pandas as pd
 from datetime import datetime, timedelta
-from streamlit_autorefresh import st_autorefresh
 
 # Import authentication modules
 from auth import check_authentication, get_current_user
@@ -15,12 +16,20 @@ from user_settings import show_user_menu, show_settings_modal
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Import backend modules (pastikan file-file ini tersedia)
+# pandas, NumPy and the simulator (backend.simulator, backend.position_book)
+# are imported inside the modules that use them, so a session only loads
+# what its enabled modules need
+
+# Data comes from the data service (backend/data_service.py) when it is running;
+# the client falls back to the in-process backend otherwise, which only
+# ingests when LOCAL_INGESTION is set (run.py --local-ingestion)
 try:
-    from backend.price_feed import get_prices
-    from backend.news_feed import fetch_news
-    from backend.whale_tracker import get_fake_whale_tx
-    from ai.summarize import summarize
+    from backend.data_client import (get_prices, get_news_snapshot, get_whale_feed, get_liquidation_heatmap,
+                                     get_open_interest_deltas, get_cached_positions, get_source_intervals,
+                                     push_stream_url, LOCAL_INGESTION)
+    if LOCAL_INGESTION:
+        from backend.data_service import start_local_ingestion
+        start_local_ingestion()
 except ImportError as e:
     logging.warning(f"Backend modules not found: {e}")
     # Fallback functions jika backend tidak tersedia
@@ -30,25 +39,49 @@ except ImportError as e:
             'ethereum': {'usd': 2580}
         }
     
-    def fetch_news():
-        return [
-            {
-                'title': 'Bitcoin Mencapai ATH Baru',
-                'summary': 'Bitcoin berhasil menembus level $105,000 untuk pertama kalinya...',
-                'link': 'https://example.com'
-            }
-        ]
+    def get_news_snapshot():
+        return {
+            'version': 1,
+            'data': [
+                {
+                    'title': 'Bitcoin Mencapai ATH Baru',
+                    'summary': 'Bitcoin berhasil menembus level $105,000 untuk pertama kalinya...',
+                    'link': 'https://example.com'
+                }
+            ]
+        }
     
-    def get_fake_whale_tx():
+    def get_whale_feed(count=15):
+        from backend.simulator import get_simulator
         symbols = ["BTC", "ETH", "SOL", "ADA"]
         return {
-            'timestamp': datetime.now().strftime('%H:%M:%S'),
-            'symbol': random.choice(symbols),
-            'type': random.choice(['BUY', 'SELL']),
-            'amount': f"${random.randint(100000, 5000000):,}",
-            'exchange': random.choice(['Binance', 'Bybit', 'OKX'])
+            'last_seq': 1,
+            'last_timestamp': get_simulator().clock.now(),
+            'events': [{
+                'timestamp': datetime.now().strftime('%H:%M:%S'),
+                'symbol': random.choice(symbols),
+                'type': random.choice(['BUY', 'SELL']),
+                'amount': f"${random.randint(100000, 5000000):,}",
+                'exchange': random.choice(['Binance', 'Bybit', 'OKX'])
+            }],
+            'next_in': 0.0
         }
 
+    def get_liquidation_heatmap(symbol):
+        return None
+
+    def get_open_interest_deltas():
+        return {}
+
+    def get_cached_positions():
+        return None
+
+    def get_source_intervals():
+        return {}
+
+    def push_stream_url():
+        return None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -59,121 +92,11 @@ logger = logging.getLogger(__name__)
 # Whale Position Functions (sama seperti kode asli)
 SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "ADAUSDT", "BNBUSDT", "DOTUSDT", "MATICUSDT", "LINKUSDT"]
 
-def get_simulated_open_positions(min_usd=10000, count=5):
-    """Generate simulated open positions for whale tracking"""
-    positions = []
-    current_time = datetime.now()
-    
-    for i in range(count):
-        # Generate random time within last 2 hours
-        time_offset = random.randint(0, 7200)
-        position_time = current_time - timedelta(seconds=time_offset)
-        
-        # Generate position amount with realistic distribution
-        if random.random() < 0.1:
-            amount = random.randint(min_usd * 10, min_usd * 50)
-        elif random.random() < 0.3:
-            amount = random.randint(min_usd * 3, min_usd * 10)
-        else:
-            amount = random.randint(min_usd, min_usd * 3)
-        
-        # Select symbol with weighted probability
-        symbol_weights = {
-            "BTCUSDT": 0.3, "ETHUSDT": 0.25, "SOLUSDT": 0.15, "ADAUSDT": 0.1,
-            "BNBUSDT": 0.08, "DOTUSDT": 0.05, "MATICUSDT": 0.04, "LINKUSDT": 0.03
-        }
-        
-        symbol = random.choices(
-            list(symbol_weights.keys()),
-            weights=list(symbol_weights.values())
-        )[0]
-        
-        # Generate side with slight bias towards LONG
-        side = random.choices(["LONG", "SHORT"], weights=[0.55, 0.45])[0]
-        
-        # Generate entry price
-        base_prices = {
-            "BTCUSDT": 104000, "ETHUSDT": 2500, "SOLUSDT": 145, "ADAUSDT": 1.2,
-            "BNBUSDT": 690, "DOTUSDT": 7.8, "MATICUSDT": 0.85, "LINKUSDT": 15.5
-        }
-        
-        base_price = base_prices.get(symbol, 100)
-        price_variation = random.uniform(-0.05, 0.05)
-        entry_price = base_price * (1 + price_variation)
-        
-        # Calculate position size
-        position_size = amount / entry_price
-        
-        # Generate leverage
-        leverage = random.choice([1, 2, 3, 5, 10, 20, 25, 50])
-        
-        # Generate PnL
-        pnl_percentage = random.uniform(-0.15, 0.25)
-        unrealized_pnl = amount * pnl_percentage
-        
-        # Generate margin used
-        margin_used = amount / leverage
-        
-        # Generate current price based on PnL
-        if side == "LONG":
-            current_price = entry_price * (1 + (unrealized_pnl / amount))
-        else:
-            current_price = entry_price * (1 - (unrealized_pnl / amount))
-        
-        # Generate liquidation price
-        if side == "LONG":
-            liquidation_price = entry_price * (1 - (0.8 / leverage))
-        else:
-            liquidation_price = entry_price * (1 + (0.8 / leverage))
-        
-        positions.append({
-            "Time": position_time.strftime("%H:%M:%S"),
-            "Symbol": symbol.replace("USDT", ""),
-            "Side": side,
-            "Amount (USD)": f"${amount:,}",
-            "Size": f"{position_size:.4f}",
-            "Entry Price": f"${entry_price:,.2f}",
-            "Current Price": f"${current_price:,.2f}",
-            "Leverage": f"{leverage}x",
-            "Margin": f"${margin_used:,.0f}",
-            "PnL": f"${unrealized_pnl:,.0f}",
-            "PnL %": f"{pnl_percentage * 100:+.1f}%",
-            "Liq. Price": f"${liquidation_price:,.2f}",
-            "Exchange": random.choice(["Binance", "Bybit", "OKX", "Bitget"])
-        })
-    
-    return positions
-
-def update_position_pnl(position):
-    """Update a single position's PnL and current price"""
-    try:
-        # Extract current values
-        current_pnl_str = position['PnL'].replace('$', '').replace(',', '')
-        current_pnl = float(current_pnl_str)
-        amount_str = position['Amount (USD)'].replace('$', '').replace(',', '')
-        amount = float(amount_str)
-        
-        # Small price movement (-2% to +3%)
-        price_change = random.uniform(-0.02, 0.03)
-        new_pnl = current_pnl + (amount * price_change)
-        new_pnl_pct = (new_pnl / amount) * 100
-        
-        # Update PnL fields
-        position['PnL'] = f"${new_pnl:,.0f}"
-        position['PnL %'] = f"{new_pnl_pct:+.1f}%"
-        
-        # Update current price based on entry price and PnL
-        entry_price = float(position['Entry Price'].replace('$', '').replace(',', ''))
-        if position['Side'] == 'LONG':
-            new_current_price = entry_price * (1 + (new_pnl / amount))
-        else:
-            new_current_price = entry_price * (1 - (new_pnl / amount))
-        position['Current Price'] = f"${new_current_price:,.2f}"
-        
-        return position
-    except Exception as e:
-        logger.error(f"Error updating position PnL: {e}")
-        return position
+def open_simulated_positions(book, min_usd=10000, count=5):
+    """Open simulated whale positions in the position book"""
+    from backend.simulator import get_simulator
+    sim = get_simulator()
+    book.add_positions(sim.open_position(min_usd=min_usd) for _ in range(count))
 
 def format_currency(value):
     """Format currency with proper thousand separators"""
@@ -219,11 +142,442 @@ def get_enabled_modules():
     return ['prices', 'news', 'whale_tx', 'whale_positions']
 
 def get_auto_refresh_interval():
-    """Get user's preferred auto-refresh interval"""
+    """Get user's preferred auto-refresh interval (seconds), the shortest any module refreshes at"""
     user_data = get_current_user()
     if user_data:
-        return user_data.get('settings', {}).get('auto_refresh_interval', 10) * 1000  # Convert to milliseconds
-    return 10000
+        return user_data.get('settings', {}).get('auto_refresh_interval', 10)
+    return 10
+
+# Expected seconds between new data per module, used when its source does not report one
+POSITION_UPDATE_INTERVAL = 20
+MODULE_REFRESH_INTERVALS = {
+    'prices': 60,   # price feed cache duration
+    'whale_tx': 30,
+    'whale_positions': POSITION_UPDATE_INTERVAL,
+    'news': 300     # news feed cache duration
+}
+# Data source topic behind each module (whale positions are simulated per session)
+MODULE_SOURCES = {'prices': 'prices', 'whale_tx': 'whale_tx', 'news': 'news'}
+RERUN_STATS_WINDOW = 60
+
+# Modules the browser keeps up to date from the data service push stream
+PUSHED_MODULES = ('prices', 'whale_tx')
+LIVE_FEED_HTML = os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "live_feed.html")
+
+# st.iframe replaces components.v1.html in newer Streamlit releases
+if hasattr(st, 'iframe'):
+    embed_html = st.iframe
+else:
+    from streamlit.components.v1 import html as embed_html
+
+def adaptive_refresh_intervals(preference, source_intervals):
+    """
+    Refresh each module as often as its data source produces new data,
+    but never more often than the user's preferred interval
+    """
+    return {
+        module: max(preference, source_intervals.get(MODULE_SOURCES.get(module), default))
+        for module, default in MODULE_REFRESH_INTERVALS.items()
+    }
+
+def get_module_refresh_intervals():
+    """Refresh interval per module in seconds; None for modules updated by push"""
+    intervals = adaptive_refresh_intervals(get_auto_refresh_interval(), get_source_intervals())
+    if push_stream_url():
+        intervals.update({module: None for module in PUSHED_MODULES})
+    return intervals
+
+def render_live_feed(mode, stream_url, labels, height, **options):
+    """Browser-side feed following the push stream; new data is patched in without a rerun"""
+    with open(LIVE_FEED_HTML, encoding='utf-8') as f:
+        template = f.read()
+    config = {'mode': mode, 'url': stream_url, 'labels': labels, **options}
+    embed_html(template.replace('__CONFIG__', json.dumps(config)), height=height)
+
+def record_module_rerun(module, data_key):
+    """Log a module rerun and whether it had new data to show (data_key changed)"""
+    now = time.time()
+    reruns = st.session_state.setdefault("module_reruns", {}).setdefault(module, [])
+    last_keys = st.session_state.setdefault("module_data_keys", {})
+    reruns.append((now, module not in last_keys or last_keys[module] != data_key))
+    last_keys[module] = data_key
+    # Keep only the reruns inside the stats window
+    while reruns and reruns[0][0] < now - RERUN_STATS_WINDOW:
+        reruns.pop(0)
+
+def get_rerun_stats():
+    """Module reruns per minute and how many of them had new data, over the last RERUN_STATS_WINDOW seconds"""
+    cutoff = time.time() - RERUN_STATS_WINDOW
+    recent = [fresh for reruns in st.session_state.get("module_reruns", {}).values()
+              for timestamp, fresh in reruns if timestamp >= cutoff]
+    scale = 60 / RERUN_STATS_WINDOW
+    return len(recent) * scale, sum(recent) * scale
+
+def render_live_status(language):
+    """Real-time status indicator with the module rerun rate"""
+    current_time = datetime.now()
+    status_text = "LIVE" if language == 'id' else "LIVE"
+    reruns, fresh = get_rerun_stats()
+    rerun_text = (f"{reruns:.0f} reruns/min, {fresh:.0f} with new data" if language == 'en'
+                  else f"{reruns:.0f} rerun/menit, {fresh:.0f} dengan data baru")
+    st.markdown(f"""
+        <div style='text-align: right; padding: 10px;'>
+            <span style='color: #00ff88; font-size: 12px;'>
+                🟢 {status_text} • {current_time.strftime('%H:%M:%S')}
+            </span><br>
+            <span style='color: #a3a8b8; font-size: 11px;'>🔁 {rerun_text}</span>
+        </div>
+    """, unsafe_allow_html=True)
+
+def render_prices(language):
+    """Market metrics; returns the prices shown"""
+    market_data = get_market_data()
+    stream_url = push_stream_url()
+    if stream_url:
+        col_coins, col3, col4 = st.columns([2, 1, 1])
+        with col_coins:
+            reconnecting = "Reconnecting..." if language == 'en' else "Menghubungkan ulang..."
+            render_live_feed('prices', stream_url, {'reconnecting': reconnecting}, height=110,
+                             coins={'bitcoin': "Bitcoin (BTC)", 'ethereum': "Ethereum (ETH)"})
+        render_market_metrics(language, market_data, col3, col4)
+        return None
+
+    col1, col2, col3, col4 = st.columns(4)
+    prices = get_prices()
+
+    with col1:
+        btc_price = prices.get('bitcoin', {}).get('usd', 0)
+        st.metric("Bitcoin (BTC)", format_currency(btc_price), "+2.4%")
+
+    with col2:
+        eth_price = prices.get('ethereum', {}).get('usd', 0)
+        st.metric("Ethereum (ETH)", format_currency(eth_price), "-0.8%")
+
+    render_market_metrics(language, market_data, col3, col4)
+    return prices
+
+def render_market_metrics(language, market_data, col3, col4):
+    """Market cap and 24h volume metrics"""
+    with col3:
+        cap_label = "Total Market Cap" if language == 'en' else "Total Market Cap"
+        st.metric(cap_label, market_data.get('total_market_cap', 'N/A'))
+
+    with col4:
+        vol_label = "24h Volume" if language == 'en' else "Volume 24j"
+        st.metric(vol_label, market_data.get('volume_24h', 'N/A'))
+
+def render_whale_tx(language):
+    """Whale transactions from the shared feed; returns the feed sequence number shown"""
+    whale_title = "🐋 Whale Transactions" if language == 'en' else "🐋 Transaksi Whale"
+    st.subheader(whale_title)
+
+    stream_url = push_stream_url()
+    if stream_url:
+        labels = {
+            'total': "Total Transactions" if language == 'en' else "Total Transaksi",
+            'last': "Last Transaction" if language == 'en' else "Transaksi Terakhir",
+            'next': "Next TX in" if language == 'en' else "TX Berikutnya",
+            'soon': "Any moment..." if language == 'en' else "Sebentar lagi...",
+            'reconnecting': "Reconnecting..." if language == 'en' else "Menghubungkan ulang..."
+        }
+        render_live_feed('whale_tx', stream_url, labels, height=620, rows=15)
+        return None
+
+    # Transactions live in the shared ring buffer; a session only keeps
+    # the sequence number of the last transaction it has shown
+    feed = get_whale_feed(15)
+    cursor = st.session_state.get("whale_cursor", 0)
+    recent_tx = feed['events']
+    new_tx_count = feed['last_seq'] - cursor
+    st.session_state["whale_cursor"] = feed['last_seq']
+
+    # Display transactions with real-time updates
+    if recent_tx:
+        import pandas as pd
+        from backend.simulator import get_simulator
+        sim = get_simulator()
+
+        tx_df = pd.DataFrame(recent_tx)
+        # Sort by timestamp to show newest first
+        if 'timestamp' in tx_df.columns:
+            tx_df = tx_df.sort_values('timestamp', ascending=False)
+        st.dataframe(tx_df, use_container_width=True)
+
+        # Show transaction stats
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            total_label = "Total Transactions" if language == 'en' else "Total Transaksi"
+            new_label = "new" if language == 'en' else "baru"
+            st.metric(total_label, feed['last_seq'],
+                      delta=f"+{new_tx_count} {new_label}" if cursor and new_tx_count else None)
+        with col2:
+            time_ago = max(0, sim.clock.now() - feed['last_timestamp'])
+            last_label = "Last Transaction" if language == 'en' else "Transaksi Terakhir"
+            st.metric(last_label, f"{int(time_ago)}s ago")
+        with col3:
+            next_tx_time = feed['next_in']
+            if next_tx_time > 0:
+                next_label = "Next TX in" if language == 'en' else "TX Berikutnya"
+                st.metric(next_label, f"~{int(next_tx_time)}s")
+            else:
+                next_label = "Next TX" if language == 'en' else "TX Berikutnya"
+                any_moment = "Any moment..." if language == 'en' else "Sebentar lagi..."
+                st.metric(next_label, any_moment)
+    else:
+        waiting_msg = "🔄 Waiting for new whale transactions..." if language == 'en' else "🔄 Menunggu transaksi whale baru..."
+        st.info(waiting_msg)
+    return feed['last_seq']
+
+def render_whale_positions(language):
+    """Whale open positions, summary and liquidation heatmap; returns the position book version shown"""
+    import pandas as pd
+    from backend.simulator import get_simulator, SYMBOL_WEIGHTS
+    from backend.position_book import PositionBook
+
+    sim = get_simulator()
+    positions_title = "💼 Whale Open Positions" if language == 'en' else "💼 Posisi Terbuka Whale"
+    st.subheader(positions_title)
+
+    # Initialize whale positions (numeric book) and timing
+    if "position_book" not in st.session_state:
+        st.session_state["position_book"] = PositionBook()
+    book = st.session_state["position_book"]
+
+    if "last_position_update" not in st.session_state:
+        st.session_state["last_position_update"] = datetime.now()
+
+    # Auto-update positions every 20-60 seconds
+    current_time = datetime.now()
+    time_since_last_update = (current_time - st.session_state["last_position_update"]).total_seconds()
+
+    # Generate new positions or update existing ones
+    should_update_positions = (
+        len(book) == 0 or 
+        (time_since_last_update > POSITION_UPDATE_INTERVAL and sim.random.random() < 0.4) or
+        time_since_last_update > 60
+    )
+
+    if should_update_positions:
+        # Mix of updating existing and adding new positions
+        if len(book) > 0 and sim.random.random() < 0.7:
+            # Mark all positions to the current simulated prices
+            book.mark_to_market(sim.prices())
+
+            # Occasionally add a new position or remove an old one
+            if sim.random.random() < 0.3:
+                open_simulated_positions(book, min_usd=50000, count=1)
+            elif len(book) > 8 and sim.random.random() < 0.2:
+                # Remove oldest position occasionally
+                book.remove(0)
+        else:
+            # Generate completely new set of positions
+            book.clear()
+            open_simulated_positions(book, min_usd=50000, count=8)
+
+        st.session_state["last_position_update"] = current_time
+
+    # Display whale positions
+    if len(book) > 0:
+        positions_df = book.to_display_frame()
+
+        # Create columns with better proportions
+        col1, col2 = st.columns([4, 1])
+
+        with col1:
+            # Display the main dataframe with fixed height
+            st.dataframe(
+                positions_df,
+                use_container_width=True,
+                height=350
+            )
+
+        with col2:
+            # Create a container with consistent spacing
+            with st.container():
+                summary_title = "📊 Position Summary" if language == 'en' else "📊 Ringkasan Posisi"
+                st.markdown(f"### {summary_title}")
+
+                # Summary from the numeric book, memoized by its version
+                summary = book.summary()
+
+                # Display metrics with consistent spacing
+                total_pos_label = "Total Positions" if language == 'en' else "Total Posisi"
+                st.metric(total_pos_label, summary['total_positions'])
+                st.metric("Long/Short", f"{summary['long_positions']}/{summary['short_positions']}")
+
+                total_val_label = "Total Value" if language == 'en' else "Total Nilai"
+                st.metric(total_val_label, f"${summary['total_value']:,.0f}")
+
+                # PnL metric with color indication
+                pnl_delta = f"{summary['pnl_percentage']:+.1f}%" if summary['total_value'] > 0 else "0%"
+                st.metric(
+                    "Total PnL", 
+                    f"${summary['total_pnl']:,.0f}",
+                    pnl_delta
+                )
+
+                # Add some spacing
+                st.markdown("---")
+
+                # Show last update time
+                if "last_position_update" in st.session_state:
+                    last_update = st.session_state["last_position_update"]
+                    update_label = "Last updated" if language == 'en' else "Terakhir diperbarui"
+                    st.caption(f"🕒 {update_label}: {last_update.strftime('%H:%M:%S')}")
+
+                # Manual refresh button (optional)
+                refresh_label = "🔄 Force Refresh" if language == 'en' else "🔄 Refresh Paksa"
+                refresh_help = "Force immediate update of positions" if language == 'en' else "Paksa pembaruan posisi segera"
+                if st.button(refresh_label, 
+                            key="refresh_positions", 
+                            use_container_width=True,
+                            help=refresh_help):
+                    book.clear()
+                    open_simulated_positions(book, min_usd=50000, count=8)
+                    st.session_state["last_position_update"] = datetime.now()
+                    st.rerun(scope="fragment")
+    else:
+        loading_msg = "🔄 Loading whale positions..." if language == 'en' else "🔄 Memuat posisi whale..."
+        st.info(loading_msg)
+
+    # Liquidation heatmap: where positions across the market would be liquidated
+    heatmap_title = "🔥 Liquidation Heatmap" if language == 'en' else "🔥 Heatmap Likuidasi"
+    with st.expander(heatmap_title):
+        heatmap_symbol = st.selectbox(
+            "Symbol" if language == 'en' else "Simbol",
+            list(SYMBOL_WEIGHTS),
+            key="heatmap_symbol"
+        )
+        heatmap = get_liquidation_heatmap(heatmap_symbol)
+        if heatmap is not None:
+            from backend.liquidation_heatmap import bin_on_grid
+
+            long_label = "Long liquidations (USD)" if language == 'en' else "Likuidasi long (USD)"
+            short_label = "Short liquidations (USD)" if language == 'en' else "Likuidasi short (USD)"
+            shown_label = "Whale positions above (USD)" if language == 'en' else "Posisi whale di atas (USD)"
+            # The positions in the table, on the same price grid as the market-wide map
+            shown = bin_on_grid(heatmap, *book.liquidation_levels(heatmap_symbol))
+            heatmap_df = pd.DataFrame({
+                "Price": heatmap['price'],
+                long_label: heatmap['long_usd'],
+                short_label: heatmap['short_usd'],
+                shown_label: shown['long_usd'] + shown['short_usd']
+            })
+            st.bar_chart(heatmap_df, x="Price", y=[long_label, short_label, shown_label], height=300)
+            ref_label = "Reference price" if language == 'en' else "Harga referensi"
+            st.caption(f"{ref_label}: ${heatmap['reference_price']:,.2f}")
+        else:
+            st.info("Heatmap not available" if language == 'en' else "Heatmap tidak tersedia")
+
+    # Open interest changes next to the top traders' long/short ratio
+    with st.expander("📈 Open Interest"):
+        from backend.open_interest import open_interest_table
+        oi_rows = open_interest_table(get_open_interest_deltas(), get_cached_positions())
+        if oi_rows:
+            oi_df = pd.DataFrame(oi_rows).rename(columns={
+                'symbol': "Symbol",
+                'open_interest_usd': "OI (USD)",
+                'long_ratio': "Long%",
+                'short_ratio': "Short%"
+            })
+            oi_df = oi_df.rename(columns=lambda column: column.replace('change_', 'Δ ').replace('_pct', ' %'))
+            for column in ("Long%", "Short%"):
+                oi_df[column] = pd.to_numeric(oi_df[column]) * 100
+            column_config = {column: st.column_config.NumberColumn(format="%.2f")
+                             for column in oi_df.columns if column != "Symbol"}
+            column_config["OI (USD)"] = st.column_config.NumberColumn(format="$%.0f")
+            st.dataframe(oi_df, use_container_width=True, hide_index=True, column_config=column_config)
+        else:
+            st.info("Open interest not collected yet" if language == 'en' else "Data open interest belum tersedia")
+    return book.version
+
+# Stories per news page; the rendered HTML of a page is cached per news version
+NEWS_PAGE_SIZE = 12
+NEWS_HTML_CACHE = {}
+NEWS_HTML_LOCK = threading.Lock()
+
+NEWS_STYLE = """
+<style>
+  .news-item { border: 1px solid rgba(250, 250, 250, 0.2); border-radius: 8px; margin-bottom: 8px; padding: 0 12px; }
+  .news-item summary { cursor: pointer; padding: 10px 0; font-weight: 600; }
+  .news-item .news-body { display: flex; gap: 16px; align-items: flex-start; padding-bottom: 12px; }
+  .news-item .news-summary { flex: 3; }
+  .news-item .news-link { flex: 1; text-align: right; padding: 10px; }
+  .news-item .news-link a { background-color: #4CAF50; color: white; padding: 10px 20px; border-radius: 4px;
+                            text-decoration: none; font-size: 14px; display: inline-block; }
+</style>
+"""
+
+def build_news_html(news, language):
+    """One HTML block for a list of stories: collapsible items with a read-more link"""
+    import html
+    read_more_text = "🔗 Read More" if language == 'en' else "🔗 Baca Selengkapnya"
+    items = [
+        f"""<details class="news-item"><summary>{html.escape(item['title'])}</summary>"""
+        f"""<div class="news-body"><div class="news-summary">{html.escape(clean_html(item['summary']))}</div>"""
+        f"""<div class="news-link"><a href="{html.escape(item['link'])}" target="_blank">{read_more_text}</a></div>"""
+        f"""</div></details>"""
+        for item in news
+    ]
+    return NEWS_STYLE + "".join(items)
+
+def get_news_page_html(version, news, language, page):
+    """Rendered HTML of one news page, built once per (news version, language, page)"""
+    key = (version, language, page)
+    with NEWS_HTML_LOCK:
+        cached = NEWS_HTML_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    start = page * NEWS_PAGE_SIZE
+    page_html = build_news_html(news[start:start + NEWS_PAGE_SIZE], language)
+    with NEWS_HTML_LOCK:
+        # Pages of older news versions are never shown again
+        for stale in [cached_key for cached_key in NEWS_HTML_CACHE if cached_key[0] != version]:
+            del NEWS_HTML_CACHE[stale]
+        NEWS_HTML_CACHE[key] = page_html
+    return page_html
+
+def render_news(language):
+    """Latest crypto news as one HTML block per page; returns the news version shown"""
+    news_title = "📰 Latest Crypto News" if language == 'en' else "📰 Berita Crypto Terbaru"
+    st.subheader(news_title)
+    snapshot = get_news_snapshot()
+    news = snapshot['data']
+
+    page = 0
+    pages = max(1, -(-len(news) // NEWS_PAGE_SIZE))
+    if pages > 1:
+        page_label = "Page" if language == 'en' else "Halaman"
+        page = st.number_input(f"{page_label} (1-{pages})", min_value=1, max_value=pages, value=1,
+                               key="news_page") - 1
+
+    st.markdown(get_news_page_html(snapshot['version'], news, language, page), unsafe_allow_html=True)
+    return snapshot['version']
+
+DASHBOARD_MODULES = {
+    'prices': render_prices,
+    'whale_tx': render_whale_tx,
+    'whale_positions': render_whale_positions,
+    'news': render_news
+}
+
+def run_module_fragment(module, language, interval):
+    """
+    Render one module as a fragment that reruns on its own interval, so a
+    refresh of one panel does not rerun the rest of the page
+    """
+    render = DASHBOARD_MODULES[module]
+
+    def fragment():
+        try:
+            record_module_rerun(module, render(language))
+        except Exception as e:
+            logger.error(f"Dashboard module {module} error: {str(e)}")
+            error_msg = "An error occurred while loading this section" if language == 'en' else "Terjadi kesalahan saat memuat bagian ini"
+            st.error(error_msg)
+
+    st.fragment(fragment, run_every=interval)()
 
 def show_protected_dashboard():
     """Dashboard yang dilindungi autentikasi"""
@@ -240,10 +594,7 @@ def show_protected_dashboard():
         # Get user preferences
         language = get_user_language()
         enabled_modules = get_enabled_modules()
-        refresh_interval = get_auto_refresh_interval()
-        
-        # Auto-refresh with user's preferred interval
-        st_autorefresh(interval=refresh_interval, key="datarefresh")
+        intervals = get_module_refresh_intervals()
 
         # Title and description with real-time indicator
         title = "📈 Dashboard Crypto - FBucket" if language == 'id' else "📈 Dashboard Crypto - FBucket"
@@ -256,278 +607,14 @@ def show_protected_dashboard():
             st.markdown(subtitle)
         
         with col_status:
-            # Real-time status indicator
-            current_time = datetime.now()
-            status_text = "LIVE" if language == 'id' else "LIVE"
-            st.markdown(f"""
-                <div style='text-align: right; padding: 10px;'>
-                    <span style='color: #00ff88; font-size: 12px;'>
-                        🟢 {status_text} • {current_time.strftime('%H:%M:%S')}
-                    </span>
-                </div>
-            """, unsafe_allow_html=True)
-
-        # Market metrics (if enabled)
-        if 'prices' in enabled_modules:
-            col1, col2, col3, col4 = st.columns(4)
-            
-            prices = get_prices()
-            market_data = get_market_data()
-
-            with col1:
-                btc_price = prices.get('bitcoin', {}).get('usd', 0)
-                st.metric("Bitcoin (BTC)", format_currency(btc_price), "+2.4%")
-
-            with col2:
-                eth_price = prices.get('ethereum', {}).get('usd', 0)
-                st.metric("Ethereum (ETH)", format_currency(eth_price), "-0.8%")
-
-            with col3:
-                cap_label = "Total Market Cap" if language == 'en' else "Total Market Cap"
-                st.metric(cap_label, market_data.get('total_market_cap', 'N/A'))
-
-            with col4:
-                vol_label = "24h Volume" if language == 'en' else "Volume 24j"
-                st.metric(vol_label, market_data.get('volume_24h', 'N/A'))
-
-        # Whale Transactions (if enabled)
-        if 'whale_tx' in enabled_modules:
-            whale_title = "🐋 Whale Transactions" if language == 'en' else "🐋 Transaksi Whale"
-            st.subheader(whale_title)
-            
-            # Initialize whale transactions if not exists
-            if "whale_tx" not in st.session_state:
-                st.session_state["whale_tx"] = []
-            
-            # Initialize last update time
-            if "last_tx_update" not in st.session_state:
-                st.session_state["last_tx_update"] = datetime.now()
-            
-            # Auto-generate new transactions every 15-45 seconds
-            current_time = datetime.now()
-            time_since_last_tx = (current_time - st.session_state["last_tx_update"]).total_seconds()
-            
-            # Generate new transaction with probability based on time elapsed
-            should_generate_tx = (
-                time_since_last_tx > 15 and random.random() < 0.3
-            ) or time_since_last_tx > 45
-            
-            if should_generate_tx:
-                tx = get_fake_whale_tx()
-                if tx:
-                    st.session_state["whale_tx"].append(tx)
-                    st.session_state["last_tx_update"] = current_time
-                    # Keep only last 15 transactions for better visibility
-                    if len(st.session_state["whale_tx"]) > 15:
-                        st.session_state["whale_tx"] = st.session_state["whale_tx"][-15:]
-            
-            # Display transactions with real-time updates
-            if st.session_state["whale_tx"]:
-                tx_df = pd.DataFrame(st.session_state["whale_tx"])
-                # Sort by timestamp to show newest first
-                if 'timestamp' in tx_df.columns:
-                    tx_df = tx_df.sort_values('timestamp', ascending=False)
-                st.dataframe(tx_df, use_container_width=True)
-                
-                # Show transaction stats
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    total_label = "Total Transactions" if language == 'en' else "Total Transaksi"
-                    st.metric(total_label, len(st.session_state["whale_tx"]))
-                with col2:
-                    if len(st.session_state["whale_tx"]) > 0:
-                        latest_time = st.session_state["last_tx_update"]
-                        time_ago = (current_time - latest_time).total_seconds()
-                        last_label = "Last Transaction" if language == 'en' else "Transaksi Terakhir"
-                        st.metric(last_label, f"{int(time_ago)}s ago")
-                with col3:
-                    next_tx_time = 45 - time_since_last_tx
-                    if next_tx_time > 0:
-                        next_label = "Next TX in" if language == 'en' else "TX Berikutnya"
-                        st.metric(next_label, f"~{int(next_tx_time)}s")
-                    else:
-                        next_label = "Next TX" if language == 'en' else "TX Berikutnya"
-                        any_moment = "Any moment..." if language == 'en' else "Sebentar lagi..."
-                        st.metric(next_label, any_moment)
-            else:
-                waiting_msg = "🔄 Waiting for new whale transactions..." if language == 'en' else "🔄 Menunggu transaksi whale baru..."
-                st.info(waiting_msg)
-
-        # Whale Positions (if enabled)
-        if 'whale_positions' in enabled_modules:
-            positions_title = "💼 Whale Open Positions" if language == 'en' else "💼 Posisi Terbuka Whale"
-            st.subheader(positions_title)
-            
-            # Initialize whale positions and timing
-            if "whale_positions" not in st.session_state:
-                st.session_state["whale_positions"] = []
-            
-            if "last_position_update" not in st.session_state:
-                st.session_state["last_position_update"] = datetime.now()
-            
-            # Auto-update positions every 20-60 seconds
-            current_time = datetime.now()
-            time_since_last_update = (current_time - st.session_state["last_position_update"]).total_seconds()
-            
-            # Generate new positions or update existing ones
-            should_update_positions = (
-                len(st.session_state["whale_positions"]) == 0 or 
-                (time_since_last_update > 20 and random.random() < 0.4) or
-                time_since_last_update > 60
-            )
-            
-            if should_update_positions:
-                # Mix of updating existing and adding new positions
-                if len(st.session_state["whale_positions"]) > 0 and random.random() < 0.7:
-                    # Update some existing positions (simulate PnL changes)
-                    updated_positions = []
-                    for pos in st.session_state["whale_positions"]:
-                        # Randomly update some positions
-                        if random.random() < 0.6:
-                            pos = update_position_pnl(pos)
-                        updated_positions.append(pos)
-                    
-                    # Occasionally add a new position or remove an old one
-                    if random.random() < 0.3:
-                        new_positions = get_simulated_open_positions(min_usd=50000, count=1)
-                        updated_positions.extend(new_positions)
-                    elif len(updated_positions) > 8 and random.random() < 0.2:
-                        # Remove oldest position occasionally
-                        updated_positions = updated_positions[1:]
-                    
-                    st.session_state["whale_positions"] = updated_positions
-                else:
-                    # Generate completely new set of positions
-                    new_positions = get_simulated_open_positions(min_usd=50000, count=8)
-                    st.session_state["whale_positions"] = new_positions
-                
-                st.session_state["last_position_update"] = current_time
-            
-            # Display whale positions
-            if st.session_state["whale_positions"]:
-                positions_df = pd.DataFrame(st.session_state["whale_positions"])
-                
-                # Create columns with better proportions
-                col1, col2 = st.columns([4, 1])
-                
-                with col1:
-                    # Display the main dataframe with fixed height
-                    st.dataframe(
-                        positions_df,
-                        use_container_width=True,
-                        height=350
-                    )
-                
-                with col2:
-                    # Create a container with consistent spacing
-                    with st.container():
-                        summary_title = "📊 Position Summary" if language == 'en' else "📊 Ringkasan Posisi"
-                        st.markdown(f"### {summary_title}")
-                        
-                        # Calculate summary stats
-                        total_positions = len(positions_df)
-                        long_positions = len(positions_df[positions_df['Side'] == 'LONG'])
-                        short_positions = len(positions_df[positions_df['Side'] == 'SHORT'])
-                        
-                        # Extract numeric values for calculations
-                        amounts = []
-                        pnl_values = []
-                        for _, row in positions_df.iterrows():
-                            # Clean amount string
-                            amount_str = row['Amount (USD)'].replace('$', '').replace(',', '')
-                            amounts.append(float(amount_str))
-                            
-                            # Clean PnL string
-                            pnl_str = row['PnL'].replace('$', '').replace(',', '')
-                            pnl_values.append(float(pnl_str))
-                        
-                        total_value = sum(amounts)
-                        total_pnl = sum(pnl_values)
-                        
-                        # Display metrics with consistent spacing
-                        total_pos_label = "Total Positions" if language == 'en' else "Total Posisi"
-                        st.metric(total_pos_label, total_positions)
-                        st.metric("Long/Short", f"{long_positions}/{short_positions}")
-                        
-                        total_val_label = "Total Value" if language == 'en' else "Total Nilai"
-                        st.metric(total_val_label, f"${total_value:,.0f}")
-                        
-                        # PnL metric with color indication
-                        pnl_delta = f"{(total_pnl/total_value)*100:+.1f}%" if total_value > 0 else "0%"
-                        st.metric(
-                            "Total PnL", 
-                            f"${total_pnl:,.0f}",
-                            pnl_delta
-                        )
-                        
-                        # Add some spacing
-                        st.markdown("---")
-                        
-                        # Show last update time
-                        if "last_position_update" in st.session_state:
-                            last_update = st.session_state["last_position_update"]
-                            update_label = "Last updated" if language == 'en' else "Terakhir diperbarui"
-                            st.caption(f"🕒 {update_label}: {last_update.strftime('%H:%M:%S')}")
-                        
-                        # Manual refresh button (optional)
-                        refresh_label = "🔄 Force Refresh" if language == 'en' else "🔄 Refresh Paksa"
-                        refresh_help = "Force immediate update of positions" if language == 'en' else "Paksa pembaruan posisi segera"
-                        if st.button(refresh_label, 
-                                    key="refresh_positions", 
-                                    use_container_width=True,
-                                    help=refresh_help):
-                            st.session_state["whale_positions"] = get_simulated_open_positions(min_usd=50000, count=8)
-                            st.session_state["last_position_update"] = datetime.now()
-                            st.rerun()
-            else:
-                loading_msg = "🔄 Loading whale positions..." if language == 'en' else "🔄 Memuat posisi whale..."
-                st.info(loading_msg)
-
-        # News Section (if enabled)
-        if 'news' in enabled_modules:
-            news_title = "📰 Latest Crypto News" if language == 'en' else "📰 Berita Crypto Terbaru"
-            st.subheader(news_title)
-            news = fetch_news()
-            
-            for item in news:
-                with st.expander(item['title']):
-                    col1, col2 = st.columns([3, 1])
-                    
-                    with col1:
-                        # Clean and display the summary
-                        clean_summary = clean_html(item['summary'])
-                        st.markdown(clean_summary)
-                        
-                    with col2:
-                        # Add a nice looking "Read More" button
-                        read_more_text = "🔗 Read More" if language == 'en' else "🔗 Baca Selengkapnya"
-                        st.markdown(
-                            f"""
-                            <div style='text-align: right; padding: 10px;'>
-                            <a href='{item["link"]}' target='_blank'>
-                                <button style='
-                                    background-color: #4CAF50;
-                                    border: none;
-                                    color: white;
-                                    padding: 10px 20px;
-                                    text-align: center;
-                                    text-decoration: none;
-                                    display: inline-block;
-                                    font-size: 14px;
-                                    margin: 4px 2px;
-                                    cursor: pointer;
-                                    border-radius: 4px;
-                                '>
-                                {read_more_text}
-                                </button>
-                            </a>
-                            </div>
-                            """,
-                            unsafe_allow_html=True
-                        )
-                    
-                    # Add separator between news items
-                    st.markdown("---")
+            # Ticks with the fastest module
+            enabled_intervals = [intervals[module] for module in enabled_modules if intervals.get(module)]
+            st.fragment(render_live_status, run_every=min(enabled_intervals, default=10))(language)
+
+        # Each enabled module refreshes independently
+        for module in DASHBOARD_MODULES:
+            if module in enabled_modules:
+                run_module_fragment(module, language, intervals[module])
 
     except Exception as e:
         logger.error(f"Dashboard error: {str(e)}")
@@ -4,14 +4,30 @@ import os
 from datetime import datetime, timedelta
 import streamlit as st
 
+from user_store import UserStore
+from session_tokens import SessionTokenStore
+
+# Cookie that carries the session token across reloads and tabs. It is set from
+# the browser (Streamlit cannot send Set-Cookie), so unlike an HttpOnly cookie
+# it is readable by scripts on the page; it stays out of URLs, history and links.
+SESSION_COOKIE = "fbucket_session"
+
 class AuthManager:
-    def __init__(self, users_file="users.json"):
+    def __init__(self, users_file="users.json", db_file=None):
+        # users.json is only read to migrate existing users into the SQLite store
         self.users_file = users_file
+        self.store = UserStore(db_file or os.path.splitext(users_file)[0] + ".db")
+        self.sessions = SessionTokenStore(self.store.db_file)
         self.ensure_users_file()
     
     def ensure_users_file(self):
-        """Pastikan file users.json ada"""
-        if not os.path.exists(self.users_file):
+        """Pastikan user store berisi user: impor users.json lama, atau buat admin default"""
+        if self.store.count() > 0:
+            return
+        users = self.load_users()
+        if users:
+            self.save_users(users)
+        else:
             # Buat akun admin default
             default_users = {
                 "admin": {
@@ -35,7 +51,7 @@ class AuthManager:
         return hashlib.sha256(password.encode()).hexdigest()
     
     def load_users(self):
-        """Load users dari file JSON"""
+        """Load users dari file JSON lama (untuk migrasi)"""
         try:
             with open(self.users_file, 'r') as f:
                 return json.load(f)
@@ -43,18 +59,12 @@ class AuthManager:
             return {}
     
     def save_users(self, users):
-        """Simpan users ke file JSON"""
-        with open(self.users_file, 'w') as f:
-            json.dump(users, f, indent=2, default=str)
+        """Simpan (insert atau replace) users ke user store"""
+        self.store.import_users(users)
     
     def register_user(self, username, password, email, name):
         """Registrasi user baru"""
-        users = self.load_users()
-        
-        if username in users:
-            return False, "Username sudah digunakan"
-        
-        users[username] = {
+        user = {
             "password": self.hash_password(password),
             "email": email,
             "name": name,
@@ -68,43 +78,41 @@ class AuthManager:
             }
         }
         
-        self.save_users(users)
+        if not self.store.insert(username, user):
+            return False, "Username sudah digunakan"
         return True, "Registrasi berhasil"
     
     def authenticate(self, username, password):
         """Autentikasi user"""
-        users = self.load_users()
+        stored_password = self.store.get_password(username)
         
-        if username not in users:
+        if stored_password is None:
             return False, "Username tidak ditemukan"
         
-        if users[username]["password"] != self.hash_password(password):
+        if stored_password != self.hash_password(password):
             return False, "Password salah"
         
         return True, "Login berhasil"
     
     def get_user(self, username):
         """Ambil data user"""
-        users = self.load_users()
-        return users.get(username)
+        return self.store.get(username)
+    
+    def get_user_by_email(self, email):
+        """Ambil username berdasarkan email"""
+        return self.store.find_username_by_email(email)
     
     def update_user_settings(self, username, settings):
         """Update pengaturan user"""
-        users = self.load_users()
-        if username in users:
-            users[username]["settings"].update(settings)
-            self.save_users(users)
-            return True
-        return False
+        return self.store.update(username, lambda user: user["settings"].update(settings))
     
     def update_user_profile(self, username, profile_data):
         """Update profil user"""
-        users = self.load_users()
-        if username in users:
-            users[username].update(profile_data)
-            self.save_users(users)
-            return True
-        return False
+        updated = self.store.update(username, lambda user: user.update(profile_data))
+        # A new password signs the user out of every existing session
+        if updated and 'password' in profile_data:
+            self.sessions.revoke_user(username)
+        return updated
 
 # Instance global
 auth_manager = AuthManager()
@@ -117,19 +125,79 @@ def check_authentication():
     if "username" not in st.session_state:
         st.session_state["username"] = None
     
+    write_session_cookie()
+    # After a reload or in a new tab, log in again from the session token
+    if not st.session_state["authenticated"]:
+        restore_session()
+    
     return st.session_state["authenticated"]
 
-def login_user(username):
+def restore_session():
+    """Login dari session cookie (sekali per sesi browser), jika token valid"""
+    # Cookies are sent once, when the browser session connects
+    if st.session_state.get("session_checked"):
+        return False
+    st.session_state["session_checked"] = True
+    
+    token = st.context.cookies.get(SESSION_COOKIE)
+    if not token:
+        return False
+    
+    username = auth_manager.sessions.verify(token)
+    user_data = auth_manager.get_user(username) if username else None
+    if user_data is None:
+        st.session_state["session_cookie"] = ("", 0)
+        return False
+    
+    st.session_state["authenticated"] = True
+    st.session_state["username"] = username
+    st.session_state["user_data"] = user_data
+    st.session_state["session_token"] = token
+    return True
+
+def write_session_cookie():
+    """Set atau hapus session cookie di browser, jika ada perubahan"""
+    cookie = st.session_state.pop("session_cookie", None)
+    if cookie is None:
+        return
+    token, max_age = cookie
+    # Without max-age the cookie is dropped when the browser closes
+    cookie = f"{SESSION_COOKIE}={token}; path=/; SameSite=Strict"
+    if max_age is not None:
+        cookie += f"; max-age={max_age}"
+    script = f'document.cookie = {json.dumps(cookie)} + (location.protocol === "https:" ? "; Secure" : "");'
+    # st.iframe replaces components.v1.html in newer Streamlit releases (and needs a height)
+    if hasattr(st, 'iframe'):
+        st.iframe(f"<script>{script}</script>", height=1)
+    else:
+        from streamlit.components.v1 import html
+        html(f"<script>{script}</script>", height=0)
+
+def renew_session():
+    """Token baru untuk sesi ini, mis. setelah login atau ganti password"""
+    token = auth_manager.sessions.issue(st.session_state["username"])
+    remember = st.session_state.get("session_remember", False)
+    st.session_state["session_token"] = token
+    st.session_state["session_cookie"] = (token, int(auth_manager.sessions.ttl) if remember else None)
+
+def login_user(username, remember=False):
     """Set status login user"""
     st.session_state["authenticated"] = True
     st.session_state["username"] = username
     st.session_state["user_data"] = auth_manager.get_user(username)
+    # Token keeps the user logged in across reloads until it expires or they log out;
+    # "Ingat saya" keeps the cookie after the browser closes
+    st.session_state["session_remember"] = remember
+    renew_session()
 
 def logout_user():
     """Logout user"""
+    auth_manager.sessions.revoke(st.session_state.get("session_token"))
+    st.session_state["session_cookie"] = ("", 0)
     st.session_state["authenticated"] = False
     st.session_state["username"] = None
     st.session_state["user_data"] = None
+    st.session_state["session_token"] = None
     st.rerun()
 
 def get_current_user():
@@ -0,0 +1,106 @@
+"""
+Server CPU per connected user: full-page autorefresh vs per-module fragments
+on fixed intervals vs fragments on intervals adapted to their data sources.
+
+Uses Streamlit's AppTest harness to measure the CPU cost of rendering the
+page chrome (auth, sidebar, title) and each module on its own. With the old
+st_autorefresh every refresh reran everything; with fragments each module
+reruns alone on its own interval, and with adaptive intervals only about as
+often as its source has new data.
+
+    python dashboard/benchmark_reruns.py --runs 20
+    python dashboard/benchmark_reruns.py --news   # news rerun cost vs story count
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import logging
+
+from streamlit.testing.v1 import AppTest
+
+DASHBOARD_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(DASHBOARD_DIR, "app.py")
+sys.path.append(DASHBOARD_DIR)
+sys.path.append(os.path.dirname(DASHBOARD_DIR))
+
+MODULES = ['prices', 'whale_tx', 'whale_positions', 'news']
+USER_INTERVAL = 10
+# Per-module intervals before they were adapted to the data sources
+FIXED_INTERVALS = {'prices': USER_INTERVAL, 'whale_tx': 5, 'whale_positions': 20, 'news': 300}
+
+def measure(modules, runs: int) -> float:
+    """Mean CPU seconds of one script run with the given modules enabled"""
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    at.session_state['authenticated'] = True
+    at.session_state['username'] = 'benchmark'
+    at.session_state['user_data'] = {
+        'name': 'Benchmark',
+        'settings': {'language': 'en', 'modules': list(modules), 'auto_refresh_interval': USER_INTERVAL}
+    }
+    at.run()  # warm up: imports, first position book, caches
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+    start = time.process_time()
+    for _ in range(runs):
+        at.run()
+    return (time.process_time() - start) / runs
+
+def measure_news(story_counts, runs: int):
+    """News module CPU per rerun with the news cache holding `count` stories"""
+    from backend import news_feed
+
+    chrome = measure([], runs)
+    for count in story_counts:
+        news_feed.NEWS_CACHE.update(timestamp=time.time(), data=[
+            {'title': f"Story {i}: Bitcoin market update", 'summary': "<p>Markets moved.</p> " * 15,
+             'link': f"https://example.com/news/{i}", 'source': 'Benchmark'}
+            for i in range(count)
+        ])
+        cost = max(0.0, measure(['news'], runs) - chrome)
+        print(f"  news with {count:>5} stories: {cost * 1e3:6.1f}ms CPU per rerun")
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare per-user rerun CPU of full-page refresh and fragments')
+    parser.add_argument('--runs', type=int, default=20, help='Measured reruns per configuration')
+    parser.add_argument('--news', action='store_true', help='Only measure news rerun cost against story count')
+    args = parser.parse_args()
+
+    # auth.py creates its user store (users.db) in the working directory; keep it out of the repo
+    os.chdir(tempfile.mkdtemp())
+    logging.disable(logging.WARNING)
+
+    if args.news:
+        measure_news((12, 120, 1200), args.runs)
+        return
+
+    from app import adaptive_refresh_intervals
+    from backend.data_client import get_source_intervals
+    adaptive = adaptive_refresh_intervals(USER_INTERVAL, get_source_intervals())
+
+    chrome = measure([], args.runs)
+    full = measure(MODULES, args.runs)
+    module_cost = {module: max(0.0, measure([module], args.runs) - chrome) for module in MODULES}
+
+    print(f"Page chrome: {chrome * 1e3:.1f}ms, full page: {full * 1e3:.1f}ms CPU per run")
+    for module in MODULES:
+        print(f"  {module:<16} {module_cost[module] * 1e3:6.1f}ms per rerun, "
+              f"every {FIXED_INTERVALS[module]}s fixed, {adaptive[module]:g}s adaptive")
+
+    # Full page: everything reran every USER_INTERVAL seconds. Fragments: each module on its own interval
+    schedules = {
+        'full-page autorefresh': (len(MODULES) * 60 / USER_INTERVAL, full * 60 / USER_INTERVAL),
+        'fragments, fixed intervals': (sum(60 / FIXED_INTERVALS[module] for module in MODULES),
+                                       sum(module_cost[module] * 60 / FIXED_INTERVALS[module] for module in MODULES)),
+        'fragments, adaptive intervals': (sum(60 / adaptive[module] for module in MODULES),
+                                          sum(module_cost[module] * 60 / adaptive[module] for module in MODULES))
+    }
+    print("Per user per minute:")
+    for name, (reruns, cpu) in schedules.items():
+        print(f"  {name:<30} {reruns:5.1f} module reruns, {cpu * 1e3:5.0f}ms CPU")
+
+if __name__ == "__main__":
+    main()
@@ -127,7 +127,7 @@ def show_login_form():
                 success, message = auth_manager.authenticate(username, password)
                 
                 if success:
-                    login_user(username)
+                    login_user(username, remember_me)
                     st.success(f"✅ {message}")
                     st.balloons()
                     st.rerun()
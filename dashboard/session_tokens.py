@@ -0,0 +1,161 @@
+"""
+Signed, expiring session tokens for re-authenticating dashboard users.
+
+A token is "<id>.<expires>.<signature>" where the signature is an HMAC of
+the id and expiry with a server secret. Forged or expired tokens are
+rejected from the token alone; valid ones are looked up in a server-side
+sessions table (so logout can revoke them), with the most recent sessions
+kept in an in-memory LRU. Restoring a session from a token therefore
+needs no password hash and, on a cache hit, no database access.
+"""
+
+import hmac
+import time
+import secrets
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SESSION_TTL = 24 * 3600       # seconds a token stays valid
+SESSION_CACHE_SIZE = 10_000   # sessions kept in memory
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    token_id TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires_at);
+CREATE INDEX IF NOT EXISTS sessions_username ON sessions (username);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+class SessionTokenStore:
+    """Issues, verifies and revokes session tokens; one connection per thread"""
+
+    def __init__(self, db_file: str, secret: Optional[str] = None, ttl: float = SESSION_TTL,
+                 cache_size: int = SESSION_CACHE_SIZE):
+        self.db_file = db_file
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self._local = threading.local()
+        self._cache: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection().executescript(SCHEMA)
+        self._secret = (secret or self._stored_secret()).encode()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _stored_secret(self) -> str:
+        """Signing secret kept in the database, so tokens survive restarts"""
+        conn = self._connection()
+        conn.execute("INSERT OR IGNORE INTO meta VALUES ('session_secret', ?)", (secrets.token_hex(32),))
+        return conn.execute("SELECT value FROM meta WHERE key = 'session_secret'").fetchone()[0]
+
+    def _sign(self, token_id: str, expires_at: int) -> str:
+        return hmac.new(self._secret, f"{token_id}.{expires_at}".encode(), hashlib.sha256).hexdigest()
+
+    def _remember(self, token_id: str, username: str, expires_at: float):
+        with self._lock:
+            self._cache[token_id] = (username, expires_at)
+            self._cache.move_to_end(token_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def issue(self, username: str) -> str:
+        """New session token for a user who just logged in"""
+        token_id = secrets.token_urlsafe(16)
+        expires_at = int(time.time() + self.ttl)
+        conn = self._connection()
+        conn.execute("DELETE FROM sessions WHERE expires_at < ?", (time.time(),))
+        conn.execute("INSERT INTO sessions VALUES (?, ?, ?)", (token_id, username, expires_at))
+        self._remember(token_id, username, expires_at)
+        return f"{token_id}.{expires_at}.{self._sign(token_id, expires_at)}"
+
+    def verify(self, token: Optional[str]) -> Optional[str]:
+        """Username of a valid, unexpired and unrevoked token, else None"""
+        try:
+            token_id, expires, signature = (token or "").split(".")
+            expires_at = int(expires)
+        except ValueError:
+            return None
+        if expires_at < time.time() or not hmac.compare_digest(signature, self._sign(token_id, expires_at)):
+            return None
+
+        with self._lock:
+            cached = self._cache.get(token_id)
+            if cached is not None:
+                self._cache.move_to_end(token_id)
+                return cached[0]
+
+        row = self._connection().execute(
+            "SELECT username, expires_at FROM sessions WHERE token_id = ?", (token_id,)).fetchone()
+        if row is None:
+            return None
+        self._remember(token_id, *row)
+        return row[0]
+
+    def revoke(self, token: Optional[str]):
+        """Invalidate one token (logout)"""
+        token_id = (token or "").split(".")[0]
+        with self._lock:
+            self._cache.pop(token_id, None)
+        self._connection().execute("DELETE FROM sessions WHERE token_id = ?", (token_id,))
+
+    def revoke_user(self, username: str):
+        """Invalidate every session of a user (password change)"""
+        with self._lock:
+            for token_id in [token_id for token_id, (user, _) in self._cache.items() if user == username]:
+                del self._cache[token_id]
+        self._connection().execute("DELETE FROM sessions WHERE username = ?", (username,))
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    # Restoring a session: password login path (hash + user row) vs token (LRU hit, then database)
+    workdir = tempfile.mkdtemp()
+    os.chdir(workdir)
+    from auth import AuthManager
+
+    manager = AuthManager(os.path.join(workdir, "users.json"))
+    rounds = 10_000
+    tokens = [manager.sessions.issue("admin") for i in range(rounds)]
+
+    start = time.perf_counter()
+    for i in range(rounds):
+        assert manager.authenticate("admin", "admin123")[0] and manager.get_user("admin")
+    login = (time.perf_counter() - start) / rounds
+
+    start = time.perf_counter()
+    for token in tokens:
+        assert manager.sessions.verify(token) == "admin"
+    cached = (time.perf_counter() - start) / rounds
+
+    cold = SessionTokenStore(manager.store.db_file)
+    start = time.perf_counter()
+    for token in tokens:
+        assert cold.verify(token) == "admin"
+    uncached = (time.perf_counter() - start) / rounds
+
+    manager.sessions.revoke(tokens[0])
+    assert manager.sessions.verify(tokens[0]) is None and manager.sessions.verify(tokens[1][:-1] + "0") is None
+    print(f"Session restore over {rounds:,} tokens:")
+    print(f"  password login + user row: {login * 1e6:6.1f}us")
+    print(f"  token, LRU hit:            {cached * 1e6:6.1f}us")
+    print(f"  token, database lookup:    {uncached * 1e6:6.1f}us")
@@ -1,5 +1,5 @@
 import streamlit as st
-from auth import auth_manager, get_current_user, logout_user
+from auth import auth_manager, get_current_user, logout_user, renew_session
 
 def show_user_menu():
     """Tampilkan menu user di sidebar kanan"""
@@ -126,6 +126,9 @@ def show_profile_settings(user_data):
             
             if success:
                 st.success("✅ Profil berhasil diperbarui!")
+                # Changing the password revoked every session, including this one
+                if new_password:
+                    renew_session()
                 # Update session data
                 st.session_state["user_data"] = auth_manager.get_user(st.session_state['username'])
                 st.rerun()
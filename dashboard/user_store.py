@@ -0,0 +1,271 @@
+"""
+SQLite-backed user store for the dashboard.
+
+Each user is one row keyed by username, with an index on email, so a login
+or a settings save reads or writes a single row instead of parsing and
+rewriting a JSON file of every user. Fields other than email and password
+are kept as a JSON document per row. An existing users.json is imported
+once, when the store is empty (see AuthManager.ensure_users_file).
+
+Updates are read-modify-write functions applied inside a transaction, so
+concurrent saves cannot lose each other's changes or leave a partial
+write. Writers in one process take turns on a lock; whoever holds it
+commits every update queued meanwhile in one transaction, so a burst of
+settings saves becomes a single flush.
+"""
+
+import copy
+import json
+import sqlite3
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    email TEXT,
+    password TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS users_email ON users (email);
+"""
+
+def _to_row(username: str, user: Dict):
+    data = {key: value for key, value in user.items() if key not in ('email', 'password')}
+    return username, user.get('email'), user['password'], json.dumps(data, default=str)
+
+def _from_row(email: Optional[str], password: str, data: str) -> Dict:
+    user = json.loads(data)
+    user['email'] = email
+    user['password'] = password
+    return user
+
+class UserStore:
+    """Users table with indexed lookup by username and email; one connection per thread"""
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._pending: List[Dict] = []
+        self._pending_lock = threading.Lock()
+        self.stats = {'updates': 0, 'flushes': 0}
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+            # WAL lets readers (logins) proceed while a settings save is being written
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def get(self, username: str) -> Optional[Dict]:
+        row = self._connection().execute(
+            "SELECT email, password, data FROM users WHERE username = ?", (username,)).fetchone()
+        return _from_row(*row) if row else None
+
+    def get_password(self, username: str) -> Optional[str]:
+        """Stored password hash, without decoding the rest of the user"""
+        row = self._connection().execute("SELECT password FROM users WHERE username = ?", (username,)).fetchone()
+        return row[0] if row else None
+
+    def find_username_by_email(self, email: str) -> Optional[str]:
+        row = self._connection().execute("SELECT username FROM users WHERE email = ?", (email,)).fetchone()
+        return row[0] if row else None
+
+    def insert(self, username: str, user: Dict) -> bool:
+        """Add a user; False if the username is taken"""
+        try:
+            with self._write_lock:
+                self._connection().execute("INSERT INTO users VALUES (?, ?, ?, ?)", _to_row(username, user))
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    def update(self, username: str, change: Callable[[Dict], None]) -> bool:
+        """
+        Apply `change` to the current record of one user and commit it;
+        False if there is no such user. Blocks until the change is written.
+        """
+        request = {'username': username, 'change': change, 'result': None, 'error': None, 'done': False}
+        with self._pending_lock:
+            self._pending.append(request)
+        with self._write_lock:
+            # A writer that held the lock meanwhile may already have flushed this request
+            if not request['done']:
+                self._flush()
+        if request['error'] is not None:
+            raise request['error']
+        return request['result']
+
+    def _flush(self):
+        """Commit every queued update in one transaction, writing each changed user once"""
+        with self._pending_lock:
+            batch, self._pending = self._pending, []
+        conn = self._connection()
+        users: Dict[str, Optional[Dict]] = {}
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for request in batch:
+                username = request['username']
+                if username not in users:
+                    row = conn.execute("SELECT email, password, data FROM users WHERE username = ?",
+                                       (username,)).fetchone()
+                    users[username] = _from_row(*row) if row else None
+                if users[username] is None:
+                    request['result'] = False
+                    continue
+                # Apply to a copy so a failing change leaves the record as it was
+                user = copy.deepcopy(users[username])
+                try:
+                    request['change'](user)
+                except Exception as e:
+                    request['error'] = e
+                    continue
+                users[username] = user
+                request['result'] = True
+
+            changed = {request['username'] for request in batch if request['result']}
+            conn.executemany("UPDATE users SET email = ?, password = ?, data = ? WHERE username = ?",
+                             [_to_row(username, users[username])[1:] + (username,) for username in changed])
+            conn.execute("COMMIT")
+        except Exception as e:
+            conn.execute("ROLLBACK")
+            for request in batch:
+                request['result'], request['error'] = None, e
+        finally:
+            for request in batch:
+                request['done'] = True
+        self.stats['updates'] += len(batch)
+        self.stats['flushes'] += 1
+
+    def import_users(self, users: Dict[str, Dict]):
+        """Insert or replace many users in one transaction (used to migrate users.json)"""
+        conn = self._connection()
+        with self._write_lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany("INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?)",
+                                 (_to_row(username, user) for username, user in users.items()))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        logger.info(f"Imported {len(users)} users into {self.db_file}")
+
+def benchmark(n: int = 100_000, rounds: int = 20):
+    """Login and settings-save latency with `n` users: users.json (the old path) vs the SQLite store"""
+    import os
+    import time
+    import hashlib
+    import tempfile
+
+    # Importing auth creates its default store in the working directory
+    workdir = tempfile.mkdtemp()
+    os.chdir(workdir)
+    from auth import AuthManager
+
+    users_file = os.path.join(workdir, "benchmark_users.json")
+    password = hashlib.sha256(b"secret").hexdigest()
+    users = {
+        f"user{i}": {
+            "password": password, "email": f"user{i}@example.com", "name": f"User {i}", "role": "user",
+            "created_at": "2025-01-01T00:00:00",
+            "settings": {"language": "id", "modules": ["prices", "news"], "api_keys": {}, "theme": "dark"}
+        }
+        for i in range(n)
+    }
+    with open(users_file, 'w') as f:
+        json.dump(users, f, indent=2)
+
+    # Previous path: every call parses users.json, every save rewrites it
+    start = time.perf_counter()
+    for i in range(rounds):
+        with open(users_file) as f:
+            assert json.load(f)["user42"]["password"] == hashlib.sha256(b"secret").hexdigest()
+    json_login = (time.perf_counter() - start) / rounds
+    start = time.perf_counter()
+    for i in range(rounds):
+        with open(users_file) as f:
+            loaded = json.load(f)
+        loaded["user42"]["settings"].update({"language": "en"})
+        with open(users_file, 'w') as f:
+            json.dump(loaded, f, indent=2, default=str)
+    json_save = (time.perf_counter() - start) / rounds
+
+    start = time.perf_counter()
+    manager = AuthManager(users_file)
+    migration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(rounds * 50):
+        assert manager.authenticate(f"user{i * 97 % n}", "secret")[0]
+    sqlite_login = (time.perf_counter() - start) / (rounds * 50)
+    start = time.perf_counter()
+    for i in range(rounds * 50):
+        manager.update_user_settings(f"user{i * 97 % n}", {"language": "en"})
+    sqlite_save = (time.perf_counter() - start) / (rounds * 50)
+
+    print(f"{n:,} users, migrated from users.json in {migration:.1f}s")
+    print(f"  login:         users.json {json_login * 1e3:8.1f}ms, SQLite {sqlite_login * 1e3:.3f}ms")
+    print(f"  settings save: users.json {json_save * 1e3:8.1f}ms, SQLite {sqlite_save * 1e3:.3f}ms")
+
+def stress_test(writers: int = 100, updates: int = 20) -> bool:
+    """
+    `writers` threads save settings of the same user at once, each adding its
+    own keys and incrementing a shared counter; every update must survive
+    """
+    import os
+    import time
+    import tempfile
+
+    store = UserStore(os.path.join(tempfile.mkdtemp(), "stress.db"))
+    store.insert("admin", {"password": "x", "email": "admin@example.com", "settings": {"api_keys": {}, "saves": 0}})
+    barrier = threading.Barrier(writers)
+
+    def writer(index: int):
+        barrier.wait()
+        for i in range(updates):
+            def change(user):
+                user["settings"]["api_keys"][f"writer{index}_{i}"] = i
+                user["settings"]["saves"] += 1
+            assert store.update("admin", change)
+
+    threads = [threading.Thread(target=writer, args=(index,)) for index in range(writers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    settings = UserStore(store.db_file).get("admin")["settings"]
+    expected = writers * updates
+    ok = settings["saves"] == expected and len(settings["api_keys"]) == expected
+    print(f"{writers} writers x {updates} settings saves: {settings['saves']}/{expected} counted, "
+          f"{len(settings['api_keys'])}/{expected} keys kept -> {'no lost updates' if ok else 'LOST UPDATES'}")
+    print(f"  {store.stats['updates']} updates in {store.stats['flushes']} flushes "
+          f"({store.stats['updates'] / store.stats['flushes']:.1f} per transaction), {elapsed:.2f}s")
+    return ok
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(description='User store benchmark and concurrency stress test')
+    parser.add_argument('--stress', action='store_true', help='Run the concurrent writer stress test')
+    parser.add_argument('--users', type=int, default=100_000, help='Users in the latency benchmark')
+    args = parser.parse_args()
+
+    if args.stress:
+        sys.exit(0 if stress_test() else 1)
+    benchmark(args.users)
@@ -9,27 +9,25 @@ import sys
 import subprocess
 import argparse
 import logging
+from importlib.util import find_spec
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 def check_dependencies():
-    """Check if all required dependencies are installed"""
+    """Check if all required dependencies are installed (locates them without importing)"""
     required_packages = [
         'streamlit',
         'pandas', 
         'requests',
-        'streamlit-autorefresh',
         'feedparser'
     ]
     
     missing_packages = []
     
     for package in required_packages:
-        try:
-            __import__(package.replace('-', '_'))
-        except ImportError:
+        if find_spec(package.replace('-', '_')) is None:
             missing_packages.append(package)
     
     if missing_packages:
@@ -84,6 +82,26 @@ def run_streamlit_app(host='localhost', port=8501, debug=False):
         logger.info("Application stopped by user")
         return True
 
+def run_data_service(port=8765, background=False):
+    """Run the data service (ingestion + snapshot API); in the background returns the process"""
+    cmd = [sys.executable, '-m', 'backend.data_service', '--port', str(port)]
+    env = dict(os.environ, DATA_SERVICE_URL=f"http://127.0.0.1:{port}")
+    
+    if background:
+        logger.info(f"Starting data service on port {port} in the background")
+        return subprocess.Popen(cmd, env=env)
+    
+    logger.info(f"Starting data service on port {port}")
+    try:
+        subprocess.run(cmd, env=env, check=True)
+        return True
+    except subprocess.CalledProcessError as e:
+        logger.error(f"Data service failed: {e}")
+        return False
+    except KeyboardInterrupt:
+        logger.info("Data service stopped by user")
+        return True
+
 def test_components():
     """Test individual components before running the full app"""
     logger.info("Testing application components...")
@@ -136,6 +154,68 @@ def test_components():
         logger.error(f"Error during component testing: {e}")
         return False
 
+# Runs in a child process under -X importtime: the test harness is imported
+# first, then a marker separates it from the imports of the first render
+PROFILE_SCRIPT = """
+import os, sys, time, tempfile, logging
+sys.path.insert(0, {dashboard_dir!r})
+os.chdir(tempfile.mkdtemp())  # auth.py creates its user store (users.db) in the working directory
+logging.disable(logging.WARNING)
+start = time.perf_counter()
+import streamlit
+framework = time.perf_counter() - start
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app_path!r}, default_timeout=120)
+at.session_state['authenticated'] = True
+at.session_state['username'] = 'profile'
+at.session_state['user_data'] = {{'name': 'Profile', 'settings': {{'language': 'en', 'modules': {modules!r}}}}}
+sys.stderr.write("--- first render ---\\n")
+start = time.perf_counter()
+at.run()
+print(framework, time.perf_counter() - start, len(at.exception))
+"""
+
+def parse_import_times(lines):
+    """Cumulative import time (ms) per top-level package from -X importtime output"""
+    totals = {}
+    for line in lines:
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if name.startswith('  '):
+            continue  # imported by another module, already inside its parent's total
+        parts = name.strip().split('.')
+        # First-party modules per module, third-party per package
+        package = '.'.join(parts[:2]) if parts[0] in ('backend', 'ai') else parts[0]
+        totals[package] = totals.get(package, 0) + int(cumulative) / 1000
+    return totals
+
+def profile_startup(modules_sets=(('prices', 'news'), ('prices', 'news', 'whale_tx', 'whale_positions')), top=10):
+    """Report import time of the Streamlit framework and of the dashboard's first render"""
+    dashboard_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dashboard')
+    app_path = os.path.join(dashboard_dir, 'app.py')
+
+    for modules in modules_sets:
+        script = PROFILE_SCRIPT.format(dashboard_dir=dashboard_dir, app_path=app_path, modules=list(modules))
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', script],
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            logger.error(f"Startup profile failed: {result.stderr.strip().splitlines()[-1:]}")
+            return False
+
+        framework, first_render, errors = result.stdout.split()[-3:]
+        stderr = result.stderr.splitlines()
+        marker = stderr.index("--- first render ---")
+        imports = parse_import_times(stderr[marker + 1:])
+
+        print(f"\nModules: {', '.join(modules)}")
+        print(f"  streamlit import:  {float(framework) * 1e3:7.0f}ms (server start)")
+        print(f"  first render:      {float(first_render) * 1e3:7.0f}ms, "
+              f"{sum(imports.values()):.0f}ms of it importing, {errors} errors")
+        for package, ms in sorted(imports.items(), key=lambda item: item[1], reverse=True)[:top]:
+            print(f"    {package:<20} {ms:7.1f}ms")
+    return True
+
 def main():
     """Main function"""
     parser = argparse.ArgumentParser(description='Bloomberg Crypto Lokal Runner')
@@ -144,6 +224,11 @@ def main():
     parser.add_argument('--debug', action='store_true', help='Enable debug mode')
     parser.add_argument('--test', action='store_true', help='Test components only')
     parser.add_argument('--setup', action='store_true', help='Setup directories and dependencies')
+    parser.add_argument('--service', action='store_true', help='Run only the data service')
+    parser.add_argument('--with-service', action='store_true', help='Start the data service alongside the dashboard')
+    parser.add_argument('--service-port', type=int, default=8765, help='Data service port')
+    parser.add_argument('--local-ingestion', action='store_true', help='Without a data service, ingest data inside the dashboard process')
+    parser.add_argument('--profile-startup', action='store_true', help='Report an import-time breakdown of the dashboard startup')
     
     args = parser.parse_args()
     
@@ -159,6 +244,10 @@ def main():
         logger.error("❌ Dependency check failed. Please install requirements.")
         sys.exit(1)
     
+    # Startup profile
+    if args.profile_startup:
+        sys.exit(0 if profile_startup() else 1)
+    
     # Test components if requested
     if args.test:
         if test_components():
@@ -168,8 +257,19 @@ def main():
             logger.error("❌ Some tests failed!")
             sys.exit(1)
     
+    # Data service only
+    if args.service:
+        sys.exit(0 if run_data_service(args.service_port) else 1)
+    
     # Run the application
+    service = None
     try:
+        if args.with_service:
+            service = run_data_service(args.service_port, background=True)
+            os.environ['DATA_SERVICE_URL'] = f"http://127.0.0.1:{args.service_port}"
+        elif args.local_ingestion:
+            os.environ['LOCAL_INGESTION'] = "1"
+        
         logger.info("🎯 Starting Streamlit application...")
         success = run_streamlit_app(args.host, args.port, args.debug)
         
@@ -182,6 +282,9 @@ def main():
     except Exception as e:
         logger.error(f"❌ Unexpected error: {e}")
         sys.exit(1)
+    finally:
+        if service is not None:
+            service.terminate()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,177 @@
+"""
+Local stand-in for the Telegram Bot API.
+
+Replays recorded updates through getUpdates and records every sendMessage
+call, so the command bot can be exercised (and load tested) without
+talking to api.telegram.org.
+
+    python telegram/bot_api_stub.py --updates 5000
+"""
+
+import os
+import sys
+import json
+import time
+import copy
+import asyncio
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import urlparse, parse_qs
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+RECORDED_UPDATES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recorded_updates.json")
+
+def load_recorded_updates(path: str = RECORDED_UPDATES_FILE, count: int = None) -> List[Dict]:
+    """
+    Load recorded updates, repeating them with fresh update_ids until `count` is reached
+    """
+    with open(path, 'r') as f:
+        recorded = json.load(f)
+
+    if count is None:
+        return recorded
+
+    updates = []
+    first_id = recorded[0]['update_id']
+    for i in range(count):
+        update = copy.deepcopy(recorded[i % len(recorded)])
+        update['update_id'] = first_id + i
+        updates.append(update)
+    return updates
+
+class BotApiStub:
+    """In-process HTTP server speaking the subset of the Bot API the bot uses"""
+
+    def __init__(self, updates: List[Dict], host: str = "127.0.0.1", port: int = 0,
+                 max_wait: float = 0.5):
+        self.updates = updates
+        self.max_wait = max_wait
+        self.sent: List[Dict] = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _pending(self, offset: int, limit: int) -> List[Dict]:
+        # update_ids are contiguous, so the slice start can be computed directly
+        if not self.updates:
+            return []
+        start = max(0, offset - self.updates[0]['update_id'])
+        return self.updates[start:start + limit]
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, payload: Dict):
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if not parsed.path.endswith("/getUpdates"):
+                    self.send_error(404)
+                    return
+
+                query = parse_qs(parsed.query)
+                offset = int(query.get('offset', ['0'])[0])
+                limit = int(query.get('limit', ['100'])[0])
+                timeout = float(query.get('timeout', ['0'])[0])
+
+                result = stub._pending(offset, limit)
+                if not result:
+                    # Imitate long polling without blocking shutdown for too long
+                    time.sleep(min(timeout, stub.max_wait))
+                self._reply({'ok': True, 'result': result})
+
+            def do_POST(self):
+                if not self.path.endswith("/sendMessage"):
+                    self.send_error(404)
+                    return
+
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                with stub._lock:
+                    stub.sent.append(payload)
+                    message_id = len(stub.sent)
+                self._reply({'ok': True, 'result': {'message_id': message_id, 'chat': {'id': payload.get('chat_id')}}})
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+def _warm_caches_with_fallback_data():
+    """Fill the backend caches offline so the handlers have something to answer with"""
+    from backend import price_feed, news_feed, whale_position_binance
+
+    now = time.time()
+    price_feed.PRICE_CACHE.update({'data': price_feed.get_fallback_prices(), 'timestamp': now})
+    news_feed.NEWS_CACHE.update({'data': news_feed.fetch_fallback_news(), 'timestamp': now})
+    whale_position_binance.POSITIONS_CACHE.update({
+        'positions': whale_position_binance.get_fallback_positions(),
+        'timestamp': now
+    })
+
+async def _replay(stub: BotApiStub, workers: int) -> Dict:
+    from telegram.command_bot import TelegramCommandBot, dispatch_command
+
+    expected = sum(
+        1 for update in stub.updates
+        if dispatch_command(update['message'].get('text', '')) is not None
+    )
+    bot = TelegramCommandBot("TEST", api_url=stub.url, workers=workers, poll_timeout=1)
+
+    start = time.perf_counter()
+    task = asyncio.create_task(bot.run())
+    while bot.stats['replied'] + bot.stats['failed'] < expected:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    bot.stop()
+    await task
+
+    return {'expected': expected, 'elapsed': elapsed, **bot.stats}
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay recorded updates against the command bot')
+    parser.add_argument('--updates', type=int, default=2000, help='Number of updates to replay')
+    parser.add_argument('--workers', type=int, default=16, help='Bot worker pool size')
+    args = parser.parse_args()
+
+    _warm_caches_with_fallback_data()
+    stub = BotApiStub(load_recorded_updates(count=args.updates)).start()
+    try:
+        result = asyncio.run(_replay(stub, args.workers))
+    finally:
+        stub.stop()
+
+    rate = result['replied'] / result['elapsed'] if result['elapsed'] else 0
+    print(f"Replayed {args.updates} updates, {result['expected']} commands")
+    print(f"Replied: {result['replied']}  Failed: {result['failed']}  Recorded by stub: {len(stub.sent)}")
+    print(f"Elapsed: {result['elapsed']:.2f}s  Throughput: {rate:,.0f} commands/sec")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""
+Telegram command bot (long polling) yang menjawab dari cache backend.
+
+Perintah yang didukung:
+    /price BTC   - harga terakhir dari cache price_feed
+    /news eth    - berita terbaru dari cache news_feed (filter kata kunci)
+    /whales      - posisi whale terbaru dari cache whale_position_binance
+    /liq BTC     - likuidasi terbaru dari stream Binance futures
+
+Handler tidak pernah memicu fetch ke upstream; data dibaca dari data service
+(backend/data_service.py), atau dari cache lokal yang diisi refresher jika
+service tidak berjalan. Likuidasi dan open interest hanya ada di data
+service: tanpa service, /liq menjawab "data belum tersedia" dan /whales
+tampil tanpa OI, bot tidak membuka koneksi Binance sendiri. Update diterima
+lewat getUpdates dan diproses oleh pool worker asyncio.
+"""
+
+import os
+import sys
+import html
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.price_feed import SYMBOL_TO_COIN_ID
+from backend.data_client import (get_cached_prices, get_cached_news, get_cached_positions, get_liquidations,
+                                 get_open_interest_deltas, data_service_running)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TELEGRAM_API_URL = "https://api.telegram.org"
+POLL_TIMEOUT = 30      # seconds, long-polling timeout for getUpdates
+POLL_LIMIT = 100       # max updates per getUpdates call (Bot API limit)
+WORKER_COUNT = 16
+QUEUE_SIZE = 1000
+MAX_POLL_BACKOFF = 60  # seconds, longest wait between failed getUpdates calls
+
+NO_DATA_MESSAGE = "⏳ Data belum tersedia, coba lagi sebentar lagi."
+
+# Keyword aliases so "/news eth" also matches "Ethereum" headlines
+NEWS_KEYWORDS = {
+    'btc': ['btc', 'bitcoin'],
+    'eth': ['eth', 'ethereum', 'ether'],
+    'sol': ['sol', 'solana'],
+    'bnb': ['bnb', 'binance coin', 'binancecoin'],
+    'ada': ['ada', 'cardano'],
+    'dot': ['dot', 'polkadot']
+}
+
+def handle_price(args: List[str]) -> str:
+    """Answer /price <SYMBOL> from the cached CoinGecko data"""
+    if not args:
+        return "Gunakan: /price BTC"
+
+    symbol = args[0].upper()
+    coin_id = SYMBOL_TO_COIN_ID.get(symbol, symbol.lower())
+
+    prices = get_cached_prices()
+    if not prices:
+        return NO_DATA_MESSAGE
+
+    data = prices.get(coin_id)
+    if not data:
+        return f"❓ Simbol tidak dikenal: {html.escape(symbol)}"
+
+    change = data.get('usd_24h_change', 0)
+    return f"💰 <b>{html.escape(symbol)}</b>: ${data['usd']:,.2f} ({change:+.2f}% 24h)"
+
+def handle_news(args: List[str], max_items: int = 5) -> str:
+    """Answer /news [keyword] from the cached news list"""
+    news = get_cached_news()
+    if not news:
+        return NO_DATA_MESSAGE
+
+    if args:
+        keyword = args[0].lower()
+        terms = NEWS_KEYWORDS.get(keyword, [keyword])
+        news = [
+            item for item in news
+            if any(term in f"{item['title']} {item['summary']}".lower() for term in terms)
+        ]
+        if not news:
+            return f"📰 Tidak ada berita untuk '{html.escape(args[0])}'"
+
+    lines = [f"📰 <b>{html.escape(item['title'])}</b>\n{html.escape(item['link'])}" for item in news[:max_items]]
+    return "\n\n".join(lines)
+
+def handle_whales(args: List[str], max_items: int = 5) -> str:
+    """Answer /whales from the cached Binance whale positions"""
+    positions = get_cached_positions()
+    if not positions:
+        return NO_DATA_MESSAGE
+
+    # Open interest growth tells whether the dominant side is adding positions;
+    # it is collected by the data service only
+    oi_1h = get_open_interest_deltas().get('1h', {}) if data_service_running() else {}
+    lines = ["🐋 <b>Whale Positions</b>"]
+    for pos in positions[:max_items]:
+        line = (
+            f"{pos['symbol']} {pos['side']} ~${pos['amount_usd']:,} "
+            f"(L {pos['long_ratio']*100:.1f}% / S {pos['short_ratio']*100:.1f}%)"
+        )
+        oi = oi_1h.get(pos['symbol'])
+        if oi:
+            line += f" OI 1h {oi['oi_change_pct']:+.1f}%"
+        lines.append(line)
+    return "\n".join(lines)
+
+def handle_liquidations(args: List[str], max_items: int = 5) -> str:
+    """Answer /liq [SYMBOL] from the data service's Binance liquidation stream"""
+    if not data_service_running():
+        return NO_DATA_MESSAGE
+    liquidations = get_liquidations(100)
+    if args:
+        symbol = args[0].upper()
+        liquidations = [liq for liq in liquidations if liq['symbol'].startswith(symbol)]
+    if not liquidations:
+        return "💤 Belum ada likuidasi" + (f" untuk {html.escape(args[0].upper())}" if args else "")
+
+    lines = ["💥 <b>Likuidasi Terbaru</b>"]
+    for liq in reversed(liquidations[-max_items:]):
+        lines.append(f"{liq['time'][11:]} {liq['symbol']} {liq['side']} ${liq['amount_usd']:,.0f} "
+                     f"@ {liq['current_price']:,}")
+    return "\n".join(lines)
+
+COMMANDS = {
+    '/price': handle_price,
+    '/news': handle_news,
+    '/whales': handle_whales,
+    '/liq': handle_liquidations
+}
+
+def dispatch_command(text: str) -> Optional[str]:
+    """
+    Parse a message text and return the reply, or None if it is not a known command
+    """
+    if not text or not text.startswith('/'):
+        return None
+
+    parts = text.split()
+    # Strip "@BotName" suffix used in group chats
+    command = parts[0].split('@', 1)[0].lower()
+    handler = COMMANDS.get(command)
+    if handler is None:
+        return None
+
+    try:
+        return handler(parts[1:])
+    except Exception as e:
+        logger.error(f"Error handling {command}: {e}")
+        return "❌ Terjadi kesalahan saat memproses perintah"
+
+class TelegramApiError(Exception):
+    """Non-200 reply from the Bot API; retry_after is set when Telegram asks us to slow down"""
+
+    def __init__(self, status: int, description: str = "", retry_after: Optional[int] = None):
+        super().__init__(f"{status} {description}".strip())
+        self.status = status
+        self.retry_after = retry_after
+
+class TelegramCommandBot:
+    """Long-polling command bot with an asyncio worker pool"""
+
+    def __init__(self, token: str, api_url: str = TELEGRAM_API_URL,
+                 workers: int = WORKER_COUNT, poll_timeout: int = POLL_TIMEOUT):
+        self.base_url = f"{api_url.rstrip('/')}/bot{token}"
+        self.workers = workers
+        self.poll_timeout = poll_timeout
+        self.offset = 0
+        self.stats = {'received': 0, 'replied': 0, 'failed': 0}
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=workers + 1, thread_name_prefix="tg-http")
+        self._queue: Optional[asyncio.Queue] = None
+        self._stopping = False
+
+    def _session(self) -> requests.Session:
+        """One requests.Session per executor thread (keep-alive connections)"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+        return session
+
+    def _get_updates(self) -> List[Dict]:
+        params = {'offset': self.offset, 'timeout': self.poll_timeout, 'limit': POLL_LIMIT}
+        response = self._session().get(
+            f"{self.base_url}/getUpdates",
+            params=params,
+            timeout=self.poll_timeout + 10
+        )
+        if response.status_code != 200:
+            try:
+                body = response.json()
+            except ValueError:
+                body = {}
+            raise TelegramApiError(response.status_code, body.get('description', ''),
+                                   body.get('parameters', {}).get('retry_after'))
+        return response.json().get('result', [])
+
+    def _send_message(self, chat_id: int, text: str) -> bool:
+        # Replies are HTML with every dynamic value escaped by the handlers
+        payload = {'chat_id': chat_id, 'text': text, 'parse_mode': 'HTML'}
+        response = self._session().post(f"{self.base_url}/sendMessage", json=payload, timeout=10)
+        if response.status_code != 200:
+            logger.warning(f"sendMessage failed: {response.status_code} {response.text}")
+            return False
+        return True
+
+    async def _poll_loop(self):
+        loop = asyncio.get_running_loop()
+        backoff = 1
+        while not self._stopping:
+            try:
+                updates = await loop.run_in_executor(self._executor, self._get_updates)
+            except (requests.exceptions.RequestException, TelegramApiError) as e:
+                # 429 says how long to wait; otherwise (401, 409, network) back off exponentially
+                delay = getattr(e, 'retry_after', None) or backoff
+                logger.warning(f"getUpdates failed ({e}), retrying in {delay}s")
+                await asyncio.sleep(delay)
+                backoff = min(backoff * 2, MAX_POLL_BACKOFF)
+                continue
+            backoff = 1
+
+            for update in updates:
+                self.offset = max(self.offset, update['update_id'] + 1)
+                self.stats['received'] += 1
+                # Blocks when workers fall behind, which also pauses polling
+                await self._queue.put(update)
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            update = await self._queue.get()
+            try:
+                message = update.get('message') or update.get('edited_message')
+                if not message:
+                    continue
+
+                # Handlers may revalidate against the data service over HTTP
+                reply = await loop.run_in_executor(self._executor, dispatch_command, message.get('text', ''))
+                if reply is None:
+                    continue
+
+                sent = await loop.run_in_executor(
+                    self._executor, self._send_message, message['chat']['id'], reply
+                )
+                self.stats['replied' if sent else 'failed'] += 1
+            except Exception as e:
+                self.stats['failed'] += 1
+                logger.error(f"Error processing update {update.get('update_id')}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def run(self):
+        """Poll and answer commands until stop() is called"""
+        self._queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self._stopping = False
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Telegram command bot started with {self.workers} workers")
+        try:
+            await self._poll_loop()
+            await self._queue.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            logger.info(f"Telegram command bot stopped: {self.stats}")
+
+    def stop(self):
+        """Stop polling after the current getUpdates call returns"""
+        self._stopping = True
+
+async def refresh_caches(interval: int = 60):
+    """
+    Keep the price, news and position caches warm so the command handlers
+    have data to serve, whenever the data service (which owns ingestion) is
+    not running. Streams and collectors (liquidations, open interest) are
+    never started here.
+    """
+    from backend.price_feed import get_prices
+    from backend.news_feed import fetch_news
+    from backend.whale_position_binance import get_binance_whale_positions
+
+    loop = asyncio.get_running_loop()
+    service_up = None
+    while True:
+        running = await loop.run_in_executor(None, data_service_running)
+        if running != service_up:
+            logger.info("Data service running, serving its snapshots" if running
+                        else "Data service not running, refreshing backend caches in-process")
+            service_up = running
+        if running:
+            await asyncio.sleep(interval)
+            continue
+        for fetch in (get_prices, fetch_news, get_binance_whale_positions):
+            try:
+                await loop.run_in_executor(None, fetch)
+            except Exception as e:
+                logger.error(f"Error refreshing {fetch.__name__}: {e}")
+        await asyncio.sleep(interval)
+
+async def main():
+    from config import TELEGRAM_BOT_TOKEN
+
+    bot = TelegramCommandBot(TELEGRAM_BOT_TOKEN)
+    refresher = asyncio.create_task(refresh_caches())
+    try:
+        await bot.run()
+    finally:
+        refresher.cancel()
+
+if __name__ == "__main__":
+    asyncio.run(main())